@@ -20,6 +20,7 @@ ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS category text;
 ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS variance_label text;
 ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS confidence_score integer;
 ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS analysis_structure jsonb;
+ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS fixture_id text;
 
 -- 4. VERIFICATION
 -- Run this script to fully reset and prep the DB for V1.0 Agent.
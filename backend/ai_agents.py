@@ -1,15 +1,21 @@
 import os
 import requests
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from analysis_cache import AnalysisCache, analysis_key
+
+# Bump when the narrative prompt/template changes so cached outputs are not reused.
+NARRATIVE_PROMPT_VERSION = "narrative-v2"  # v2: cached as an object, not a JSON string
 
 class GeminiAgentService:
     """
     Service to interact with Google Gemini API for Search, Vision, and Text analysis.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: Optional[AnalysisCache] = None):
         self.api_key = api_key
         self.base_url = "https://generativelanguage.googleapis.com/v1beta/models"
+        self.cache = cache
 
     def search_injury_news(self, player_name: str, team_name: str) -> Dict[str, Any]:
         """
@@ -42,11 +48,25 @@ class GeminiAgentService:
             "sources": ["BBC Sport", "Sitio Oficial Club"]
         }
 
-    def generate_insight_narrative(self, match: str, odds: float, model_probability: float, market_probability: float, stats: dict = None) -> str:
+    def generate_insight_narrative(self, match: str, odds: float, model_probability: float, market_probability: float, stats: dict = None) -> Dict[str, Any]:
         """
         Generates a narrative following the V1.0 'Probabilidad Lógica' structure.
+        Returns the analysis object ({'analysis_text', 'structured'}) ready for the
+        analysis_structure JSONB column; served from the analysis cache when the same
+        inputs were narrated recently.
         """
         if stats is None: stats = {}
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = analysis_key(
+                match, "narrative",
+                {"odds": odds, "model_probability": model_probability, "market_probability": market_probability, "stats": stats},
+                NARRATIVE_PROMPT_VERSION
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         # 1. ACTUAL PROMPT (Gemini)
         prompt = f"""
@@ -69,8 +89,6 @@ class GeminiAgentService:
         """
 
         # 2. SIMULATED RESONSE (Mock for Demo)
-        import json
-        
         h_xg = stats.get('home_xg_last_5', '1.8')
         a_xg = stats.get('away_xg_last_5', '1.1')
         poss = stats.get('possession_avg', '55')
@@ -90,7 +108,7 @@ class GeminiAgentService:
             f"Se proyecta un partido de dominio posicional ({poss}% est.) donde la presión alta forzará errores en salida."
         )
         
-        return json.dumps({
+        result = {
             "analysis_text": narrative,
             "structured": {
                 "hierarchy": f"Local promedia {h_xg} xG (últimos 5).",
@@ -98,23 +116,35 @@ class GeminiAgentService:
                 "safety": "Retorno de titulares en mediocampo.",
                 "tactical": f"Dominio posicional estimado del {poss}%."
             }
-        }, ensure_ascii=False)
+        }
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
 
     def analyze_bet_image(self, image_bytes: bytes) -> Dict[str, Any]:
         """
         Uses Gemini Vision to parse a betting slip image.
         Extracts: User, Market, Selection, Stake, Odds.
         """
+        return self.analyze_bet_images([image_bytes])[0]
+
+    def analyze_bet_images(self, images: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Parses several betting slips in one Vision request (slip_ingestion.SlipIngestionPipeline
+        batches uploads through here). Returns one result per image, in order:
+        {"bookmaker", "selections": [{"match", "market", "selection", "odds", "confidence"}], "stake"}
+        """
         # Placeholder for Vision API call
-        # response = model.generate_content([prompt, image])
-        
-        return {
+        # response = model.generate_content([prompt, *images])
+
+        return [{
             "bookmaker": "Detected Bookie",
             "selections": [
-                {"market": "Over 2.5 Goals", "odds": 1.95, "confidence": 0.98}
+                {"match": None, "market": "Over 2.5 Goals", "selection": "Over 2.5", "odds": 1.95, "confidence": 0.98}
             ],
             "stake": 100.00
-        }
+        } for _ in images]
 
 class GeoSpatialAgent:
     """
@@ -0,0 +1,138 @@
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class AsyncSupabaseREST:
+    """
+    Non-blocking data-access layer over Supabase's PostgREST API.
+
+    The synchronous `supabase` client blocks the event loop on every round trip; this
+    layer uses one pooled httpx.AsyncClient (keep-alive, bounded connections) so FastAPI
+    handlers can await database calls while other requests keep being served.
+    Filters use PostgREST syntax, e.g. {"user_id": "eq.<uuid>"}.
+    """
+
+    def __init__(self, url: str, key: str, max_connections: int = 50, timeout: float = 10.0):
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.auth_url = f"{url.rstrip('/')}/auth/v1"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+        }
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.rest_url, headers=self.headers, limits=self.limits, timeout=self.timeout
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- Generic PostgREST verbs ---
+
+    async def select(
+        self, table: str, columns: str = "*", filters: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = None, order: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        params = {"select": columns, **(filters or {})}
+        if order is not None:
+            params["order"] = order
+        if limit is not None:
+            params["limit"] = str(limit)
+        response = await self.client.get(f"/{table}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def insert(self, table: str, rows: Union[Dict, List[Dict]], prefer: str = "return=minimal") -> None:
+        response = await self.client.post(f"/{table}", json=rows, headers={"Prefer": prefer})
+        response.raise_for_status()
+
+    async def upsert(self, table: str, rows: List[Dict], on_conflict: str, ignore_duplicates: bool = False) -> None:
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        response = await self.client.post(
+            f"/{table}", json=rows, params={"on_conflict": on_conflict},
+            headers={"Prefer": f"resolution={resolution},return=minimal"}
+        )
+        response.raise_for_status()
+
+    async def update(self, table: str, values: Dict[str, Any], filters: Dict[str, str]) -> None:
+        response = await self.client.patch(f"/{table}", json=values, params=filters, headers={"Prefer": "return=minimal"})
+        response.raise_for_status()
+
+    async def rpc(self, function: str, params: Dict[str, Any]) -> Any:
+        response = await self.client.post(f"/rpc/{function}", json=params)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def get_auth_user(self, access_token: str) -> Optional[Dict[str, Any]]:
+        """Supabase Auth user behind a client's access token; None when it is invalid or expired."""
+        response = await self.client.get(f"{self.auth_url}/user", headers={"Authorization": f"Bearer {access_token}"})
+        if response.status_code in (401, 403):
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    # --- Domain helpers (profiles, orders, wallets, credits) ---
+
+    async def get_profile(self, user_id: str, columns: str = "*") -> Dict[str, Any]:
+        rows = await self.select("profiles", columns, {"user_id": f"eq.{user_id}"}, limit=1)
+        return rows[0] if rows else {}
+
+    async def update_profile(self, user_id: str, values: Dict[str, Any]) -> None:
+        await self.update("profiles", values, {"user_id": f"eq.{user_id}"})
+
+    async def update_profiles(self, user_ids: List[str], values: Dict[str, Any]) -> None:
+        """Same update applied to many profiles in one round trip."""
+        if user_ids:
+            await self.update("profiles", values, {"user_id": f"in.({','.join(user_ids)})"})
+
+    async def append_purchased_picks(self, items: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """
+        Atomic server-side append (see append_purchased_picks in database_schema.sql).
+        Takes (user_id, pick_id) pairs and returns the pairs that were actually added.
+        """
+        if not items:
+            return set()
+        rows = await self.rpc("append_purchased_picks", {
+            "p_items": [{"user_id": user_id, "pick_id": pick_id} for user_id, pick_id in items]
+        })
+        return {(str(r["user_id"]), r["pick_id"]) for r in rows or []}
+
+    async def insert_order(self, order: Dict[str, Any]) -> None:
+        await self.insert("orders", order)
+
+    async def insert_orders(self, orders: List[Dict[str, Any]]) -> None:
+        """Bulk insert; orders whose external_id already exists are skipped (provider retries)."""
+        if orders:
+            await self.upsert("orders", orders, on_conflict="external_id", ignore_duplicates=True)
+
+    async def update_wallet_balance(self, user_id: str, new_balance: float) -> None:
+        await self.update("wallets", {"balance": new_balance}, {"user_id": f"eq.{user_id}"})
+
+    async def add_credit_transaction(self, wallet_id: str, amount: float, reason: str, description: str) -> None:
+        await self.insert("credits", {
+            "wallet_id": wallet_id,
+            "amount": amount,
+            "reason": reason,
+            "description": description
+        })
+
+async_db = AsyncSupabaseREST(
+    os.environ.get("SUPABASE_URL") or "https://placeholder.supabase.co",
+    os.environ.get("SUPABASE_SERVICE_KEY") or "placeholder_key",
+    max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50"))
+)
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from async_supabase import async_db
+from picks_writer import structure_analysis
+
+async def backfill_analysis(batch_size: int = 500, dry_run: bool = False, db=async_db) -> Dict[str, Any]:
+    """
+    Converts existing daily_picks rows to the analysis_structure JSONB column.
+
+    Rows still missing analysis_structure are read in keyset pages (id order) and their
+    ai_analysis (plain text, JSON or double-encoded JSON) is parsed with the same
+    structure_analysis() the writers use. Each page is written with a single
+    backfill_analysis_structure RPC (v7_analysis_structure.sql), which skips rows that
+    gained a structure in the meantime, so the tool can be stopped and re-run safely.
+    """
+    report = {"scanned": 0, "updated": 0, "batches": 0}
+    last_id = None
+    start = time.perf_counter()
+    while True:
+        filters = {"analysis_structure": "is.null"}
+        if last_id is not None:
+            filters["id"] = f"gt.{last_id}"
+        rows = await db.select(
+            "daily_picks", "id,ai_analysis,confidence_score", filters=filters, limit=batch_size, order="id.asc"
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        items: List[Dict[str, Any]] = []
+        for row in rows:
+            pick = structure_analysis(dict(row))
+            items.append({"id": str(row["id"]), "ai_analysis": pick["ai_analysis"], "analysis_structure": pick["analysis_structure"]})
+        report["scanned"] += len(rows)
+        report["batches"] += 1
+        if not dry_run:
+            report["updated"] += await db.rpc("backfill_analysis_structure", {"p_items": items}) or 0
+        if len(rows) < batch_size:
+            break
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+async def main(batch_size: int, dry_run: bool):
+    try:
+        report = await backfill_analysis(batch_size, dry_run)
+    finally:
+        await async_db.close()
+    mode = "dry run" if dry_run else "backfill"
+    print(f"analysis_structure {mode}: {report['scanned']} rows scanned, {report['updated']} updated "
+          f"in {report['batches']} batches ({report['seconds']}s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move daily_picks.ai_analysis into the analysis_structure JSONB column.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Parse and count rows without writing")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -0,0 +1,274 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from betting_logic import BettingValueEngine
+from rating_model import DEFAULT_RESULTS_PATH, PoissonRatingModel, load_results
+
+GOLD_EDGE_THRESHOLD = 0.11  # cargar_picks: edge_val > 11 (%) marks the Gold Pick
+
+# One backtest configuration = one selection rule + one staking rule.
+CONFIG_DEFAULTS = {
+    "min_edge": BettingValueEngine.ELITE_EDGE_THRESHOLD,  # bet when p_model - 1/odds > min_edge
+    "min_odds": 1.01,
+    "max_odds": 1000.0,
+    "top_per_day": 0,       # best N edges per day (0 = all that qualify)
+    "staking": "kelly",     # 'kelly': fraction x Kelly of the current bankroll; 'flat': unit x initial bankroll
+    "fraction": 0.25,       # Quarter Kelly, as calculate_kelly_stake
+    "unit": 0.01,
+    "max_exposure": 1.0,    # cap on the day's total stake / bankroll
+}
+
+# The rules hard-coded in the repo, for comparison with the grid
+REPO_RULES = {
+    "elite_alert_quarter_kelly": {"min_edge": BettingValueEngine.ELITE_EDGE_THRESHOLD},
+    "gold_pick_quarter_kelly": {"min_edge": GOLD_EDGE_THRESHOLD, "top_per_day": 1},
+    "any_edge_quarter_kelly": {"min_edge": 0.0},
+}
+
+METRICS = ("final_bankroll", "profit", "staked", "roi", "bets", "hit_rate", "max_drawdown", "clv_mean", "clv_beat_rate")
+
+def config_grid(**axes: Iterable) -> List[Dict[str, Any]]:
+    """Cartesian product of the given axes, e.g. config_grid(min_edge=[0.05, 0.1], fraction=[0.25, 0.5])."""
+    unknown = set(axes) - set(CONFIG_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown config fields: {sorted(unknown)}")
+    names = list(axes)
+    return [{**CONFIG_DEFAULTS, **dict(zip(names, values))} for values in itertools.product(*(axes[n] for n in names))]
+
+def build_history(
+    results: List[Dict[str, Any]],
+    odds_store,
+    model: Optional[PoissonRatingModel] = None,
+    entry_lead_hours: float = 24.0,
+    market: str = "h2h"
+) -> Dict[str, np.ndarray]:
+    """
+    Replays stored results and odds into one row per (match, 1X2 outcome) bet opportunity.
+
+    Walk-forward: each match day is priced by the rating model trained only on earlier
+    results, then those results are learned. The entry price is the best price across
+    books in the last snapshot `entry_lead_hours` before kickoff, and the closing price
+    the best captured closing line. Matches without ratings or stored odds are skipped.
+    """
+    from odds_store import parse_time
+
+    model = model or PoissonRatingModel()
+    results = sorted(results, key=lambda r: r.get("commence_time", ""))
+    leagues: Dict[str, int] = {}
+    cols: Dict[str, List] = {k: [] for k in ("day", "fixture", "league", "outcome", "odds", "closing", "p_model", "won")}
+
+    for _, day_results in itertools.groupby(results, key=lambda r: str(r.get("commence_time", ""))[:10]):
+        day_results = list(day_results)
+        probs, known = model.predict_1x2([r["home_team"] for r in day_results], [r["away_team"] for r in day_results])
+        for r, p, is_known in zip(day_results, probs, known):
+            if not is_known:
+                continue
+            kickoff = parse_time(r["commence_time"])
+            names = (r["home_team"], "Draw", r["away_team"])
+            entry = {}
+            for (_, outcome, _), series in odds_store.line_movement(r["id"], market=market, end=kickoff - int(entry_lead_hours * 3600)).items():
+                entry[outcome] = max(entry.get(outcome, 0.0), float(series["price"][-1]))
+            closing = {}
+            for (m, outcome, _), price in odds_store.closing_line(r["id"]).items():
+                if m == market:
+                    closing[outcome] = max(closing.get(outcome, 0.0), price)
+            result = 0 if r["home_goals"] > r["away_goals"] else 1 if r["home_goals"] == r["away_goals"] else 2
+            for i, name in enumerate(names):
+                if entry.get(name, 0.0) <= 1.0:
+                    continue
+                cols["day"].append(kickoff // 86400)
+                cols["fixture"].append(r["id"])
+                cols["league"].append(leagues.setdefault(r.get("league", ""), len(leagues)))
+                cols["outcome"].append(i)
+                cols["odds"].append(entry[name])
+                cols["closing"].append(closing.get(name, np.nan))
+                cols["p_model"].append(float(p[i]))
+                cols["won"].append(i == result)
+        model.update_many(day_results)
+
+    history = {k: np.array(v) for k, v in cols.items()}
+    history["fixture"] = history["fixture"].astype(str)
+    history["leagues"] = np.array(list(leagues), dtype=str)
+    return history
+
+def save_history(history: Dict[str, np.ndarray], path: str):
+    np.savez_compressed(path, **history)
+
+def load_history(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+class Backtester:
+    """
+    Replays a bet-opportunity history through many selection/staking configurations.
+
+    The history is sorted by day and, within a day, by edge. Each simulated day is one
+    vectorized step over (configurations x that day's opportunities): selection masks,
+    top-N per day, Kelly or flat stakes from each configuration's own bankroll, the
+    exposure cap, settlement and CLV all come from array operations, so a grid of a
+    thousand configurations costs about the same Python overhead as a single one.
+    Configurations can also be split across a process pool.
+
+    History fields (equal-length arrays): 'day' (int), 'odds', 'p_model', 'won' and
+    optionally 'closing' (NaN when no closing line); see build_history().
+    """
+
+    def __init__(self, history: Dict[str, np.ndarray], initial_bankroll: float = 1000.0):
+        odds = np.asarray(history["odds"], dtype=np.float64)
+        p_model = np.asarray(history["p_model"], dtype=np.float64)
+        evaluation = BettingValueEngine().evaluate_batch(odds, p_model, bankroll=1.0, fraction=1.0)
+        valid = evaluation["valid"] & np.isfinite(p_model)
+
+        day = np.asarray(history["day"])[valid]
+        edge = evaluation["edge"][valid]
+        order = np.lexsort((-edge, day))  # by day, best edge first
+        self.initial_bankroll = initial_bankroll
+        self.day = day[order]
+        self.edge = edge[order]
+        self.odds = odds[valid][order]
+        self.kelly = evaluation["kelly_stake"][valid][order]  # full-Kelly fraction of bankroll
+        self.won = np.asarray(history["won"], dtype=bool)[valid][order]
+        self.returns = np.where(self.won, self.odds - 1, -1.0)
+        closing = np.asarray(history.get("closing", np.full(valid.shape, np.nan)), dtype=np.float64)[valid][order]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.clv = np.where(closing > 1.0, self.odds / closing - 1, np.nan)  # > 0: beat the closing line
+        self.bounds = np.concatenate([[0], np.flatnonzero(np.diff(self.day)) + 1, [len(self.day)]])
+        self.days = self.day[self.bounds[:-1]]
+
+    def run(self, configs: List[Dict[str, Any]], workers: int = 1) -> Dict[str, Any]:
+        """
+        Backtests every configuration. Returns {'configs', 'days', 'equity' (configs x days
+        bankroll at the end of each day), 'metrics' ({name: array per config})}.
+        workers > 1 splits the configurations across a process pool.
+        """
+        configs = [{**CONFIG_DEFAULTS, **c} for c in configs]
+        if workers <= 1 or len(configs) < 2 * workers:
+            partial = self._simulate(configs)
+        else:
+            chunks = np.array_split(np.arange(len(configs)), workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(self._simulate, [[configs[i] for i in chunk] for chunk in chunks]))
+            partial = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+        equity = partial.pop("equity")
+        return {"configs": configs, "days": self.days, "equity": equity, "metrics": partial}
+
+    def _simulate(self, configs: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        param = {k: np.array([float(c[k]) for c in configs])[:, None] for k in ("min_edge", "min_odds", "max_odds", "fraction", "unit", "max_exposure")}
+        is_kelly = np.array([c["staking"] == "kelly" for c in configs])[:, None]
+        top = np.array([int(c["top_per_day"]) or np.iinfo(np.int32).max for c in configs])[:, None]
+        flat_stake = param["unit"] * self.initial_bankroll
+        exposure = np.minimum(param["max_exposure"][:, 0], 1.0)
+
+        n = len(configs)
+        bankroll = np.full(n, self.initial_bankroll)
+        peak = bankroll.copy()
+        max_dd = np.zeros(n)
+        staked = np.zeros(n)
+        bets = np.zeros(n)
+        wins = np.zeros(n)
+        clv_sum = np.zeros(n)
+        clv_count = np.zeros(n)
+        clv_beat = np.zeros(n)
+        equity = np.empty((n, len(self.days)))
+
+        for d, (s, e) in enumerate(zip(self.bounds[:-1], self.bounds[1:])):
+            odds = self.odds[s:e]
+            selected = (self.edge[s:e] > param["min_edge"]) & (odds >= param["min_odds"]) & (odds <= param["max_odds"])
+            selected &= np.cumsum(selected, axis=1) <= top  # rows are already best edge first
+
+            stakes = np.where(is_kelly, bankroll[:, None] * param["fraction"] * self.kelly[s:e], flat_stake)
+            stakes = np.where(selected, stakes, 0.0)
+            total = stakes.sum(axis=1)
+            limit = exposure * bankroll
+            over = total > limit
+            if over.any():
+                stakes[over] *= (limit[over] / total[over])[:, None]
+
+            placed = (stakes > 0).astype(np.float64)
+            bankroll = bankroll + stakes @ self.returns[s:e]
+            staked += total.clip(max=limit)
+            bets += placed.sum(axis=1)
+            wins += placed @ self.won[s:e]
+            clv = self.clv[s:e]
+            has_clv = ~np.isnan(clv)
+            clv_sum += placed @ np.where(has_clv, clv, 0.0)
+            clv_count += placed @ has_clv
+            clv_beat += placed @ (has_clv & (np.nan_to_num(clv) > 0))
+
+            np.maximum(peak, bankroll, out=peak)
+            np.maximum(max_dd, 1 - bankroll / peak, out=max_dd)
+            equity[:, d] = bankroll
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "final_bankroll": bankroll,
+                "profit": bankroll - self.initial_bankroll,
+                "staked": staked,
+                "roi": np.where(staked > 0, (bankroll - self.initial_bankroll) / staked, 0.0),
+                "bets": bets.astype(np.int64),
+                "hit_rate": np.where(bets > 0, wins / bets, np.nan),
+                "max_drawdown": max_dd,
+                "clv_mean": np.where(clv_count > 0, clv_sum / clv_count, np.nan),
+                "clv_beat_rate": np.where(clv_count > 0, clv_beat / clv_count, np.nan),
+                "equity": equity,
+            }
+
+def leaderboard(report: Dict[str, Any], key: str = "final_bankroll", top: int = 10, min_bets: int = 1) -> List[Dict[str, Any]]:
+    """Best configurations by `key` (configurations with fewer than `min_bets` bets excluded)."""
+    metrics = report["metrics"]
+    score = np.where(metrics["bets"] >= min_bets, np.nan_to_num(metrics[key], nan=-np.inf), -np.inf)
+    rows = []
+    for i in np.argsort(-score, kind="stable")[:top]:
+        rows.append({**report["configs"][i], **{m: float(metrics[m][i]) for m in METRICS}})
+    return rows
+
+def default_grid() -> List[Dict[str, Any]]:
+    """1,000 configurations around the repo's rules (edge threshold, odds cap, top-N, Kelly fraction)."""
+    return config_grid(
+        min_edge=[0.0, 0.02, 0.04, 0.06, 0.08, 0.10, 0.11, 0.12, 0.15, 0.20],
+        max_odds=[2.5, 3.5, 5.0, 1000.0],
+        top_per_day=[1, 3, 5, 10, 0],
+        fraction=[0.1, 0.25, 0.5, 0.75, 1.0],
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest pick-selection and staking rules over stored odds and results")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="Results history (JSON lines or JSON list)")
+    parser.add_argument("--odds-store", default=None, help="OddsStore directory (default ODDS_STORE_PATH)")
+    parser.add_argument("--history", default=None, help="Prebuilt history .npz (skips replaying the store)")
+    parser.add_argument("--save-history", default=None, help="Write the replayed history to this .npz")
+    parser.add_argument("--entry-lead-hours", type=float, default=24.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.history:
+        history = load_history(args.history)
+    else:
+        from odds_store import OddsStore
+        store = OddsStore(args.odds_store) if args.odds_store else OddsStore()
+        history = build_history(load_results(args.results), store, entry_lead_hours=args.entry_lead_hours)
+        if args.save_history:
+            save_history(history, args.save_history)
+    print(f"📚 History: {len(history['odds'])} opportunities over {len(np.unique(history['day']))} days.")
+
+    backtester = Backtester(history)
+    configs = default_grid() + list(REPO_RULES.values())
+    start = time.perf_counter()
+    report = backtester.run(configs, workers=args.workers)
+    print(f"⏱️ {len(configs)} configurations in {time.perf_counter() - start:.1f}s")
+
+    for name, index in zip(REPO_RULES, range(len(configs) - len(REPO_RULES), len(configs))):
+        m = {k: float(v[index]) for k, v in report["metrics"].items()}
+        print(f"📏 {name}: ROI {m['roi']:+.2%}, {int(m['bets'])} bets, max DD {m['max_drawdown']:.1%}, CLV {m['clv_mean']:+.2%}")
+    print(f"\n🏆 Top {args.top} by final bankroll:")
+    for row in leaderboard(report, top=args.top, min_bets=50):
+        print(f"  edge>{row['min_edge']:.2f} odds<={row['max_odds']:g} top={row['top_per_day']} kelly x{row['fraction']}: "
+              f"ROI {row['roi']:+.2%}, bankroll {row['final_bankroll']:.0f}, max DD {row['max_drawdown']:.1%}, "
+              f"CLV beat {row['clv_beat_rate']:.0%} ({int(row['bets'])} bets)")
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from betting_logic import BettingValueEngine
+
+# Fixed-width histograms keep memory constant and can be merged across chunks/workers.
+DRAWDOWN_BINS = np.linspace(0.0, 1.0, 1001)
+LOG_GROWTH_BINS = np.linspace(-6.0, 6.0, 2401)
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+def parse_units(recommended_stake) -> float:
+    """'1.5 units' -> 1.5 (defaults to 1 unit when missing/unparseable)."""
+    match = re.search(r"\d+(?:[.,]\d+)?", str(recommended_stake or ""))
+    return float(match.group().replace(",", ".")) if match else 1.0
+
+def load_picks_slate(file_path: str) -> Dict[str, np.ndarray]:
+    """
+    Builds a slate from a picks_hoy.json style file.
+    Picks without 'model_probability' (percent) or valid odds are skipped.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    odds, p_model, units = [], [], []
+    for item in items:
+        odds_val = float(item.get("odds") or item.get("cuota") or 0)
+        if "model_probability" not in item or odds_val <= 1.0:
+            continue
+        odds.append(odds_val)
+        p_model.append(float(item["model_probability"]) / 100)
+        units.append(parse_units(item.get("risk_assessment", {}).get("recommended_stake")))
+
+    return {"odds": np.array(odds), "p_model": np.array(p_model), "units": np.array(units)}
+
+class BankrollSimulator:
+    """
+    Monte Carlo bankroll simulator for a slate of picks.
+
+    Each path bets the slate in order (repeated `n_rounds` times), staking with either:
+      - 'kelly': fractional Kelly of the *current* bankroll (calculate_kelly_stake), or
+      - 'flat':  fixed units of `unit_size` x initial bankroll (risk_assessment.recommended_stake).
+
+    Paths are generated in chunked NumPy batches sized from `max_memory_mb`, and can be
+    spread across a process pool. Only per-path running state and fixed histograms are
+    kept, so memory does not grow with the number of paths.
+    """
+
+    def __init__(
+        self,
+        decimal_odds,
+        p_model,
+        policy: str = "kelly",
+        fraction: float = 0.25,
+        units=None,
+        unit_size: float = 0.01,
+        initial_bankroll: float = 1000.0,
+        n_rounds: int = 1,
+        ruin_level: float = 0.1,
+        max_memory_mb: float = 64
+    ):
+        self.odds = np.asarray(decimal_odds, dtype=np.float64)
+        self.p_model = np.asarray(p_model, dtype=np.float64)
+        if self.odds.shape != self.p_model.shape or not np.all(self.odds > 1.0):
+            raise ValueError("Slate needs matching odds/probabilities with odds > 1.0")
+        if policy not in ("kelly", "flat"):
+            raise ValueError("policy must be 'kelly' or 'flat'")
+
+        self.policy = policy
+        self.initial_bankroll = initial_bankroll
+        self.n_rounds = n_rounds
+        self.ruin_level = ruin_level
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+
+        if policy == "kelly":
+            # Stake as a fraction of the current bankroll
+            self.stake_fractions = BettingValueEngine.calculate_kelly_stake_batch(1.0, self.p_model, self.odds, fraction)
+        else:
+            units = np.ones_like(self.odds) if units is None else np.asarray(units, dtype=np.float64)
+            # Fixed monetary stake per pick
+            self.flat_stakes = units * unit_size * initial_bankroll
+
+    @property
+    def n_steps(self) -> int:
+        return self.odds.shape[0] * self.n_rounds
+
+    def chunk_size(self) -> int:
+        """Paths per batch so the uniform draws + running state fit in max_memory_mb."""
+        bytes_per_path = 8 * (self.n_steps + 6)
+        return max(1, self.max_bytes // bytes_per_path)
+
+    def run(self, n_paths: int, workers: int = 1, seed: Optional[int] = None) -> Dict:
+        """
+        Simulates n_paths bankroll paths and returns the summary report.
+        workers > 1 splits the paths across a process pool (one seed stream per task).
+        """
+        seeds = np.random.SeedSequence(seed)
+        if workers <= 1:
+            partial = self._simulate(n_paths, seeds)
+        else:
+            shares = [n_paths // workers + (i < n_paths % workers) for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._simulate, shares, seeds.spawn(workers)))
+            partial = self._merge(results)
+
+        return self._report(partial, n_paths)
+
+    def _simulate(self, n_paths: int, seed_seq: np.random.SeedSequence) -> Dict:
+        rng = np.random.default_rng(seed_seq)
+        acc = {
+            "drawdown_hist": np.zeros(DRAWDOWN_BINS.shape[0] - 1, dtype=np.int64),
+            "growth_hist": np.zeros(LOG_GROWTH_BINS.shape[0] - 1, dtype=np.int64),
+            "ruined": 0,
+            "final_sum": 0.0,
+        }
+
+        odds = np.tile(self.odds, self.n_rounds)
+        p_win = np.tile(self.p_model, self.n_rounds)
+        chunk = self.chunk_size()
+        ruin_bankroll = self.ruin_level * self.initial_bankroll
+
+        for start in range(0, n_paths, chunk):
+            size = min(chunk, n_paths - start)
+            wins = rng.random((size, self.n_steps)) < p_win
+
+            bankroll = np.full(size, self.initial_bankroll)
+            peak = bankroll.copy()
+            max_dd = np.zeros(size)
+            ruined = np.zeros(size, dtype=bool)
+
+            for step in range(self.n_steps):
+                pick = step % self.odds.shape[0]
+                if self.policy == "kelly":
+                    stake = bankroll * self.stake_fractions[pick]
+                else:
+                    stake = np.minimum(self.flat_stakes[pick], bankroll)
+
+                bankroll += np.where(wins[:, step], stake * (odds[step] - 1), -stake)
+                np.maximum(peak, bankroll, out=peak)
+                np.maximum(max_dd, 1 - bankroll / peak, out=max_dd)
+                ruined |= bankroll <= ruin_bankroll
+
+            with np.errstate(divide="ignore"):
+                log_growth = np.log(bankroll / self.initial_bankroll)
+            acc["drawdown_hist"] += np.histogram(max_dd, DRAWDOWN_BINS)[0]
+            acc["growth_hist"] += np.histogram(np.clip(log_growth, LOG_GROWTH_BINS[0], LOG_GROWTH_BINS[-1]), LOG_GROWTH_BINS)[0]
+            acc["ruined"] += int(ruined.sum())
+            acc["final_sum"] += float(bankroll.sum())
+
+        return acc
+
+    @staticmethod
+    def _merge(results: List[Dict]) -> Dict:
+        merged = results[0]
+        for r in results[1:]:
+            for key in merged:
+                merged[key] = merged[key] + r[key]
+        return merged
+
+    @staticmethod
+    def _hist_quantiles(hist: np.ndarray, bins: np.ndarray) -> Dict[str, float]:
+        cdf = np.cumsum(hist) / hist.sum()
+        centers = (bins[:-1] + bins[1:]) / 2
+        return {f"p{int(q * 100)}": float(centers[np.searchsorted(cdf, q)]) for q in QUANTILES}
+
+    def _report(self, acc: Dict, n_paths: int) -> Dict:
+        growth = self._hist_quantiles(acc["growth_hist"], LOG_GROWTH_BINS)
+        return {
+            "paths": n_paths,
+            "policy": self.policy,
+            "bets_per_path": self.n_steps,
+            "risk_of_ruin": acc["ruined"] / n_paths,
+            "mean_final_bankroll": acc["final_sum"] / n_paths,
+            "max_drawdown_quantiles": self._hist_quantiles(acc["drawdown_hist"], DRAWDOWN_BINS),
+            "log_growth_quantiles": growth,
+            "final_bankroll_quantiles": {k: self.initial_bankroll * float(np.exp(v)) for k, v in growth.items()},
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo bankroll simulation over picks_hoy.json")
+    parser.add_argument("--file", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "picks_hoy.json"))
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--policy", choices=["kelly", "flat"], default="kelly")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--memory-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    slate = load_picks_slate(args.file)
+    print(f"📄 Slate: {slate['odds'].shape[0]} picks con model_probability.")
+
+    sim = BankrollSimulator(
+        slate["odds"], slate["p_model"], policy=args.policy, units=slate["units"],
+        n_rounds=args.rounds, max_memory_mb=args.memory_mb
+    )
+    start = time.perf_counter()
+    report = sim.run(args.paths, workers=args.workers, seed=42)
+    print(json.dumps(report, indent=2))
+    print(f"⏱️  {args.paths:,} paths in {time.perf_counter() - start:.2f}s (chunk = {sim.chunk_size():,} paths)")
@@ -0,0 +1,242 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from async_supabase import async_db
+from settlement_engine import BatchSettlementEngine, normalize_name
+
+BET_COLUMNS = "id,user_id,fixture_id,match,league_name,market_type,selection,stake,odds_entry,odds_closing,is_daily_gold_pick"
+PLACE_FIELDS = ("user_id", "pick_id", "fixture_id", "match", "league_name", "market_type", "selection", "is_daily_gold_pick")
+PICK_COLUMNS = "id,fixture_id,match,match_date,league_name,market_type,selection,odds,is_gold"
+
+def closing_outcome(market_type: str, selection: str, fixture: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    (market, outcome) key of a bet's selection in the odds store, e.g. ('h2h', 'Arsenal')
+    or ('totals', 'Over 2.5'); None for markets the store does not track.
+    """
+    market = normalize_name(market_type).replace(" ", "")
+    sel = normalize_name(selection)
+    if market in ("1x2", "h2h", "matchwinner"):
+        home, away = fixture.get("home_team"), fixture.get("away_team")
+        if sel in ("1", "home", "local") or (home and sel == normalize_name(home)):
+            return "h2h", home
+        if sel in ("x", "draw", "empate"):
+            return "h2h", "Draw"
+        if sel in ("2", "away", "visitante") or (away and sel == normalize_name(away)):
+            return "h2h", away
+        return None
+    if market in ("over/under", "totals", "overunder"):
+        found = re.match(r"(over|under|mas|menos)\s*\+?([\d.,]+)", sel)
+        if found:
+            side = "Over" if found.group(1) in ("over", "mas") else "Under"
+            return "totals", f"{side} {float(found.group(2).replace(',', '.')):g}"
+    return None
+
+def parse_kickoff(value: Any) -> datetime:
+    """daily_picks.match_date (timestamptz from PostgREST or psycopg2) as an aware datetime."""
+    if isinstance(value, datetime):
+        kickoff = value
+    else:
+        kickoff = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return kickoff if kickoff.tzinfo else kickoff.replace(tzinfo=timezone.utc)
+
+def fixtures_from_results(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Finished matches from rating_model.results_from_scores, in the settlement engine's format."""
+    return [{
+        "fixture_id": r["id"], "home_team": r["home_team"], "away_team": r["away_team"],
+        "home_goals": r["home_goals"], "away_goals": r["away_goals"], "status": "finished",
+    } for r in results]
+
+def scope_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+    """ROI and CLV beat rate from one bet_performance row."""
+    stake, returned = float(row.get("stake_sum") or 0), float(row.get("return_sum") or 0)
+    clv_count = int(row.get("clv_count") or 0)
+    return {
+        "settled": int(row.get("settled") or 0),
+        "won": int(row.get("won") or 0),
+        "lost": int(row.get("lost") or 0),
+        "void": int(row.get("void") or 0),
+        "staked": round(stake, 2),
+        "returned": round(returned, 2),
+        "profit": round(returned - stake, 2),
+        "refunds": round(float(row.get("refund_sum") or 0), 2),
+        "roi": round((returned - stake) / stake * 100, 2) if stake else 0.0,
+        "clv_beat_rate": round(int(row.get("clv_wins") or 0) / clv_count * 100, 1) if clv_count else None,
+    }
+
+def performance_summary(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """bet_performance rows of one user -> overall, per-league and per-market stats."""
+    summary = {"overall": scope_stats({}), "leagues": {}, "markets": {}}
+    for row in rows:
+        if row["scope"] == "all":
+            summary["overall"] = scope_stats(row)
+        else:
+            summary["leagues" if row["scope"] == "league" else "markets"][row["scope_key"]] = scope_stats(row)
+    return summary
+
+class BetLedger:
+    """
+    Result-aware bet ledger on the 'bets' and 'bet_performance' tables (v8_bet_ledger.sql).
+
+    Bets are recorded with their entry odds when placed. settle() resolves the pending bets
+    of finished fixtures with BatchSettlementEngine (payouts, Gold Pick insurance from
+    InsuranceLogic), attaches the closing line from the OddsStore and sends
+    everything in one settle_bets RPC, which marks the bets settled, adds them to the
+    per-user aggregates (all / league / market: stake, return, CLV wins and count) and
+    credits their refunds to the wallets in the same transaction. Performance stats are then a read of a few aggregate rows, whatever
+    the number of bets.
+    """
+
+    def __init__(self, db=async_db, engine: Optional[BatchSettlementEngine] = None, odds_store=None):
+        self.db = db
+        self.engine = engine or BatchSettlementEngine()
+        self.odds_store = odds_store
+
+    async def place(self, bets: List[Dict[str, Any]]) -> None:
+        """Records bets ({'user_id', 'stake', 'odds', 'fixture_id', 'market_type', 'selection', ...})."""
+        rows = [{
+            **{field: bet.get(field) for field in PLACE_FIELDS},
+            "is_daily_gold_pick": bool(bet.get("is_daily_gold_pick")),
+            "stake": float(bet["stake"]),
+            "odds_entry": float(bet.get("odds_entry") or bet["odds"]),
+        } for bet in bets]
+        if rows:
+            await self.db.insert("bets", rows)
+
+    async def place_user_bets(self, user_id: str, bets: List[Dict[str, Any]], now: Optional[datetime] = None) -> int:
+        """
+        Records bets a user placed in the app: {'stake', 'odds'} plus either 'pick_id' or the
+        'fixture_id' / 'match' / 'market_type' / 'selection' of the bet. Bets on a daily pick
+        take the pick's fixture, match, market and selection from daily_picks, default to its
+        odds, and are refused once the match has started. Only a Gold Pick the user bought
+        (profiles.purchased_picks) is insured, once per pick: settle_bets refunds every
+        losing insured row, so the flag never comes from the client.
+        Raises ValueError for an unknown or started pick, a second insured bet on the same
+        pick, a missing selection or invalid stake/odds.
+        """
+        now = now or datetime.now(timezone.utc)
+        pick_ids = sorted({str(bet["pick_id"]) for bet in bets if bet.get("pick_id")})
+        picks, purchased, insured = {}, set(), set()
+        if pick_ids:
+            ids = ",".join(f'"{pick_id}"' for pick_id in pick_ids)
+            picks = {str(p["id"]): p for p in await self.db.select("daily_picks", PICK_COLUMNS, {"id": f"in.({ids})"})}
+            gold = ",".join(f'"{pick_id}"' for pick_id, pick in picks.items() if pick.get("is_gold"))
+            if gold:
+                profile = await self.db.select("profiles", "purchased_picks", {"user_id": f"eq.{user_id}"}, limit=1)
+                purchased = {str(p) for p in (profile[0].get("purchased_picks") if profile else None) or []}
+                insured = {str(r["pick_id"]) for r in await self.db.select(
+                    "bets", "pick_id", {"user_id": f"eq.{user_id}", "pick_id": f"in.({gold})", "is_daily_gold_pick": "eq.true"})}
+
+        rows = []
+        for bet in bets:
+            row = {field: bet.get(field) for field in ("fixture_id", "match", "league_name", "market_type", "selection")}
+            row.update(user_id=user_id, pick_id=None, is_daily_gold_pick=False, odds=bet.get("odds"))
+            if bet.get("pick_id"):
+                pick = picks.get(str(bet["pick_id"]))
+                if pick is None:
+                    raise ValueError(f"unknown pick {bet['pick_id']}")
+                kickoff = pick.get("match_date")
+                if kickoff is None or parse_kickoff(kickoff) <= now:
+                    raise ValueError(f"pick {pick['id']} is closed: its match has started")
+                pick_id = str(pick["id"])
+                row.update({field: pick.get(field) for field in ("fixture_id", "match", "league_name", "market_type", "selection")})
+                row.update(pick_id=pick_id, odds=bet.get("odds") or pick.get("odds"),
+                           is_daily_gold_pick=bool(pick.get("is_gold")) and pick_id in purchased)
+                if row["is_daily_gold_pick"]:
+                    if pick_id in insured:
+                        raise ValueError(f"Gold Pick {pick_id} already has an insured bet")
+                    insured.add(pick_id)
+            if not row["market_type"] or not row["selection"]:
+                raise ValueError("a bet needs a pick_id or a market_type and selection")
+            if float(bet.get("stake") or 0) <= 0 or float(row["odds"] or 0) <= 1:
+                raise ValueError("stake must be positive and odds above 1")
+            rows.append({**row, "stake": bet["stake"]})
+        try:
+            await self.place(rows)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 409:  # bets_one_insured_pick: a concurrent request won the race
+                raise ValueError("Gold Pick already has an insured bet") from e
+            raise
+        return len(rows)
+
+    async def pending_bets(self, fixture_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Pending bets of the given fixtures, grouped by fixture id."""
+        if not fixture_ids:
+            return {}
+        ids = ",".join(f'"{fixture_id}"' for fixture_id in fixture_ids)
+        rows = await self.db.select("bets", BET_COLUMNS, {"status": "eq.pending", "fixture_id": f"in.({ids})"})
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            grouped.setdefault(str(row["fixture_id"]), []).append(row)
+        return grouped
+
+    def _closing_odds(self, fixture: Dict[str, Any], bet: Dict[str, Any], cache: Dict[Tuple, Optional[float]]) -> Optional[float]:
+        if bet.get("odds_closing") is not None:
+            return float(bet["odds_closing"])
+        if self.odds_store is None:
+            return None
+        outcome = closing_outcome(bet.get("market_type"), bet.get("selection"), fixture)
+        if outcome is None:
+            return None
+        key = (str(fixture["fixture_id"]), *outcome)
+        if key not in cache:
+            cache[key] = self.odds_store.closing_price(*key)
+        return cache[key]
+
+    async def settle(self, fixtures: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Settles every pending bet on the finished `fixtures` ({'fixture_id', 'home_team',
+        'away_team', 'home_goals', 'away_goals', 'status'}) and credits Gold Pick refunds.
+        The RPC settles and refunds only bets still pending, in one transaction, so
+        re-running a matchday (or retrying after a failure) is safe.
+        """
+        pending = await self.pending_bets([str(f["fixture_id"]) for f in fixtures])
+        work, bet_rows = [], {}
+        for fixture in fixtures:
+            rows = pending.get(str(fixture["fixture_id"]))
+            if not rows:
+                continue
+            bet_rows.update({str(r["id"]): (fixture, r) for r in rows})
+            work.append((fixture, [{
+                "bet_id": str(r["id"]), "user_id": r["user_id"], "market_type": r.get("market_type"),
+                "selection": r.get("selection"), "bet_amount": r["stake"], "odds": r["odds_entry"],
+                "is_daily_gold_pick": r.get("is_daily_gold_pick"),
+            } for r in rows]))
+
+        result = self.engine.settle_matchday(work)
+        closing_cache: Dict[Tuple, Optional[float]] = {}
+        items = []
+        for bet in result["bets"]:
+            if bet["status"] == "open":
+                continue
+            fixture, row = bet_rows[bet["bet_id"]]
+            items.append({
+                "bet_id": bet["bet_id"], "status": bet["status"], "payout": float(bet["payout"]),
+                "refund": float(bet["refund"]) if bet["refund"] else None,
+                "odds_closing": self._closing_odds(fixture, row, closing_cache),
+            })
+
+        settled = set()
+        if items:
+            rows = await self.db.rpc("settle_bets", {"p_items": items, "p_refund_reason": self.engine.REFUND_REASON})
+            settled = {str(r["bet_id"]) for r in rows or []}
+        refunded = {bet["user_id"] for bet in result["bets"] if bet["refund"] and bet["bet_id"] in settled}
+
+        return {
+            "settled": len(settled),
+            "skipped": len(items) - len(settled),
+            "open": result["summary"]["open"],
+            "with_closing_line": sum(item["odds_closing"] is not None for item in items),
+            "refunded_users": len(refunded),
+        }
+
+    async def performance(self, user_id: str) -> Dict[str, Any]:
+        """ROI and CLV beat rate (overall, per league, per market) from the aggregate rows."""
+        rows = await self.db.select("bet_performance", "*", {"user_id": f"eq.{user_id}"})
+        return performance_summary(rows)
+
+    async def history(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent bets of a user, newest first."""
+        return await self.db.select("bets", "*", {"user_id": f"eq.{user_id}"}, limit=limit, order="placed_at.desc")
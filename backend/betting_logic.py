@@ -1,11 +1,15 @@
 from decimal import Decimal
 from typing import Optional, Dict
 
+import numpy as np
+
 class BettingValueEngine:
     """
     Core logic for calculating Edge, Kelly Criterion, and processing bet results including insurance.
     """
 
+    ELITE_EDGE_THRESHOLD = 0.10  # 10% edge triggers an Elite alert
+
     @staticmethod
     def calculate_implied_probability(decimal_odds: float) -> float:
         """
@@ -74,7 +78,7 @@ class BettingValueEngine:
         Rule: If Edge > 10%, trigger Alert.
         """
         edge = self.calculate_edge(p_model, p_implied)
-        is_elite_alert = edge > 0.10  # 10%
+        is_elite_alert = edge > self.ELITE_EDGE_THRESHOLD
         
         return {
             "edge": edge,
@@ -82,6 +86,94 @@ class BettingValueEngine:
             "recommendation": "BET" if edge > 0 else "PASS"
         }
 
+    # --- BATCH MODE (NumPy) ---
+    # Same formulas as the scalar methods above, applied over whole arrays.
+    # Invalid odds (<= 1.0 or NaN) never raise: they are masked out instead.
+
+    @staticmethod
+    def calculate_implied_probability_batch(decimal_odds) -> np.ndarray:
+        """
+        Vectorized version of calculate_implied_probability.
+        Returns NaN where odds are invalid (<= 1.0) instead of raising.
+        """
+        odds = np.asarray(decimal_odds, dtype=np.float64)
+        valid = odds > 1.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(valid, 1.0 / odds, np.nan)
+
+    @staticmethod
+    def calculate_ev_batch(p_model, decimal_odds) -> np.ndarray:
+        """
+        Vectorized version of calculate_ev. NaN where odds are invalid.
+        """
+        odds = np.asarray(decimal_odds, dtype=np.float64)
+        p = np.asarray(p_model, dtype=np.float64)
+        ev = (p * (odds - 1)) - (1 - p)
+        return np.where(odds > 1.0, ev, np.nan)
+
+    @staticmethod
+    def calculate_kelly_stake_batch(
+        bankroll,
+        p_model,
+        decimal_odds,
+        fraction: float = 0.25
+    ) -> np.ndarray:
+        """
+        Vectorized version of calculate_kelly_stake.
+        bankroll may be a scalar or an array broadcastable to the odds.
+        Invalid odds and negative-EV rows get a stake of 0.0.
+        """
+        odds = np.asarray(decimal_odds, dtype=np.float64)
+        p = np.asarray(p_model, dtype=np.float64)
+        valid = odds > 1.0
+        b = np.where(valid, odds - 1, 1.0)  # placeholder avoids 0-division on masked rows
+
+        kelly_percentage = (b * p - (1 - p)) / b
+        kelly_percentage = np.where(valid & (kelly_percentage > 0), kelly_percentage, 0.0)
+
+        return np.asarray(bankroll, dtype=np.float64) * (kelly_percentage * fraction)
+
+    def evaluate_batch(
+        self,
+        decimal_odds,
+        p_model,
+        bankroll=None,
+        fraction: float = 0.25
+    ) -> Dict[str, np.ndarray]:
+        """
+        Scores a whole slate of markets in one pass.
+
+        Args:
+            decimal_odds: Array of bookmaker decimal odds.
+            p_model: Array of model probabilities (0-1), same shape as odds.
+            bankroll: Optional scalar/array. When given, Kelly stakes are included.
+            fraction: Kelly fraction (Quarter Kelly by default).
+
+        Returns:
+            Dict of arrays: valid, implied_probability, edge, ev, is_elite_alert,
+            is_bet and (if bankroll given) kelly_stake.
+            Rows with invalid odds have valid=False, NaN edge/EV and no alert.
+        """
+        odds = np.asarray(decimal_odds, dtype=np.float64)
+        p = np.asarray(p_model, dtype=np.float64)
+        valid = odds > 1.0
+
+        p_implied = self.calculate_implied_probability_batch(odds)
+        edge = p - p_implied
+
+        result = {
+            "valid": valid,
+            "implied_probability": p_implied,
+            "edge": edge,
+            "ev": self.calculate_ev_batch(p, odds),
+            "is_elite_alert": valid & (edge > self.ELITE_EDGE_THRESHOLD),
+            "is_bet": valid & (edge > 0),
+        }
+        if bankroll is not None:
+            result["kelly_stake"] = self.calculate_kelly_stake_batch(bankroll, p, odds, fraction)
+
+        return result
+
 class InsuranceLogic:
     """
     Handles automatic refunds and insurance policies.
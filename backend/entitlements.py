@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Set, Tuple
+
+from async_supabase import async_db
+
+ENTITLEMENT_COLUMNS = "user_id,subscription_status,purchased_picks"
+
+async def load_entitlements(user_id: str) -> Dict[str, Any]:
+    """Slim profiles read: only the columns gating needs."""
+    return await async_db.get_profile(user_id, ENTITLEMENT_COLUMNS)
+
+class EntitlementCache:
+    """
+    In-process cache of what gating needs per user (subscription_status, purchased_picks).
+
+    Pick views only need to know whether a user is PRO or bought a pick, so instead of a
+    full profiles select on every view the answer is kept for `ttl_seconds`. Concurrent
+    misses for the same user share one database read, and the payment webhook paths call
+    `invalidate` once a purchase is applied so unlocks show up immediately.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[Dict[str, Any]]] = load_entitlements,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 10000
+    ):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _slim(user_id: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "subscription_status": profile.get("subscription_status") or "free",
+            "purchased_picks": list(profile.get("purchased_picks") or []),
+        }
+
+    async def get(self, user_id: str) -> Dict[str, Any]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+        # Single flight: later callers await the read already in progress
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            value = self._slim(user_id, await self.loader(user_id))
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(value)
+            # An invalidate() during the read drops the in-flight marker: don't cache stale data
+            if self._inflight.get(user_id) is future:
+                self._store(user_id, value)
+            return value
+        finally:
+            if self._inflight.get(user_id) is future:
+                del self._inflight[user_id]
+
+    def _store(self, user_id: str, value: Dict[str, Any]):
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[str]) -> int:
+        """Drops cached entitlements for these users. Returns how many were cached."""
+        dropped = 0
+        for user_id in user_ids:
+            self._inflight.pop(user_id, None)
+            if self._entries.pop(user_id, None) is not None:
+                dropped += 1
+        return dropped
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+entitlement_cache = EntitlementCache(ttl_seconds=float(os.getenv("ENTITLEMENT_TTL_SECONDS", "60")))
+
+def event_user_ids(events: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Users touched by a batch of queued payment events."""
+    return {
+        str(event["payload"].get("user_id", "demo-user-uuid"))
+        for event in events if isinstance(event.get("payload"), dict)
+    }
+
@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from async_supabase import async_db
+from picks_writer import parse_analysis
+
+FEED_MAX_AGE = float(os.getenv("FEED_MAX_AGE", "3600"))  # safety rebuild even without writes
+
+def enrich_pick(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields the picks board used to derive in the browser."""
+    home, _, away = str(row.get("match") or "").partition(" vs ")
+    odds = float(row.get("odds") or 0)
+    edge = float(row.get("edge_percentage") or 0)
+    implied = 100 / odds if odds > 0 else 0.0
+    return {
+        **{k: v for k, v in row.items() if k != "analysis_structure"},  # served once, as "analysis"
+        "home": home or "Home Team",
+        "away": away or "Away Team",
+        "implied_prob": round(implied, 1),
+        "model_prob": round(implied + edge, 1),
+        "confidence": "HIGH" if edge > 8 else "MEDIUM" if edge > 4 else "LOW",
+        "analysis": parse_analysis(row.get("analysis_structure") or row.get("ai_analysis")),
+    }
+
+def build_feed(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Board snapshot: enriched picks (best edge first), the Gold Pick, facets and ticker."""
+    picks = [enrich_pick(r) for r in rows]
+    board = sorted((p for p in picks if not p.get("is_gold")), key=lambda p: -float(p.get("edge_percentage") or 0))
+    gold = max((p for p in picks if p.get("is_gold")), key=lambda p: str(p.get("created_at") or ""), default=None)
+
+    ticker = []
+    for p in board:
+        match_time = p["analysis"].get("match_time")
+        ticker.append(f"{str(p.get('match', '')).upper()}  •  {str(p.get('league_name', '')).upper()}  {f'[{match_time}]' if match_time else ''}")
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "picks": board,
+        "gold_pick": gold,
+        "facets": {
+            "leagues": sorted({p["league_name"] for p in board if p.get("league_name")}),
+            "markets": sorted({p["market_type"] for p in board if p.get("market_type")}),
+            "dates": sorted({str(p["event_date"]) for p in board if p.get("event_date")}),
+        },
+        "ticker": ticker,
+    }
+
+def analysis_filters(volatility: Optional[str] = None, confidence_min: Optional[int] = None, league: Optional[str] = None) -> Dict[str, str]:
+    """
+    PostgREST filters on fields inside analysis_structure, evaluated by the database
+    (indexed in v7_analysis_structure.sql) instead of on every row in the client.
+    """
+    filters = {}
+    if volatility:
+        filters["analysis_structure->risk_assessment->>volatility"] = f"eq.{volatility}"
+    if confidence_min is not None:
+        filters["analysis_structure->confidence"] = f"gte.{int(confidence_min)}"  # jsonb number comparison
+    if league:
+        filters["league_name"] = f"eq.{league}"
+    return filters
+
+async def load_daily_picks(filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    return await async_db.select("daily_picks", "*", filters=filters, limit=limit, order="edge_percentage.desc")
+
+class FeedCache:
+    """
+    Precomputed picks board, served from memory.
+
+    The snapshot is built with one daily_picks read and kept as serialized JSON plus a
+    gzip copy and a content ETag. It is rebuilt only after `invalidate()` (called when
+    the agent or cargar_picks write picks) or once it is older than `max_age`, and
+    concurrent requests during a rebuild share the same read.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]] = load_daily_picks, max_age: float = FEED_MAX_AGE):
+        self.loader = loader
+        self.max_age = max_age
+        self.body: Optional[bytes] = None
+        self.gzipped: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.built_at = 0.0
+        self.rebuilds = 0
+        self._dirty = True
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        return self._dirty or self.body is None or time.monotonic() - self.built_at > self.max_age
+
+    async def get(self):
+        """Returns (body, gzipped_body, etag), rebuilding first when needed."""
+        if self._stale():
+            loop = asyncio.get_running_loop()
+            if self._lock is None or self._loop is not loop:
+                self._lock, self._loop = asyncio.Lock(), loop
+            async with self._lock:
+                if self._stale():  # another request may have rebuilt it meanwhile
+                    self._dirty = False
+                    try:
+                        await self._rebuild()
+                    except Exception:
+                        self._dirty = True
+                        raise
+        return self.body, self.gzipped, self.etag
+
+    async def _rebuild(self):
+        feed = build_feed(await self.loader())
+        content = json.dumps({k: v for k, v in feed.items() if k != "generated_at"}, sort_keys=True, default=str)
+        body = json.dumps(feed, default=str, ensure_ascii=False).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]}"'
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6)
+        self.built_at = time.monotonic()
+        self.rebuilds += 1
+
+feed_cache = FeedCache()
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "5"))
+
+def _participant_side(participant: Dict[str, Any]) -> Optional[str]:
+    return (participant.get("meta") or {}).get("location")
+
+def fixture_state(fixture: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact per-fixture state from a Sportmonks livescores item
+    (include=participants,scores,odds): teams, current score, minute/state and odds.
+    """
+    teams = {_participant_side(p): p.get("name") for p in fixture.get("participants") or []}
+
+    score = {"home": 0, "away": 0}
+    for entry in fixture.get("scores") or []:
+        if entry.get("description") not in (None, "CURRENT"):
+            continue
+        goals = entry.get("score") or {}
+        side = goals.get("participant")
+        if side in score:
+            score[side] = goals.get("goals", 0)
+
+    odds = {}
+    for odd in fixture.get("odds") or []:
+        key = f"{odd.get('market_id', odd.get('market', ''))}:{odd.get('label', odd.get('name', ''))}"
+        try:
+            odds[key] = float(odd.get("value"))
+        except (TypeError, ValueError):
+            continue
+
+    return {
+        "id": str(fixture.get("id")),
+        "name": fixture.get("name") or f"{teams.get('home')} vs {teams.get('away')}",
+        "home": teams.get("home"),
+        "away": teams.get("away"),
+        "state_id": fixture.get("state_id"),
+        "minute": fixture.get("minute"),
+        "score": score,
+        "odds": odds,
+    }
+
+def diff_states(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Per-fixture changes between two snapshots ({fixture_id: state}):
+      {'type': 'added', 'fixture': state}
+      {'type': 'removed', 'id': ...}
+      {'type': 'update', 'id': ..., <changed fields>} with odds reduced to the moved prices.
+    """
+    changes: List[Dict[str, Any]] = []
+    for fixture_id, state in new.items():
+        before = old.get(fixture_id)
+        if before is None:
+            changes.append({"type": "added", "fixture": state})
+            continue
+
+        update = {
+            field: value for field, value in state.items()
+            if field != "odds" and before.get(field) != value
+        }
+        moved = {k: v for k, v in state["odds"].items() if before["odds"].get(k) != v}
+        moved.update({k: None for k in before["odds"] if k not in state["odds"]})
+        if moved:
+            update["odds"] = moved
+        if update:
+            changes.append({"type": "update", "id": fixture_id, **update})
+
+    changes.extend({"type": "removed", "id": fixture_id} for fixture_id in old if fixture_id not in new)
+    return changes
+
+class LiveStreamHub:
+    """
+    One upstream poller, many subscribers.
+
+    Polls `fetch()` (e.g. SportmonksService.get_live_scores) every `interval` seconds
+    while at least one client is subscribed, diffs the new snapshot against the previous
+    one and pushes only the changes to each subscriber's queue. Upstream calls therefore
+    stay constant however many users are watching. A subscriber that falls
+    `queue_size` messages behind is sent a fresh snapshot instead of the backlog.
+    """
+
+    def __init__(self, fetch: Callable[[], Dict[str, Any]], interval: float = LIVE_POLL_INTERVAL, queue_size: int = 100):
+        self.fetch = fetch
+        self.interval = interval
+        self.queue_size = queue_size
+        self.snapshot: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.polls = 0
+        self._subscribers: List[asyncio.Queue] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot_message(self) -> Dict[str, Any]:
+        return {"event": "snapshot", "version": self.version, "fixtures": list(self.snapshot.values())}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self.snapshot_message())
+        self._subscribers.append(queue)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, message: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and resync it from the current snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_message())
+
+    async def poll_once(self) -> List[Dict[str, Any]]:
+        """Fetches livescores once and publishes the diff. Returns the changes."""
+        self.polls += 1
+        payload = await asyncio.to_thread(self.fetch)
+        if payload.get("error"):
+            print(f"Live poll error: {payload['error']}")
+            return []
+
+        new = {}
+        for fixture in payload.get("data") or []:
+            state = fixture_state(fixture)
+            new[state["id"]] = state
+        changes = diff_states(self.snapshot, new)
+        self.snapshot = new
+        if changes:
+            self.version += 1
+            self._publish({"event": "diff", "version": self.version, "changes": changes})
+        return changes
+
+    async def _run(self):
+        while True:
+            if not self._subscribers:
+                # Nobody watching: no upstream calls until someone subscribes
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Live poll error: {e}")
+            await asyncio.sleep(self.interval)
+
+def sse_format(message: Dict[str, Any]) -> str:
+    """Server-Sent Events frame: the message 'event' becomes the SSE event name."""
+    return f"event: {message['event']}\nid: {message['version']}\ndata: {json.dumps(message, separators=(',', ':'))}\n\n"
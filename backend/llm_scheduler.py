@@ -0,0 +1,197 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4  # Rough estimate, good enough for budgeting
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+class RateLimitError(Exception):
+    """Raised by a model client when the provider answers 429 / RESOURCE_EXHAUSTED."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    acquire() blocks until the requested amount is available.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                self._cond.wait((amount - self.tokens) / self.rate)
+
+    def drain(self):
+        """Empties the bucket (used when the provider reports a 429 anyway)."""
+        with self._cond:
+            self._refill()
+            self.tokens = 0
+
+class LLMBatchScheduler:
+    """
+    Runs match analyses through an LLM in concurrent batches.
+
+    - Requests and tokens per minute are enforced with token buckets instead of fixed sleeps.
+    - Batches are packed adaptively from the estimated prompt length of each match.
+    - Only the matches missing from (or failing in) a response are retried; the rest of
+      the batch is kept.
+
+    The model is any callable `generate(prompt) -> str` returning a JSON array of objects
+    carrying a 1-based "match_index"; it should raise RateLimitError on 429s.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], str],
+        render_item: Callable[[int, Any], str],
+        build_prompt: Callable[[str], str],
+        requests_per_minute: float = 15,
+        tokens_per_minute: float = 1_000_000,
+        max_concurrency: int = 4,
+        max_prompt_tokens: int = 4000,
+        max_batch_size: int = 8,
+        output_tokens_per_item: int = 250,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0
+    ):
+        self.generate = generate
+        self.render_item = render_item
+        self.build_prompt = build_prompt
+        self.request_bucket = TokenBucket(requests_per_minute, capacity=max(1, max_concurrency))
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_batch_size = max_batch_size
+        self.output_tokens_per_item = output_tokens_per_item
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.stats = {"requests": 0, "rate_limited": 0, "retried_items": 0}
+
+    def _make_batches(self, pending: List[int], items: List[Any]) -> List[List[int]]:
+        """Greedy packing by estimated tokens (always at least one item per batch)."""
+        overhead = estimate_tokens(self.build_prompt(""))
+        batches, current, used = [], [], overhead
+        for idx in pending:
+            cost = estimate_tokens(self.render_item(len(current) + 1, items[idx]))
+            if current and (used + cost > self.max_prompt_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(idx)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch(self, batch: List[int], items: List[Any]) -> Dict[int, Dict]:
+        text = "".join(self.render_item(pos + 1, items[idx]) for pos, idx in enumerate(batch))
+        prompt = self.build_prompt(text)
+
+        self.request_bucket.acquire(1)
+        self.token_bucket.acquire(estimate_tokens(prompt) + self.output_tokens_per_item * len(batch))
+
+        parsed = json.loads(self.generate(prompt))
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+
+        results = {}
+        for obj in parsed:
+            try:
+                pos = int(obj.get("match_index", 0)) - 1
+            except (TypeError, ValueError, AttributeError):
+                continue
+            if 0 <= pos < len(batch) and batch[pos] not in results:
+                results[batch[pos]] = obj
+        return results
+
+    def run(self, items: List[Any]) -> Tuple[Dict[int, Dict], List[int]]:
+        """
+        Analyzes all items. Returns ({item_index: model_object}, [failed item indexes]).
+        Items whose render_item raises are reported as failed without being sent.
+        """
+        attempts = {i: 0 for i in range(len(items))}
+        pending = []
+        results: Dict[int, Dict] = {}
+        failed: List[int] = []
+        for idx, item in enumerate(items):
+            # An item that cannot be rendered (e.g. a malformed market) fails alone
+            try:
+                self.render_item(1, item)
+            except Exception as e:
+                print(f"⚠️ Item {idx} skipped, cannot be rendered: {e!r}")
+                failed.append(idx)
+            else:
+                pending.append(idx)
+        not_before = 0.0  # global pause after a 429
+
+        def requeue(batch_items: List[int]):
+            for idx in batch_items:
+                attempts[idx] += 1
+                if attempts[idx] >= self.max_attempts:
+                    failed.append(idx)
+                else:
+                    pending.append(idx)
+                    self.stats["retried_items"] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            in_flight = {}
+            while pending or in_flight:
+                delay = not_before - time.monotonic()
+                if pending and len(in_flight) < self.max_concurrency and delay <= 0:
+                    for batch in self._make_batches(pending, items):
+                        if len(in_flight) >= self.max_concurrency:
+                            break
+                        for idx in batch:
+                            pending.remove(idx)
+                        in_flight[pool.submit(self._run_batch, batch, items)] = batch
+                        self.stats["requests"] += 1
+
+                if not in_flight:
+                    time.sleep(max(delay, 0.01))
+                    continue
+
+                done, _ = wait(list(in_flight), timeout=max(delay, 0) or None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        batch_results = future.result()
+                    except RateLimitError as e:
+                        self.stats["rate_limited"] += 1
+                        self.request_bucket.drain()
+                        pause = e.retry_after or self.backoff_base * (2 ** max(attempts[i] for i in batch))
+                        not_before = max(not_before, time.monotonic() + pause * (0.5 + random.random() / 2))
+                        requeue(batch)
+                        continue
+                    except Exception as e:
+                        print(f"❌ LLM batch error: {e}")
+                        requeue(batch)
+                        continue
+
+                    results.update(batch_results)
+                    # Retry only the matches the model skipped
+                    requeue([idx for idx in batch if idx not in batch_results])
+
+        return results, sorted(failed)
@@ -1,13 +1,62 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from supabase_client import supabase
+from ai_agents import GeminiAgentService
+from async_supabase import async_db
+from bet_ledger import BetLedger
+from entitlements import entitlement_cache, event_user_ids
+from feed_cache import analysis_filters, enrich_pick, feed_cache, load_daily_picks
+from live_stream import LiveStreamHub, sse_format
+from payment_processor import apply_payment_events
+from slip_ingestion import PickIndex, SlipIngestionPipeline, UploadLimitError, ndjson_uploads
+from sportmonks_service import SportmonksService
+from webhook_queue import WebhookQueue, WebhookWorkerPool
+import asyncio
+import hashlib
+import hmac
+import json
 import os
 from typing import Optional, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+async def apply_and_invalidate(events):
+    """Applies a batch of payment events, then drops the cached entitlements of its users."""
+    try:
+        return await apply_payment_events(events)
+    finally:
+        entitlement_cache.invalidate(event_user_ids(events))
+
+webhook_queue = WebhookQueue()
+webhook_workers = WebhookWorkerPool(
+    webhook_queue,
+    apply_and_invalidate,
+    workers=int(os.getenv("WEBHOOK_WORKERS", "2")),
+    batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+)
+
+live_hub = LiveStreamHub(SportmonksService().get_live_scores)
+
+slip_pipeline = SlipIngestionPipeline(
+    GeminiAgentService(os.getenv("GEMINI_API_KEY")),
+    workers=int(os.getenv("SLIP_WORKERS", "2")),
+    batch_size=int(os.getenv("SLIP_BATCH_SIZE", "8"))
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    webhook_workers.start()
+    live_hub.start()
+    yield
+    await live_hub.stop()
+    await webhook_workers.stop()
+    slip_pipeline.close()
+    # Release the pooled PostgREST connections on shutdown
+    await async_db.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Webhook Secret Validation (Example for Mercadopago/Stripe)
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "dev_secret")
@@ -24,28 +73,21 @@ class PaymentNotification(BaseModel):
 async def handle_mercadopago_webhook(request: Request):
     """
     Specific endpoint for MercadoPago Webhook notifications.
-    Parses MP format and updates user subscription.
+    Acknowledges immediately: the event is stored in the durable queue (deduplicated on
+    the MP notification id) and the subscription is unlocked by the webhook workers.
     """
     payload = await request.json()
     
-    # In a real MP implementation, you fetch the payment info using the ID from payload
+    # In a real MP implementation, workers fetch the payment info using the ID from payload
     # payment_id = payload.get('data', {}).get('id')
-    # payment_info = mp.get_payment(payment_id)
-    # user_id = payment_info['metadata']['user_id']
-    
-    # For this ready-to-deploy setup, we simulate the logic:
     action = payload.get('action')
     if action == 'payment.created' or action == 'payment.updated':
-        # Simulated extraction from metadata
-        # In PROD: Fetch from MP API using payload['data']['id']
-        dummy_user_id = payload.get('user_id', 'demo-user-uuid') 
-        
-        # Unlock PRO
-        supabase.table('profiles').update({
-            'subscription_status': 'pro'
-        }).eq('user_id', dummy_user_id).execute()
+        event_id = payload.get('id') or (payload.get('data') or {}).get('id')
+        if event_id is None:
+            event_id = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        queued = await asyncio.to_thread(webhook_queue.enqueue, 'mercadopago', f"{event_id}:{action}", payload)
         
-        return {"status": "success", "action": "pro_unlocked"}
+        return {"status": "queued" if queued else "duplicate", "action": "pro_unlock"}
 
     return {"status": "ignored"}
 
@@ -54,6 +96,8 @@ async def handle_payment_webhook(payload: PaymentNotification, request: Request)
     """
     Handle incoming payment notifications securely.
     REAL WORLD: Verify signature headers from Stripe/MP here.
+    The notification is queued (deduplicated on payment id) and applied in batches by
+    the webhook workers, so the provider gets its ack without waiting on Supabase.
     """
     
     # 1. Verify Payment Status
@@ -61,57 +105,185 @@ async def handle_payment_webhook(payload: PaymentNotification, request: Request)
         return {"status": "ignored", "reason": "not_approved"}
 
     try:
-        # 2. Update User Profile in Supabase
-        if payload.item_type == 'subscription':
-            # Unlock PRO
-            response = supabase.table('profiles').update({
-                'subscription_status': 'pro'
-            }).eq('user_id', payload.user_id).execute()
-            
-            # Log Order
-            supabase.table('orders').insert({
-                'user_id': payload.user_id,
-                'item_type': 'subscription',
-                'item_id': payload.item_id,
-                'amount': 20.00, # Fetch real amount from provider in prod
-                'currency': 'USD',
-                'payment_provider': 'mercadopago', # Dynamic
-                'status': 'approved',
-                'external_id': payload.id
-            }).execute()
-
-        elif payload.item_type == 'pick':
-            # Unlock Single Pick
-            # First get current picks
-            current_profile = supabase.table('profiles').select('purchased_picks').eq('user_id', payload.user_id).execute()
-            current_picks = current_profile.data[0].get('purchased_picks', []) or []
-            
-            if payload.item_id not in current_picks:
-                current_picks.append(payload.item_id)
-                
-                # Update DB
-                supabase.table('profiles').update({
-                    'purchased_picks': current_picks
-                }).eq('user_id', payload.user_id).execute()
-
-                # Log Order
-                supabase.table('orders').insert({
-                    'user_id': payload.user_id,
-                    'item_type': 'pick',
-                    'item_id': payload.item_id,
-                    'amount': 15.00,
-                    'currency': 'USD',
-                    'payment_provider': 'mercadopago',
-                    'status': 'approved',
-                    'external_id': payload.id
-                }).execute()
-
-        return {"status": "success", "message": "User upgraded"}
-
+        queued = await asyncio.to_thread(webhook_queue.enqueue, 'payment', payload.id, payload.model_dump())
     except Exception as e:
         print(f"Webhook Error: {e}")
         raise HTTPException(status_code=500, detail="Internal Processing Error")
 
+    return {"status": "queued" if queued else "duplicate"}
+
+@app.get("/api/webhooks/metrics")
+async def webhook_metrics():
+    """Backpressure metrics for the webhook queue (depth, oldest pending age, throughput)."""
+    return await asyncio.to_thread(webhook_queue.metrics)
+
+@app.get("/entitlements/{user_id}")
+async def get_entitlements(user_id: str):
+    """
+    Only what gating needs (subscription_status, purchased_picks), served from the
+    in-process entitlement cache instead of a full profiles select per pick view.
+    """
+    try:
+        return await entitlement_cache.get(user_id)
+    except Exception as e:
+        print(f"Entitlements Error: {e}")
+        raise HTTPException(status_code=503, detail="Entitlements unavailable")
+
+async def require_user(request: Request, user_id: str) -> None:
+    """
+    The caller must send its Supabase session (Authorization: Bearer <access token>) and
+    it must belong to `user_id`: these endpoints read with the service key, past RLS.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    try:
+        user = await async_db.get_auth_user(token)
+    except Exception as e:
+        print(f"Auth Error: {e}")
+        raise HTTPException(status_code=503, detail="Auth unavailable")
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if str(user.get("id")) != user_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+bet_ledger = BetLedger()
+MAX_BETS_PER_REQUEST = 50
+
+class BetRequest(BaseModel):
+    stake: float
+    odds: Optional[float] = None
+    pick_id: Optional[str] = None      # daily_picks.id when the bet follows a pick
+    fixture_id: Optional[str] = None   # The Odds API event id; pick bets take the pick's
+    match: Optional[str] = None
+    league_name: Optional[str] = None
+    market_type: Optional[str] = None
+    selection: Optional[str] = None
+
+@app.post("/bets/{user_id}")
+async def place_bets(user_id: str, bets: List[BetRequest], request: Request):
+    """Records the caller's bets in the ledger with their entry odds (settled by the daily agent)."""
+    await require_user(request, user_id)
+    if not bets or len(bets) > MAX_BETS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_BETS_PER_REQUEST} bets")
+    try:
+        placed = await bet_ledger.place_user_bets(user_id, [bet.model_dump() for bet in bets])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Place Bets Error: {e}")
+        raise HTTPException(status_code=503, detail="Bets unavailable")
+    return {"placed": placed}
+
+@app.get("/performance/{user_id}")
+async def get_performance(user_id: str, request: Request):
+    """
+    ROI and CLV beat rate (overall, per league, per market) read from the bet_performance
+    aggregates that settlement keeps up to date, instead of looping over every bet.
+    """
+    await require_user(request, user_id)
+    try:
+        return await bet_ledger.performance(user_id)
+    except Exception as e:
+        print(f"Performance Error: {e}")
+        raise HTTPException(status_code=503, detail="Performance unavailable")
+
+@app.get("/bets/{user_id}")
+async def get_bets(user_id: str, request: Request, limit: int = 20):
+    """Most recent ledger entries of a user (entry/closing odds, status, payout)."""
+    await require_user(request, user_id)
+    try:
+        return await bet_ledger.history(user_id, limit=min(max(limit, 1), 200))
+    except Exception as e:
+        print(f"Bets Error: {e}")
+        raise HTTPException(status_code=503, detail="Bets unavailable")
+
+# No fallback: without an explicitly configured token /feed/invalidate is refused
+FEED_INVALIDATE_TOKEN = os.getenv("FEED_INVALIDATE_TOKEN")
+
+@app.get("/feed")
+async def get_feed(request: Request):
+    """
+    Precomputed picks board (parsed analyses, Gold Pick, league/market facets, ticker).
+    Rebuilt with one daily_picks read after writers call /feed/invalidate; served
+    gzipped when accepted and answered with 304 when the client's ETag still matches.
+    """
+    try:
+        body, gzipped, etag = await feed_cache.get()
+    except Exception as e:
+        print(f"Feed Error: {e}")
+        raise HTTPException(status_code=503, detail="Feed unavailable")
+
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=30", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.post("/feed/invalidate")
+async def invalidate_feed(request: Request):
+    """Called by the agent and cargar_picks after writing picks."""
+    if not FEED_INVALIDATE_TOKEN:
+        raise HTTPException(status_code=503, detail="Feed invalidation not configured")
+    if not hmac.compare_digest(request.headers.get("x-feed-token", "").encode(), FEED_INVALIDATE_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    feed_cache.invalidate()
+    return {"status": "invalidated"}
+
+@app.get("/picks")
+async def get_picks(volatility: Optional[str] = None, confidence_min: Optional[int] = None, league: Optional[str] = None, limit: int = 100):
+    """
+    Daily picks filtered server-side on analysis_structure (e.g. ?volatility=Baja&confidence_min=4),
+    so the client no longer downloads every row to filter it.
+    """
+    try:
+        rows = await load_daily_picks(analysis_filters(volatility, confidence_min, league), limit=min(max(limit, 1), 500))
+    except Exception as e:
+        print(f"Picks Error: {e}")
+        raise HTTPException(status_code=503, detail="Picks unavailable")
+    return [enrich_pick(row) for row in rows]
+
+@app.post("/slips/analyze/{user_id}")
+async def analyze_slips(user_id: str, request: Request):
+    """
+    Bet slip screenshots streamed as NDJSON ({"image": "<base64>"} per line). Uploads are
+    downscaled and hashed in a process pool, repeated slips are analyzed once, extraction
+    runs in batches and every selection is matched against today's daily_picks.
+    Each line is capped at SLIP_MAX_LINE_BYTES and a request at SLIP_MAX_UPLOADS lines (413).
+    """
+    await require_user(request, user_id)
+    try:
+        index = await PickIndex.load()
+        return await slip_pipeline.ingest(ndjson_uploads(request.stream()), index)
+    except UploadLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        print(f"Slips Error: {e}")
+        raise HTTPException(status_code=503, detail="Slip analysis unavailable")
+
+@app.get("/live/stream")
+async def live_stream(request: Request):
+    """
+    Server-Sent Events: one 'snapshot' event with every live fixture, then 'diff' events
+    carrying only what changed (score, minute, odds moves). All clients share one poller.
+    """
+    queue = live_hub.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield sse_format(message)
+        finally:
+            live_hub.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/")
 def read_root():
     return {"status": "StatsEdge Backend Online", "version": "4.2"}
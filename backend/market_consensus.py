@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from betting_logic import BettingValueEngine
+
+OUTCOMES = ("home", "draw", "away")
+
+class MarketConsensusEngine:
+    """
+    Aggregates every bookmaker's 1X2 prices instead of reading bookmakers[0].
+
+    Prices go into one (matches x books x outcomes) array with NaN for missing quotes.
+    Per outcome it computes the best available price (and book), the vig-free consensus
+    probability (each book's implied probabilities normalised to remove its margin, then
+    averaged over books quoting the full market) and the disagreement between books
+    (standard deviation of those fair probabilities). Only the payload parsing loops in
+    Python; the aggregation itself is array operations over the whole slate.
+    """
+
+    def __init__(self, market: str = "h2h"):
+        self.market = market
+
+    def price_tensor(self, matches: List[Dict[str, Any]]):
+        """Returns (prices[M, B, 3], book_keys). Outcomes ordered home, draw, away."""
+        books: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        sides_idx: List[int] = []
+        values: List[float] = []
+        for i, match in enumerate(matches):
+            sides = {match.get("home_team"): 0, "Draw": 1, match.get("away_team"): 2}
+            for bookmaker in match.get("bookmakers") or []:
+                market = next((mk for mk in bookmaker.get("markets") or [] if mk.get("key") == self.market), None)
+                if market is None:
+                    continue
+                b = books.setdefault(bookmaker["key"], len(books))
+                for outcome in market.get("outcomes") or []:
+                    k = sides.get(outcome.get("name"))
+                    if k is not None:
+                        rows.append(i)
+                        cols.append(b)
+                        sides_idx.append(k)
+                        values.append(outcome.get("price"))
+
+        prices = np.full((len(matches), len(books), len(OUTCOMES)), np.nan)
+        if values:
+            prices[rows, cols, sides_idx] = np.array(values, dtype=np.float64)
+        prices[prices <= 1.0] = np.nan  # invalid quotes
+        return prices, list(books)
+
+    @staticmethod
+    def aggregate_prices(prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Array core of the engine. prices: (M, B, K) decimal odds, NaN = not quoted.
+
+        Returns (M, K) arrays best_price, best_book (-1 if none), consensus_prob,
+        disagreement, and (M,) arrays n_books (books quoting the full market) and margin.
+        """
+        quoted = ~np.isnan(prices)
+        offered = quoted.any(axis=1)  # (M, K): outcome exists in this match's market
+        complete = (quoted | ~offered[:, None, :]).all(axis=2) & quoted.any(axis=2)  # (M, B)
+
+        implied = np.where(quoted, 1.0 / np.where(quoted, prices, 1.0), 0.0)
+        overround = implied.sum(axis=2)  # (M, B)
+        fair = np.where(complete[:, :, None] & quoted, implied / np.where(overround > 0, overround, 1.0)[:, :, None], 0.0)
+
+        n_books = complete.sum(axis=1)  # (M,)
+        denom = np.where(n_books > 0, n_books, 1)[:, None]
+        consensus = fair.sum(axis=1) / denom
+        consensus = np.where(offered & (n_books[:, None] > 0), consensus, np.nan)
+        variance = np.where(complete[:, :, None], (fair - np.nan_to_num(consensus)[:, None, :]) ** 2, 0.0).sum(axis=1) / denom
+        disagreement = np.where(np.isnan(consensus), np.nan, np.sqrt(variance))
+
+        filled = np.where(quoted, prices, -np.inf)
+        best_book = np.where(offered, filled.argmax(axis=1), -1)
+        best_price = np.where(offered, filled.max(axis=1), np.nan)
+
+        margin = np.where(n_books > 0, np.where(complete, overround - 1.0, 0.0).sum(axis=1) / np.where(n_books > 0, n_books, 1), np.nan)
+
+        return {
+            "best_price": best_price,
+            "best_book": best_book,
+            "consensus_prob": consensus,
+            "disagreement": disagreement,
+            "n_books": n_books,
+            "margin": margin,
+        }
+
+    def aggregate(self, matches: List[Dict[str, Any]], engine: Optional[BettingValueEngine] = None) -> Dict[str, Any]:
+        """
+        Full stage: price tensor, aggregation and edge of the best price against the
+        consensus (BettingValueEngine.evaluate_batch). Adds 'books', 'edge', 'ev' and
+        'is_bet' to the aggregate_prices output.
+        """
+        prices, books = self.price_tensor(matches)
+        result = self.aggregate_prices(prices)
+        value = (engine or BettingValueEngine()).evaluate_batch(result["best_price"], result["consensus_prob"])
+        result.update(books=books, edge=value["edge"], ev=value["ev"], is_bet=value["is_bet"])
+        return result
+
+    @staticmethod
+    def summaries(matches: List[Dict[str, Any]], result: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        """Per-match dicts for prompts and storage; None when no book quotes the market."""
+        out: List[Optional[Dict[str, Any]]] = []
+        for i, match in enumerate(matches):
+            if result["n_books"][i] == 0:
+                out.append(None)
+                continue
+            names = {"home": match.get("home_team"), "draw": "Draw", "away": match.get("away_team")}
+            outcomes = []
+            for k, outcome in enumerate(OUTCOMES):
+                if np.isnan(result["best_price"][i, k]):
+                    continue
+                outcomes.append({
+                    "name": names[outcome],
+                    "best_price": round(float(result["best_price"][i, k]), 3),
+                    "best_book": result["books"][result["best_book"][i, k]],
+                    "fair_prob": round(float(result["consensus_prob"][i, k]), 4),
+                    "edge": round(float(result["edge"][i, k]), 4),
+                    "disagreement": round(float(result["disagreement"][i, k]), 4),
+                })
+            out.append({
+                "books": int(result["n_books"][i]),
+                "margin": round(float(result["margin"][i]), 4),
+                "outcomes": outcomes,
+            })
+        return out
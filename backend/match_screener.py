@@ -0,0 +1,82 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from betting_logic import BettingValueEngine
+
+class MatchScreener:
+    """
+    Deterministic pre-filter before the LLM stage.
+
+    For each match (with a 'market_consensus' summary from MarketConsensusEngine), the
+    probabilities of the rating model (PoissonRatingModel, or anything with predict_1x2)
+    are compared with the no-vig consensus probabilities through
+    BettingValueEngine.evaluate_opportunity. Only matches where some outcome
+    reaches `edge_threshold` go on to narrative generation. Matches the model cannot
+    rate yet are passed through when `pass_unrated` is set, so an empty rating table
+    never silences the feed.
+    """
+
+    def __init__(
+        self,
+        model,
+        edge_threshold: float = 0.03,
+        pass_unrated: bool = True,
+        batch_size: int = 8,
+        engine: Optional[BettingValueEngine] = None
+    ):
+        self.model = model
+        self.edge_threshold = edge_threshold
+        self.pass_unrated = pass_unrated
+        self.batch_size = batch_size
+        self.engine = engine or BettingValueEngine()
+
+    def screen(self, matches: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Returns (selected matches sorted by best screened edge, report). Each selected
+        match gets a 'screen' dict with the model probabilities and best edge.
+        """
+        if not matches:
+            return [], {"screened": 0, "passed": 0, "unrated": 0, "skipped": 0, "llm_calls_saved": 0}
+
+        probs, known = self.model.predict_1x2([m["home_team"] for m in matches], [m["away_team"] for m in matches])
+        passed: List[Tuple[float, Dict[str, Any]]] = []
+        unrated = 0
+        for i, match in enumerate(matches):
+            if not known[i]:
+                unrated += 1
+                if self.pass_unrated:
+                    match["screen"] = {"rated": False}
+                    passed.append((-math.inf, match))
+                continue
+
+            names = {match["home_team"]: 0, "Draw": 1, match["away_team"]: 2}
+            best_edge, best_outcome = -math.inf, None
+            for outcome in match["market_consensus"]["outcomes"]:
+                k = names.get(outcome["name"])
+                if k is None:
+                    continue
+                verdict = self.engine.evaluate_opportunity(float(probs[i, k]), outcome["fair_prob"])
+                if verdict["edge"] > best_edge:
+                    best_edge, best_outcome = verdict["edge"], outcome["name"]
+
+            if best_edge >= self.edge_threshold:
+                match["screen"] = {
+                    "rated": True,
+                    "p_model": [round(float(p), 4) for p in probs[i]],
+                    "best_outcome": best_outcome,
+                    "edge": round(best_edge, 4),
+                }
+                passed.append((best_edge, match))
+
+        # Strongest screened edges first; unrated matches after them
+        passed.sort(key=lambda item: item[0], reverse=True)
+        selected = [m for _, m in passed]
+        batches = lambda n: math.ceil(n / self.batch_size)
+        report = {
+            "screened": len(matches),
+            "passed": len(selected),
+            "unrated": unrated,
+            "skipped": len(matches) - len(selected),
+            "llm_calls_saved": batches(len(matches)) - batches(len(selected)),
+        }
+        return selected, report
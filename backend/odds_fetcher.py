@@ -0,0 +1,141 @@
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_LEAGUES = [
+    "soccer_uefa_champs_league",
+    "soccer_argentina_primera_division",
+    "soccer_brazil_campeonato",
+    "soccer_mexico_ligamx",
+    "soccer_spain_la_liga",
+    "soccer_england_league1"
+]
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def configured_leagues() -> List[str]:
+    """League keys from ODDS_LEAGUES (comma separated), falling back to DEFAULT_LEAGUES."""
+    raw = os.getenv("ODDS_LEAGUES", "")
+    leagues = [l.strip() for l in raw.split(",") if l.strip()]
+    return leagues or list(DEFAULT_LEAGUES)
+
+class OddsIngestionClient:
+    """
+    Concurrent, connection-pooled client for The Odds API.
+
+    One requests.Session (keep-alive pool) is shared by a thread pool; a semaphore per
+    host limits in-flight requests, and 429/5xx responses are retried with exponential
+    backoff (honouring Retry-After, clamped to max_backoff). Wall-clock time is roughly the slowest league
+    instead of the sum of all of them.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.the-odds-api.com/v4",
+        regions: str = "eu,us",
+        markets: str = "h2h",
+        max_per_host: int = 10,
+        timeout: tuple = (3.05, 20),
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        max_backoff: float = 30.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.regions = regions
+        self.markets = markets
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = math.nan
+            # A huge, negative or non-numeric header must not stall ingestion
+            if math.isfinite(delay) and delay >= 0:
+                return min(delay, self.max_backoff)
+        # Exponential backoff with jitter
+        return min(self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2), self.max_backoff)
+
+    def get_json(self, url: str, params: Dict[str, Any]) -> Any:
+        """GET with per-host concurrency limit, timeout and retry on 429/5xx/connection errors."""
+        semaphore = self._host_semaphore(url)
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                with semaphore:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff_delay(attempt, response))
+
+        raise last_error
+
+    def fetch_league(self, league: str) -> List[Dict[str, Any]]:
+        url = f"{self.base_url}/sports/{league}/odds/"
+        params = {"apiKey": self.api_key, "regions": self.regions, "markets": self.markets}
+        return self.get_json(url, params)
+
+    def fetch_league_scores(self, league: str, days_from: int = 3) -> List[Dict[str, Any]]:
+        url = f"{self.base_url}/sports/{league}/scores/"
+        return self.get_json(url, {"apiKey": self.api_key, "daysFrom": days_from})
+
+    def fetch_all(self, leagues: List[str], fetch: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+        """
+        Fetches every league concurrently (odds by default, or any per-league `fetch`).
+        Returns {league: list_of_matches | Exception} so one failing league never aborts the run.
+        """
+        fetch = fetch or self.fetch_league
+
+        def task(league):
+            try:
+                return fetch(league)
+            except Exception as e:
+                return e
+
+        if not leagues:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(leagues), self.max_per_host)) as pool:
+            return dict(zip(leagues, pool.map(task, leagues)))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,262 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_STORE_PATH = os.getenv(
+    "ODDS_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".odds_store")
+)
+
+# One row per (snapshot time, fixture, market, outcome, bookmaker)
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),        # unix seconds of the snapshot
+    ("fixture", "<i4"),   # codes into the key dictionaries (keys.json)
+    ("market", "<i2"),
+    ("outcome", "<i2"),
+    ("book", "<i2"),
+    ("price", "<f4"),     # decimal odds
+])
+
+CLOSING_DTYPE = np.dtype([
+    ("fixture", "<i4"),
+    ("market", "<i2"),
+    ("outcome", "<i2"),
+    ("book", "<i2"),
+    ("price", "<f4"),
+    ("ts", "<i8"),        # time of the snapshot that became the closing line
+])
+
+def parse_time(value: Any) -> int:
+    """Unix seconds from an ISO-8601 string ('...Z' allowed), datetime or number."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+class OddsStore:
+    """
+    Append-only time series of odds snapshots, on local disk.
+
+    Rows are fixed-width records (RECORD_DTYPE) appended to segment files of at most
+    `segment_records` rows; string keys (fixture id, market, outcome, bookmaker) are
+    dictionary-encoded to small integers. segments.json keeps each segment's time range
+    and fixture codes, so a range query only memory-maps the segments that can match and
+    months of snapshots never have to fit in memory.
+
+    Closing lines are captured automatically: on every append, fixtures whose kickoff
+    has passed get the last price seen at or before kickoff for each
+    (market, outcome, bookmaker) written to closing.bin.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, segment_records: int = 1_000_000):
+        self.path = path
+        self.segment_records = segment_records
+        os.makedirs(path, exist_ok=True)
+        self._keys = self._load_json("keys.json", {"fixture": [], "market": [], "outcome": [], "book": [], "kickoff": {}})
+        self._segments: List[Dict[str, Any]] = self._load_json("segments.json", [])
+        self._codes = {kind: {name: i for i, name in enumerate(self._keys[kind])} for kind in ("fixture", "market", "outcome", "book")}
+        self._closed = set(np.unique(self._read(os.path.join(path, "closing.bin"), CLOSING_DTYPE)["fixture"]).tolist())
+
+    # --- Persistence helpers ---
+
+    def _load_json(self, name: str, default):
+        try:
+            with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _save_json(self, name: str, data):
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(self.path, name))
+
+    @staticmethod
+    def _read(file_path: str, dtype: np.dtype) -> np.ndarray:
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r")
+
+    def _code(self, kind: str, name: str) -> int:
+        codes = self._codes[kind]
+        if name not in codes:
+            codes[name] = len(self._keys[kind])
+            self._keys[kind].append(name)
+        return codes[name]
+
+    def _lookup(self, kind: str, name: Optional[str]) -> Optional[int]:
+        return None if name is None else self._codes[kind].get(str(name), -1)
+
+    # --- Writing ---
+
+    def append_snapshot(self, matches: Iterable[Dict[str, Any]], ts: Any = None) -> int:
+        """
+        Stores every price of an Odds API payload (all bookmakers, markets and outcomes).
+        Returns the number of rows appended.
+        """
+        snapshot_ts = parse_time(ts) if ts is not None else int(time.time())
+        rows: List[Tuple] = []
+        for match in matches:
+            fixture = self._code("fixture", str(match["id"]))
+            if match.get("commence_time"):
+                self._keys["kickoff"][str(fixture)] = parse_time(match["commence_time"])
+            for bookmaker in match.get("bookmakers") or []:
+                book = self._code("book", bookmaker["key"])
+                for market in bookmaker.get("markets") or []:
+                    market_code = self._code("market", market["key"])
+                    for outcome in market.get("outcomes") or []:
+                        name = outcome["name"] if outcome.get("point") is None else f"{outcome['name']} {outcome['point']}"
+                        rows.append((snapshot_ts, fixture, market_code, self._code("outcome", name), book, outcome["price"]))
+
+        records = np.array(rows, dtype=RECORD_DTYPE)
+        if len(records):
+            self._append_records(records)
+        self._save_json("keys.json", self._keys)
+        self.capture_closing(now=snapshot_ts)
+        return len(records)
+
+    def _append_records(self, records: np.ndarray):
+        start = 0
+        while start < len(records):
+            if not self._segments or self._segments[-1]["count"] >= self.segment_records:
+                self._segments.append({
+                    "file": f"seg-{len(self._segments):06d}.bin", "count": 0,
+                    "min_ts": None, "max_ts": None, "fixtures": []
+                })
+            segment = self._segments[-1]
+            chunk = records[start:start + self.segment_records - segment["count"]]
+            with open(os.path.join(self.path, segment["file"]), "ab") as f:
+                chunk.tofile(f)
+            segment["count"] += len(chunk)
+            lo, hi = int(chunk["ts"].min()), int(chunk["ts"].max())
+            segment["min_ts"] = lo if segment["min_ts"] is None else min(segment["min_ts"], lo)
+            segment["max_ts"] = hi if segment["max_ts"] is None else max(segment["max_ts"], hi)
+            segment["fixtures"] = sorted(set(segment["fixtures"]).union(np.unique(chunk["fixture"]).tolist()))
+            start += len(chunk)
+        self._save_json("segments.json", self._segments)
+
+    def capture_closing(self, now: Optional[int] = None) -> int:
+        """Writes closing lines for fixtures that kicked off. Returns fixtures closed."""
+        now = int(time.time()) if now is None else now
+        due = [
+            (int(code), kickoff) for code, kickoff in self._keys["kickoff"].items()
+            if kickoff <= now and int(code) not in self._closed
+        ]
+        if not due:
+            return 0
+
+        closing = []
+        for fixture, kickoff in due:
+            rows = self._query(fixture, end=kickoff)
+            self._closed.add(fixture)
+            if not len(rows):
+                continue
+            # Last row per (market, outcome, book): stable sort by time, keep final occurrence
+            rows = rows[np.argsort(rows["ts"], kind="stable")]
+            key = (rows["market"].astype(np.int64) << 32) | (rows["outcome"].astype(np.int64) << 16) | rows["book"]
+            _, last = np.unique(key[::-1], return_index=True)
+            last = len(rows) - 1 - last
+            out = np.empty(len(last), dtype=CLOSING_DTYPE)
+            for field in ("market", "outcome", "book", "price", "ts"):
+                out[field] = rows[field][last]
+            out["fixture"] = fixture
+            closing.append(out)
+
+        if closing:
+            with open(os.path.join(self.path, "closing.bin"), "ab") as f:
+                np.concatenate(closing).tofile(f)
+        return len(due)
+
+    # --- Queries ---
+
+    def _query(self, fixture: int, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        parts = []
+        for segment in self._segments:
+            if fixture not in segment["fixtures"]:
+                continue
+            if start is not None and segment["max_ts"] < start:
+                continue
+            if end is not None and segment["min_ts"] > end:
+                continue
+            data = self._read(os.path.join(self.path, segment["file"]), RECORD_DTYPE)
+            mask = data["fixture"] == fixture
+            if start is not None:
+                mask &= data["ts"] >= start
+            if end is not None:
+                mask &= data["ts"] <= end
+            parts.append(np.array(data[mask]))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+
+    def line_movement(
+        self,
+        fixture_id: str,
+        market: Optional[str] = None,
+        outcome: Optional[str] = None,
+        book: Optional[str] = None,
+        start: Any = None,
+        end: Any = None
+    ) -> Dict[Tuple[str, str, str], Dict[str, np.ndarray]]:
+        """
+        Price history per (market, outcome, bookmaker) for one fixture:
+        {(market, outcome, book): {'ts': int64 array, 'price': float32 array}}, time-ordered.
+        """
+        fixture = self._lookup("fixture", fixture_id)
+        if fixture == -1:
+            return {}
+        rows = self._query(
+            fixture,
+            parse_time(start) if start is not None else None,
+            parse_time(end) if end is not None else None
+        )
+        for kind, name in (("market", market), ("outcome", outcome), ("book", book)):
+            code = self._lookup(kind, name)
+            if code is not None:
+                rows = rows[rows[kind] == code]
+
+        rows = rows[np.lexsort((rows["ts"], rows["book"], rows["outcome"], rows["market"]))]
+        series = {}
+        key = np.stack([rows["market"], rows["outcome"], rows["book"]], axis=1)
+        if len(rows):
+            boundaries = np.flatnonzero(np.any(key[1:] != key[:-1], axis=1)) + 1
+            for chunk in np.split(np.arange(len(rows)), boundaries):
+                m, o, b = key[chunk[0]]
+                name = (self._keys["market"][m], self._keys["outcome"][o], self._keys["book"][b])
+                series[name] = {"ts": rows["ts"][chunk], "price": rows["price"][chunk]}
+        return series
+
+    def closing_line(self, fixture_id: str) -> Dict[Tuple[str, str, str], float]:
+        """Captured closing prices {(market, outcome, book): price} ({} until kickoff)."""
+        fixture = self._lookup("fixture", fixture_id)
+        rows = self._read(os.path.join(self.path, "closing.bin"), CLOSING_DTYPE)
+        rows = rows[rows["fixture"] == fixture]
+        return {
+            (self._keys["market"][r["market"]], self._keys["outcome"][r["outcome"]], self._keys["book"][r["book"]]): round(float(r["price"]), 4)
+            for r in rows
+        }
+
+    def closing_price(self, fixture_id: str, market: str, outcome: str, book: Optional[str] = None) -> Optional[float]:
+        """Closing price of one outcome at `book`, or the best closing price across books."""
+        prices = [
+            price for (m, o, b), price in self.closing_line(fixture_id).items()
+            if m == market and o == outcome and (book is None or b == book)
+        ]
+        return max(prices) if prices else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": sum(s["count"] for s in self._segments),
+            "segments": len(self._segments),
+            "fixtures": len(self._keys["fixture"]),
+            "bookmakers": len(self._keys["book"]),
+            "closed_fixtures": len(self._closed),
+        }
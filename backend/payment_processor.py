@@ -0,0 +1,92 @@
+import uuid
+from typing import Any, Dict, List, Optional
+
+from async_supabase import async_db
+
+SUBSCRIPTION_PRICE = 20.00  # Fetch real amount from provider in prod
+PICK_PRICE = 15.00
+
+def _order(event: Dict[str, Any], item_type: str, amount: float) -> Dict[str, Any]:
+    payload = event["payload"]
+    return {
+        'user_id': payload['user_id'],
+        'item_type': item_type,
+        'item_id': payload['item_id'],
+        'amount': amount,
+        'currency': 'USD',
+        'payment_provider': 'mercadopago', # Dynamic
+        'status': 'approved',
+        'external_id': payload['id']
+    }
+
+def _event_error(event: Dict[str, Any]) -> Optional[str]:
+    """Why an event can never be applied (checked before it can fail a whole batch)."""
+    payload = event.get("payload") or {}
+    try:
+        uuid.UUID(str(payload.get("user_id")))
+    except ValueError:
+        return f"invalid user_id: {payload.get('user_id')!r}"
+    if event.get("provider") != "mercadopago" and payload.get("item_type") == "pick" and not payload.get("item_id"):
+        return "pick purchase without item_id"
+    return None
+
+async def _apply(events: List[Dict[str, Any]]) -> None:
+    pro_users = set()
+    pick_events: List[Dict[str, Any]] = []
+    orders = []
+
+    for event in events:
+        payload = event["payload"]
+        if event["provider"] == "mercadopago":
+            # Simulated extraction from metadata (In PROD: fetch from MP API using data.id)
+            pro_users.add(payload['user_id'])
+        elif payload.get('item_type') == 'subscription':
+            pro_users.add(payload['user_id'])
+            orders.append(_order(event, 'subscription', SUBSCRIPTION_PRICE))
+        elif payload.get('item_type') == 'pick':
+            pick_events.append(event)
+
+    await async_db.update_profiles(sorted(pro_users), {'subscription_status': 'pro'})
+
+    await async_db.append_purchased_picks(
+        [(event["payload"]['user_id'], event["payload"]['item_id']) for event in pick_events]
+    )
+    # Every payment is recorded, even for a pick the user already had; a provider retry
+    # of the same payment carries the same external_id and is skipped by insert_orders
+    orders.extend(_order(event, 'pick', PICK_PRICE) for event in pick_events)
+
+    await async_db.insert_orders(orders)
+
+async def apply_payment_events(events: List[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Applies a batch of queued payment events with as few round trips as possible:
+      - one profiles update for every user unlocking PRO,
+      - one append_purchased_picks RPC for every pick purchase in the batch (atomic in
+        Postgres, so concurrent purchases for the same user never overwrite each other),
+      - one bulk orders insert, deduplicated on external_id.
+
+    Every step is idempotent, so a failed batch can simply be retried. Events that are
+    malformed (e.g. no valid user_id) fail on their own, and if the batch call still
+    fails the events are applied one by one, so a single bad event never parks the
+    valid payments claimed with it.
+    Returns {queue_id: error} for events that could not be applied.
+    """
+    errors: Dict[int, str] = {}
+    valid = []
+    for event in events:
+        error = _event_error(event)
+        if error:
+            errors[event["id"]] = error
+        else:
+            valid.append(event)
+
+    try:
+        await _apply(valid)
+    except Exception as batch_error:
+        print(f"Payment batch failed ({batch_error}); applying {len(valid)} events one by one")
+        for event in valid:
+            try:
+                await _apply([event])
+            except Exception as e:
+                errors[event["id"]] = str(e)
+    return errors
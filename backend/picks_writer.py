@@ -0,0 +1,176 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PICK_KEY_FIELDS = ("match", "market_type", "selection", "match_date")
+ON_CONFLICT = ",".join(PICK_KEY_FIELDS)
+SERVER_FIELDS = {"id", "created_at", "updated_at"}
+
+def notify_feed_update(timeout: float = 5.0) -> bool:
+    """
+    Tells the backend (BACKEND_URL) to rebuild its cached /feed after picks were written.
+    A no-op when BACKEND_URL or FEED_INVALIDATE_TOKEN is not configured; failures are
+    reported, never raised.
+    """
+    backend_url, token = os.getenv("BACKEND_URL"), os.getenv("FEED_INVALIDATE_TOKEN")
+    if not backend_url:
+        return False
+    if not token:
+        print("Feed invalidation skipped: FEED_INVALIDATE_TOKEN is not set")
+        return False
+    import requests
+    try:
+        response = requests.post(
+            f"{backend_url.rstrip('/')}/feed/invalidate",
+            headers={"X-Feed-Token": token},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        print(f"Feed invalidation failed: {e}")
+        return False
+
+def parse_analysis(raw: Any) -> Dict[str, Any]:
+    """
+    Analysis as an object. Accepts a dict, a JSON string (also the double-encoded
+    strings older writers produced) or plain text, which becomes analysis_text.
+    """
+    for _ in range(3):
+        if isinstance(raw, dict):
+            return raw
+        text = str(raw or "").strip()
+        if not text.startswith(("{", '"')):
+            break
+        try:
+            raw = json.loads(text)
+        except ValueError:
+            break
+    return {"analysis_text": str(raw or "")}
+
+def structure_analysis(pick: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stores a pick's analysis natively in the analysis_structure JSONB column.
+
+    ai_analysis keeps only the plain text for older readers. The structure also carries
+    the pick's confidence_score, so PostgREST can filter on
+    analysis_structure->>confidence and analysis_structure->risk_assessment->>volatility.
+    """
+    structure = dict(parse_analysis(pick.get("analysis_structure") or pick.get("ai_analysis")))
+    if pick.get("confidence_score") is not None:
+        structure.setdefault("confidence", int(pick["confidence_score"]))
+    pick["analysis_structure"] = structure
+    pick["ai_analysis"] = str(structure.get("analysis_text") or "")
+    return pick
+
+def normalize_match_date(value: Any) -> Optional[str]:
+    """ISO date/datetime (with Z, offset or date only) -> canonical UTC ISO string."""
+    if value in (None, ""):
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return str(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+def pick_key(pick: Dict[str, Any]) -> Tuple:
+    """Natural key of a daily pick: (match, market_type, selection, match_date)."""
+    return (
+        pick.get("match"),
+        pick.get("market_type"),
+        pick.get("selection"),
+        normalize_match_date(pick.get("match_date")),
+    )
+
+def _same_value(new: Any, old: Any) -> bool:
+    if isinstance(new, (int, float)) and not isinstance(new, bool) and old is not None:
+        try:
+            return abs(float(new) - float(old)) < 1e-9
+        except (TypeError, ValueError):
+            return False
+    return new == old
+
+def is_unchanged(pick: Dict[str, Any], existing: Dict[str, Any]) -> bool:
+    for field, value in pick.items():
+        if field in SERVER_FIELDS:
+            continue
+        if field == "match_date":
+            if normalize_match_date(value) != normalize_match_date(existing.get(field)):
+                return False
+        elif not _same_value(value, existing.get(field)):
+            return False
+    return True
+
+class DailyPicksWriter:
+    """
+    Buffered, idempotent writer for the 'daily_picks' table.
+
+    Picks are collected in memory and flushed in chunks: one select to read the rows that
+    already exist for the chunk, and one upsert per column-set on the natural key
+    (match, market_type, selection, match_date). Re-running the agent therefore updates
+    rows instead of duplicating them, and rows whose content did not change are skipped.
+
+    Requires the unique index from v3_daily_picks_natural_key.sql.
+    """
+
+    def __init__(self, client, table: str = "daily_picks", batch_size: int = 200):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self._buffer: Dict[Tuple, Dict[str, Any]] = {}
+        self.report: Dict[str, List[Tuple]] = {"inserted": [], "updated": [], "unchanged": []}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, pick: Dict[str, Any]):
+        """Buffers a pick (a later pick with the same key replaces the earlier one)."""
+        self._buffer[pick_key(pick)] = pick
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, picks: Iterable[Dict[str, Any]]):
+        for pick in picks:
+            self.add(pick)
+
+    def flush(self) -> Dict[str, List[Tuple]]:
+        """Writes everything buffered; returns the cumulative inserted/updated/unchanged report."""
+        items = list(self._buffer.items())
+        self._buffer.clear()
+        for start in range(0, len(items), self.batch_size):
+            self._flush_chunk(dict(items[start:start + self.batch_size]))
+        return self.report
+
+    def _fetch_existing(self, chunk: Dict[Tuple, Dict[str, Any]]) -> Dict[Tuple, Dict[str, Any]]:
+        matches = sorted({key[0] for key in chunk if key[0] is not None})
+        if not matches:
+            return {}
+        response = self.client.table(self.table).select("*").in_("match", matches).execute()
+        return {pick_key(row): row for row in response.data or []}
+
+    def _flush_chunk(self, chunk: Dict[Tuple, Dict[str, Any]]):
+        existing = self._fetch_existing(chunk)
+
+        to_write: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for key, pick in chunk.items():
+            if key in existing and is_unchanged(pick, existing[key]):
+                self.report["unchanged"].append(key)
+                continue
+            self.report["updated" if key in existing else "inserted"].append(key)
+            # PostgREST bulk upserts need identical keys on every row
+            to_write.setdefault(frozenset(pick), []).append(pick)
+
+        for rows in to_write.values():
+            self.client.table(self.table).upsert(
+                rows, on_conflict=ON_CONFLICT, returning="minimal"
+            ).execute()
+
+    def summary(self) -> str:
+        return ", ".join(f"{len(v)} {k}" for k, v in self.report.items())
@@ -0,0 +1,200 @@
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_MODEL_PATH = os.getenv(
+    "RATING_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rating_model.npz")
+)
+DEFAULT_RESULTS_PATH = os.getenv(
+    "RESULTS_HISTORY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".results_history.jsonl")
+)
+
+class PoissonRatingModel:
+    """
+    Team strength ratings with an independent Poisson goal model.
+
+    Expected goals are log-linear:
+        home: exp(base + home_adv + attack[home] + defence[away])
+        away: exp(base + attack[away] + defence[home])
+    (a negative defence rating concedes fewer goals). Each result applies one
+    stochastic-gradient step on the Poisson log-likelihood, so ratings update
+    incrementally as results arrive instead of refitting the whole history; a small
+    L2 pull towards zero keeps rarely seen teams near average.
+
+    predict() prices a whole slate at once: 1X2, over/under lines and BTTS come from a
+    (matches x goals x goals) score matrix. State is a few NumPy arrays saved as one .npz.
+    """
+
+    def __init__(self, learning_rate: float = 0.04, l2: float = 0.002, max_goals: int = 10, min_games: int = 5):
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.max_goals = max_goals
+        self.min_games = min_games
+        self.teams: Dict[str, int] = {}
+        self.attack = np.zeros(0)
+        self.defence = np.zeros(0)
+        self.games = np.zeros(0, dtype=np.int32)
+        self.base = math.log(1.3)
+        self.home_adv = 0.25
+        self.applied: set = set()  # result ids already learned (idempotent re-ingestion)
+
+    # --- State ---
+
+    def _index(self, team: str) -> int:
+        idx = self.teams.get(team)
+        if idx is None:
+            idx = self.teams[team] = len(self.teams)
+            self.attack = np.append(self.attack, 0.0)
+            self.defence = np.append(self.defence, 0.0)
+            self.games = np.append(self.games, 0).astype(np.int32)
+        return idx
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            teams=np.array(list(self.teams), dtype=str),
+            attack=self.attack, defence=self.defence, games=self.games,
+            params=np.array([self.base, self.home_adv, self.learning_rate, self.l2, self.max_goals, self.min_games]),
+            applied=np.array(sorted(self.applied), dtype=str),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> "PoissonRatingModel":
+        """Loads a saved model, or returns a fresh one when the file does not exist."""
+        model = cls()
+        if not os.path.exists(path):
+            return model
+        with np.load(path) as data:
+            model.teams = {str(t): i for i, t in enumerate(data["teams"])}
+            model.attack = data["attack"].astype(np.float64)
+            model.defence = data["defence"].astype(np.float64)
+            model.games = data["games"].astype(np.int32)
+            base, home_adv, lr, l2, max_goals, min_games = data["params"]
+            model.base, model.home_adv, model.learning_rate, model.l2 = float(base), float(home_adv), float(lr), float(l2)
+            model.max_goals, model.min_games = int(max_goals), int(min_games)
+            model.applied = set(str(r) for r in data["applied"])
+        return model
+
+    # --- Learning ---
+
+    def update(self, home: str, away: str, home_goals: int, away_goals: int, result_id: str = None) -> bool:
+        """One SGD step for one result. Returns False if `result_id` was already applied."""
+        if result_id is not None:
+            if result_id in self.applied:
+                return False
+            self.applied.add(result_id)
+
+        h, a = self._index(home), self._index(away)
+        lam_h = math.exp(self.base + self.home_adv + self.attack[h] + self.defence[a])
+        lam_a = math.exp(self.base + self.attack[a] + self.defence[h])
+        err_h, err_a = home_goals - lam_h, away_goals - lam_a  # d(log-likelihood)/d(log lambda)
+
+        lr = self.learning_rate
+        self.attack[h] += lr * (err_h - self.l2 * self.attack[h])
+        self.defence[a] += lr * (err_h - self.l2 * self.defence[a])
+        self.attack[a] += lr * (err_a - self.l2 * self.attack[a])
+        self.defence[h] += lr * (err_a - self.l2 * self.defence[h])
+        self.home_adv += lr * 0.1 * err_h
+        self.base += lr * 0.1 * (err_h + err_a)
+        self.games[h] += 1
+        self.games[a] += 1
+        return True
+
+    def update_many(self, results: Iterable[Dict[str, Any]]) -> int:
+        """Applies results in order ({'home_team', 'away_team', 'home_goals', 'away_goals', 'id'?})."""
+        applied = 0
+        for r in results:
+            applied += self.update(r["home_team"], r["away_team"], int(r["home_goals"]), int(r["away_goals"]), r.get("id"))
+        return applied
+
+    # --- Prediction ---
+
+    def expected_goals(self, homes: Sequence[str], aways: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(lambda_home[M], lambda_away[M], known[M]); unknown teams are rated average."""
+        h = np.array([self.teams.get(t, -1) for t in homes], dtype=np.intp)
+        a = np.array([self.teams.get(t, -1) for t in aways], dtype=np.intp)
+        attack = np.append(self.attack, 0.0)   # index -1 -> the appended 0.0 (average team)
+        defence = np.append(self.defence, 0.0)
+        games = np.append(self.games, 0)
+        lam_h = np.exp(self.base + self.home_adv + attack[h] + defence[a])
+        lam_a = np.exp(self.base + attack[a] + defence[h])
+        known = (games[h] >= self.min_games) & (games[a] >= self.min_games)
+        return lam_h, lam_a, known
+
+    def predict(self, homes: Sequence[str], aways: Sequence[str], lines: Sequence[float] = (1.5, 2.5, 3.5)) -> Dict[str, Any]:
+        """
+        Probabilities for a whole slate in one call:
+            '1x2': (M, 3) home/draw/away, 'over': {line: (M,)}, 'btts': (M,),
+            'xg': (M, 2), 'known': (M,) both teams have min_games results.
+        """
+        lam_h, lam_a, known = self.expected_goals(homes, aways)
+        goals = np.arange(self.max_goals + 1)
+        log_fact = np.array([math.lgamma(g + 1) for g in goals])
+        pmf_h = np.exp(goals * np.log(lam_h)[:, None] - lam_h[:, None] - log_fact)
+        pmf_a = np.exp(goals * np.log(lam_a)[:, None] - lam_a[:, None] - log_fact)
+        scores = pmf_h[:, :, None] * pmf_a[:, None, :]  # (M, home goals, away goals)
+        scores /= scores.sum(axis=(1, 2), keepdims=True)  # mass beyond max_goals
+
+        home_win = np.tril(np.ones((len(goals), len(goals))), -1)
+        draw = np.eye(len(goals))
+        p_home = (scores * home_win).sum(axis=(1, 2))
+        p_draw = (scores * draw).sum(axis=(1, 2))
+        total = goals[:, None] + goals[None, :]
+        return {
+            "1x2": np.stack([p_home, p_draw, 1 - p_home - p_draw], axis=1),
+            "over": {line: (scores * (total > line)).sum(axis=(1, 2)) for line in lines},
+            "btts": scores[:, 1:, 1:].sum(axis=(1, 2)),
+            "xg": np.stack([lam_h, lam_a], axis=1),
+            "known": known,
+        }
+
+    def predict_1x2(self, homes: Sequence[str], aways: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(probs[M, 3] as home/draw/away, known[M]): the interface MatchScreener uses."""
+        prediction = self.predict(homes, aways, lines=())
+        return prediction["1x2"], prediction["known"]
+
+def results_from_scores(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Completed results from The Odds API /scores payload, oldest first."""
+    results = []
+    for event in events:
+        if not event.get("completed") or not event.get("scores"):
+            continue
+        goals = {s.get("name"): s.get("score") for s in event["scores"]}
+        try:
+            home_goals, away_goals = int(goals[event["home_team"]]), int(goals[event["away_team"]])
+        except (KeyError, TypeError, ValueError):
+            continue
+        results.append({
+            "id": event["id"], "commence_time": event.get("commence_time", ""),
+            "home_team": event["home_team"], "away_team": event["away_team"],
+            "home_goals": home_goals, "away_goals": away_goals,
+        })
+    return sorted(results, key=lambda r: r["commence_time"])
+
+def load_results(path: str = DEFAULT_RESULTS_PATH) -> List[Dict[str, Any]]:
+    """Stored results (JSON lines, or a JSON list), oldest first; [] when the file does not exist."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        results = json.loads(text)
+    else:
+        results = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return sorted(results, key=lambda r: r.get("commence_time", ""))
+
+def append_results(results: Iterable[Dict[str, Any]], path: str = DEFAULT_RESULTS_PATH) -> int:
+    """Appends results not stored yet (by id) to the JSON-lines history. Returns how many were added."""
+    known = {r["id"] for r in load_results(path)}
+    new = [r for r in results if r["id"] not in known]
+    if new:
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in new)
+    return len(new)
@@ -0,0 +1,187 @@
+import re
+import unicodedata
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from betting_logic import InsuranceLogic
+
+VOID_FIXTURE_STATUSES = {"cancelled", "canceled", "postponed", "abandoned", "void"}
+
+def normalize_name(name: str) -> str:
+    """Lowercase, accent-free, single-spaced team/selection name."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+def to_cents(amount: Any) -> int:
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1")))
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(int(cents)) / 100).quantize(Decimal("0.01"))
+
+class BatchSettlementEngine:
+    """
+    Settles every open bet on a fixture at once.
+
+    InsuranceLogic.process_bet_result works bet by bet; at the end of a matchday we need
+    thousands of settlements. This engine resolves each distinct (market, selection)
+    once, computes statuses and payouts over integer-cent arrays, asks
+    InsuranceLogic.process_bet_result for the refund of each distinct (status, Gold Pick,
+    stake) once, and folds refunds into one wallet delta per user so each wallet gets a
+    single write (see apply_wallet_deltas).
+
+    Supported markets: 1X2/h2h (home/draw/away, 1/X/2 or team name),
+    Over/Under ("Over 2.5"), BTTS ("Yes"/"No"). Unknown selections stay 'open'.
+    """
+
+    REFUND_REASON = "gold_pick_insurance"
+
+    @staticmethod
+    def resolve_selection(market_type: str, selection: str, fixture: Dict[str, Any]) -> str:
+        """Returns 'won', 'lost', 'void' or 'open' (cannot be resolved) for one selection."""
+        home_goals = fixture.get("home_goals")
+        away_goals = fixture.get("away_goals")
+        if home_goals is None or away_goals is None:
+            return "open"
+
+        market = normalize_name(market_type).replace(" ", "")
+        sel = normalize_name(selection)
+
+        if market in ("1x2", "h2h", "matchwinner"):
+            home, away = normalize_name(fixture.get("home_team")), normalize_name(fixture.get("away_team"))
+            if sel in ("1", "home", "local") or (home and sel == home):
+                pick = "home"
+            elif sel in ("x", "draw", "empate"):
+                pick = "draw"
+            elif sel in ("2", "away", "visitante") or (away and sel == away):
+                pick = "away"
+            else:
+                return "open"
+            actual = "home" if home_goals > away_goals else "away" if away_goals > home_goals else "draw"
+            return "won" if pick == actual else "lost"
+
+        if market in ("over/under", "totals", "overunder"):
+            found = re.match(r"(over|under|mas|menos)\s*\+?([\d.,]+)", sel)
+            if not found:
+                return "open"
+            line = float(found.group(2).replace(",", "."))
+            total = home_goals + away_goals
+            if total == line:
+                return "void"  # push on whole-number lines
+            over = found.group(1) in ("over", "mas")
+            return "won" if (total > line) == over else "lost"
+
+        if market in ("btts", "ambosmarcan"):
+            both = home_goals > 0 and away_goals > 0
+            if sel in ("yes", "si"):
+                return "won" if both else "lost"
+            if sel == "no":
+                return "lost" if both else "won"
+
+        return "open"
+
+    @staticmethod
+    def refunds(statuses: np.ndarray, is_gold: np.ndarray, stakes: np.ndarray) -> np.ndarray:
+        """
+        Refund in cents per bet. The rule (eligibility and cap) stays in
+        InsuranceLogic.process_bet_result; it is called once per distinct stake of each
+        (status, Gold Pick) group and the result is broadcast back to the bets.
+        """
+        refunds = np.zeros(len(stakes), dtype=np.int64)
+        for status in set(statuses.tolist()):
+            for gold in (False, True):
+                mask = (statuses == status) & (is_gold == gold)
+                if not mask.any():
+                    continue
+                values, inverse = np.unique(stakes[mask], return_inverse=True)
+                per_value = [InsuranceLogic.process_bet_result(from_cents(v), status, gold) for v in values]
+                refunds[mask] = np.array([to_cents(r) if r else 0 for r in per_value], dtype=np.int64)[inverse]
+        return refunds
+
+    def settle_fixture(self, fixture: Dict[str, Any], open_bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Args:
+            fixture: {'fixture_id', 'home_team', 'away_team', 'home_goals', 'away_goals', 'status'}.
+            open_bets: dicts with 'bet_id', 'user_id', 'market_type', 'selection',
+                       'bet_amount', 'odds' and 'is_daily_gold_pick'.
+
+        Returns:
+            {'bets': [{bet_id, user_id, status, payout, refund}], 'wallet_deltas': [...],
+             'summary': {status: count, 'refund_total': Decimal}}
+        """
+        n = len(open_bets)
+        fixture_void = str(fixture.get("status", "")).lower() in VOID_FIXTURE_STATUSES
+
+        # 1. Resolve each distinct (market, selection) once
+        resolved: Dict[Tuple[str, str], str] = {}
+        statuses = np.empty(n, dtype=object)
+        for i, bet in enumerate(open_bets):
+            key = (bet.get("market_type", ""), bet.get("selection", ""))
+            if key not in resolved:
+                resolved[key] = "void" if fixture_void else self.resolve_selection(key[0], key[1], fixture)
+            statuses[i] = resolved[key]
+
+        # 2. Money in integer cents, vectorized
+        stakes = np.array([to_cents(b.get("bet_amount", 0)) for b in open_bets], dtype=np.int64)
+        odds = np.array([float(b.get("odds") or 0) for b in open_bets], dtype=np.float64)
+        is_gold = np.array([bool(b.get("is_daily_gold_pick")) for b in open_bets], dtype=bool)
+
+        won = statuses == "won"
+        void = statuses == "void"
+
+        payouts = np.where(won, np.rint(stakes * odds).astype(np.int64), 0)
+        payouts = np.where(void, stakes, payouts)
+        refunds = self.refunds(statuses, is_gold, stakes)
+
+        # 3. One wallet delta per user
+        user_ids = [str(b.get("user_id")) for b in open_bets]
+        wallet_deltas = []
+        if n:
+            users, user_idx = np.unique(np.array(user_ids, dtype=object), return_inverse=True)
+            per_user = np.zeros(users.shape[0], dtype=np.int64)
+            np.add.at(per_user, user_idx, refunds)
+            counts = np.bincount(user_idx, weights=(refunds > 0)).astype(int)
+            fixture_label = fixture.get("fixture_id") or f"{fixture.get('home_team')} vs {fixture.get('away_team')}"
+            for user, cents, count in zip(users, per_user, counts):
+                if cents > 0:
+                    wallet_deltas.append({
+                        "user_id": user,
+                        "amount": from_cents(cents),
+                        "reason": self.REFUND_REASON,
+                        "description": f"Seguro Gold Pick: {count} apuesta(s) perdida(s) en {fixture_label}"
+                    })
+
+        bets = [{
+            "bet_id": bet.get("bet_id"),
+            "user_id": user_ids[i],
+            "status": statuses[i],
+            "payout": from_cents(payouts[i]),
+            "refund": from_cents(refunds[i]) if refunds[i] else None,
+        } for i, bet in enumerate(open_bets)]
+
+        summary = {s: int((statuses == s).sum()) for s in ("won", "lost", "void", "open")}
+        summary["refund_total"] = from_cents(int(refunds.sum()))
+        return {"bets": bets, "wallet_deltas": wallet_deltas, "summary": summary}
+
+    def settle_matchday(self, fixtures: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """
+        Settles several fixtures and merges their wallet deltas, so a user with refunds on
+        many matches still gets a single wallet write for the whole matchday.
+        """
+        bets: List[Dict[str, Any]] = []
+        per_user: Dict[str, Dict[str, Any]] = {}
+        summary = {"won": 0, "lost": 0, "void": 0, "open": 0, "refund_total": Decimal("0.00")}
+
+        for fixture, open_bets in fixtures:
+            result = self.settle_fixture(fixture, open_bets)
+            bets.extend(result["bets"])
+            for key, value in result["summary"].items():
+                summary[key] += value
+            for delta in result["wallet_deltas"]:
+                merged = per_user.setdefault(delta["user_id"], {**delta, "amount": Decimal("0.00"), "description": []})
+                merged["amount"] += delta["amount"]
+                merged["description"].append(delta["description"])
+
+        wallet_deltas = [{**d, "description": " | ".join(d["description"])} for d in per_user.values()]
+        return {"bets": bets, "wallet_deltas": wallet_deltas, "summary": summary}
@@ -0,0 +1,343 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from async_supabase import async_db
+from settlement_engine import normalize_name
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Without Pillow uploads are deduped by content hash and sent as uploaded
+    Image = None
+
+SLIP_MAX_SIDE = int(os.getenv("SLIP_MAX_SIDE", "1600"))  # enough for the Vision model to read a slip
+SLIP_MAX_LINE_BYTES = int(os.getenv("SLIP_MAX_LINE_BYTES", str(16 * 1024 * 1024)))  # one base64 screenshot
+SLIP_MAX_UPLOADS = int(os.getenv("SLIP_MAX_UPLOADS", "100"))  # per request
+SLIP_JPEG_QUALITY = 85
+HASH_SIZE = 16  # 16x16 difference hash: finds candidate copies of a slip cheaply
+NEAR_DUPLICATE_BITS = 12  # re-encoded / resized copies differ by a few of the 256 bits
+THUMB_SIZE = (384, 672)  # grayscale thumbnail that confirms a candidate copy
+NEAR_DUPLICATE_LEVELS = 96  # copies stay within this per pixel; a different odds digit does not
+TEAM_SUFFIXES = {"fc", "cf", "afc", "sc", "cd", "club"}
+PICK_COLUMNS = "id,match,league_name,market_type,selection,odds,event_date,is_gold"
+
+Upload = Optional[bytes]
+
+def difference_hash(image, size: int = HASH_SIZE) -> int:
+    """Perceptual hash: one bit per horizontally adjacent pixel pair of a size x size grayscale thumbnail."""
+    small = image.convert("L").resize((size + 1, size), Image.BOX)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def prepare_slip(data: Upload, max_side: int = SLIP_MAX_SIDE) -> Dict[str, Any]:
+    """
+    Process-pool worker: content hash, upright downscaled JPEG and perceptual hash of one
+    upload. Without Pillow the upload is passed through with its content hash only.
+    """
+    if not data:
+        return {"sha256": None, "phash": None, "thumb": None, "image": None, "size": None, "error": "empty or undecodable upload"}
+    slip = {"sha256": hashlib.sha256(data).hexdigest(), "phash": None, "thumb": None, "image": data, "size": None, "error": None}
+    if Image is None:
+        return slip
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original).convert("RGB")
+        image.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=SLIP_JPEG_QUALITY)
+        thumb = image.convert("L").resize(THUMB_SIZE, Image.BOX)
+        slip.update(image=out.getvalue(), size=image.size, phash=difference_hash(image), thumb=thumb.tobytes())
+    except Exception as e:  # not an image, or truncated: reported for this upload only
+        slip.update(image=None, error=f"unreadable image: {e}")
+    return slip
+
+def team_key(name: Any) -> str:
+    """Team name as indexed: accent-free, lowercase, no punctuation or 'FC'-style suffixes."""
+    words = re.sub(r"[^a-z0-9 ]", " ", normalize_name(name)).split()
+    return " ".join(w for w in words if w not in TEAM_SUFFIXES)
+
+def split_match(match: Any) -> Tuple[str, str]:
+    """'Arsenal vs Chelsea' / 'Arsenal v Chelsea' / 'Arsenal - Chelsea' -> ('Arsenal', 'Chelsea')."""
+    home, _, away = re.sub(r"\s+(?:vs\.?|v|-)\s+", " vs ", str(match or ""), count=1, flags=re.IGNORECASE).partition(" vs ")
+    return home.strip(), away.strip()
+
+class PickIndex:
+    """
+    Today's daily_picks indexed in memory by normalized team name (and team pair), so
+    every selection extracted from a slip is matched with dictionary lookups instead of
+    a query per selection.
+    """
+
+    def __init__(self, picks: Iterable[Dict[str, Any]]):
+        self.by_pair: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self.by_team: Dict[str, List[Dict[str, Any]]] = {}
+        for pick in picks:
+            home, away = (team_key(t) for t in split_match(pick.get("match")))
+            if home and away:
+                self.by_pair.setdefault(tuple(sorted((home, away))), []).append(pick)
+            for team in {home, away} - {""}:
+                self.by_team.setdefault(team, []).append(pick)
+
+    @classmethod
+    async def load(cls, db=async_db, day: Optional[str] = None) -> "PickIndex":
+        """Picks of `day` (YYYY-MM-DD, default today in UTC) by event_date, or by match_date where it is unset."""
+        start = datetime.fromisoformat(day) if day else datetime.now(timezone.utc)
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        bounds = [f"{t:%Y-%m-%dT%H:%M:%S}Z" for t in (start, start + timedelta(days=1))]
+        same_day = (f"(event_date.eq.{start.date()},"
+                    f"and(event_date.is.null,match_date.gte.{bounds[0]},match_date.lt.{bounds[1]}))")
+        return cls(await db.select("daily_picks", PICK_COLUMNS, filters={"or": same_day}))
+
+    def candidates(self, selection: Dict[str, Any]) -> List[Dict[str, Any]]:
+        home, away = split_match(selection.get("match"))
+        home = team_key(selection.get("home_team") or home)
+        away = team_key(selection.get("away_team") or away)
+        if home and away:
+            return self.by_pair.get(tuple(sorted((home, away))), [])
+        # Slips that only show the team backed ("Arsenal @ 1.85")
+        team = home or away or team_key(selection.get("selection"))
+        return self.by_team.get(team, [])
+
+    def match(self, selection: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The daily pick on the same fixture as an extracted selection, preferring the same selection."""
+        picks = self.candidates(selection)
+        if not picks:
+            return None
+        wanted = team_key(selection.get("selection"))
+        pick = next((p for p in picks if wanted and team_key(p.get("selection")) == wanted), picks[0])
+        return {
+            "pick_id": pick.get("id"),
+            "match": pick.get("match"),
+            "market_type": pick.get("market_type"),
+            "selection": pick.get("selection"),
+            "odds": pick.get("odds"),
+            "is_gold": bool(pick.get("is_gold")),
+            "same_selection": bool(wanted) and team_key(pick.get("selection")) == wanted,
+        }
+
+def decode_upload(line: bytes) -> Upload:
+    """One NDJSON line ({"image": "<base64>"}, a bare base64 string or a data: URL) -> image bytes."""
+    try:
+        item = json.loads(line)
+        data = item.get("image") if isinstance(item, dict) else item
+        return base64.b64decode(str(data).split(",", 1)[-1], validate=True)
+    except (ValueError, binascii.Error):
+        return None
+
+class UploadLimitError(ValueError):
+    """Raised by ndjson_uploads when a request body goes past SLIP_MAX_LINE_BYTES or SLIP_MAX_UPLOADS."""
+
+async def ndjson_uploads(chunks: AsyncIterable[bytes], max_line_bytes: int = SLIP_MAX_LINE_BYTES,
+                         max_uploads: int = SLIP_MAX_UPLOADS) -> AsyncIterator[Upload]:
+    """
+    Images from a streamed NDJSON request body, yielded as soon as each line is complete.
+    Raises UploadLimitError on the line past `max_uploads`, or as soon as a line grows past
+    `max_line_bytes`, without waiting for its newline: the buffer never holds more than one
+    line plus one chunk.
+    """
+    buffer = bytearray()
+    count = 0
+
+    def accept(line: bytearray) -> bool:
+        nonlocal count
+        if len(line) > max_line_bytes:
+            raise UploadLimitError(f"Upload larger than {max_line_bytes} bytes")
+        if not line.strip():
+            return False
+        count += 1
+        if count > max_uploads:
+            raise UploadLimitError(f"More than {max_uploads} uploads")
+        return True
+
+    async for chunk in chunks:
+        buffer += chunk
+        if b"\n" in chunk:
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if accept(line):
+                    yield decode_upload(bytes(line))
+        if len(buffer) > max_line_bytes:
+            raise UploadLimitError(f"Upload larger than {max_line_bytes} bytes")
+    if accept(buffer):
+        yield decode_upload(bytes(buffer))
+
+async def _iterate(uploads: Union[Iterable[Upload], AsyncIterable[Upload]]) -> AsyncIterator[Upload]:
+    if hasattr(uploads, "__aiter__"):
+        async for data in uploads:
+            yield data
+    else:
+        for data in uploads:
+            yield data
+
+class SlipIngestionPipeline:
+    """
+    Bet slip uploads -> extracted selections matched against daily_picks.
+
+    Uploads are consumed as a stream. Each one is decoded, downscaled, re-encoded and
+    hashed in a process pool. A slip already seen in the stream (same bytes, or the same
+    picture re-encoded or resized: perceptual hash plus thumbnail check) reuses the first
+    copy's extraction instead of being analyzed again. Unique slips go to the extractor (anything with
+    GeminiAgentService's `analyze_bet_images(images) -> results`) `batch_size` at a time,
+    in threads, so extraction overlaps with the preparation of the next uploads; at most
+    `max_pending_batches` are in flight, which also bounds how far reading runs ahead.
+    """
+
+    def __init__(self, extractor, workers: int = 2, batch_size: int = 8, max_side: int = SLIP_MAX_SIDE,
+                 max_pending_batches: int = 2):
+        self.extractor = extractor
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_side = max_side
+        self.max_pending_batches = max_pending_batches
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers > 1 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool  # None: the event loop's thread pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def _extract(self, slips: List[Dict[str, Any]], slots: asyncio.Semaphore):
+        try:
+            results = await asyncio.to_thread(self.extractor.analyze_bet_images, [s["image"] for s in slips])
+        except Exception as e:
+            results, error = [], f"extraction failed: {e}"
+        else:
+            error = "no extraction returned"
+        finally:
+            slots.release()
+        for i, slip in enumerate(slips):
+            if i < len(results) and isinstance(results[i], dict):
+                slip["extraction"] = results[i]
+            else:
+                slip["error"] = error
+
+    @staticmethod
+    def _original(slip: Dict[str, Any], by_sha: Dict[str, Dict], by_phash: List[Tuple[int, Dict]]) -> Optional[Dict]:
+        """
+        First copy of the same slip: identical bytes, or a perceptual-hash neighbour whose
+        thumbnail matches pixel for pixel within NEAR_DUPLICATE_LEVELS. The hash alone
+        cannot tell two slips of one bookmaker apart (same layout, different lines), and
+        merging them would lose a slip, while a missed copy only costs one extraction.
+        """
+        if slip["sha256"] in by_sha:
+            return by_sha[slip["sha256"]]
+        if slip["phash"] is None:
+            return None
+        thumb = np.frombuffer(slip["thumb"], dtype=np.uint8).astype(np.int16)
+        for phash, original in by_phash:
+            if (phash ^ slip["phash"]).bit_count() > NEAR_DUPLICATE_BITS:
+                continue
+            other = np.frombuffer(original["thumb"], dtype=np.uint8).astype(np.int16)
+            if np.abs(thumb - other).max() <= NEAR_DUPLICATE_LEVELS:
+                return original
+        return None
+
+    async def ingest(self, uploads: Union[Iterable[Upload], AsyncIterable[Upload]],
+                     index: Optional[PickIndex] = None) -> Dict[str, Any]:
+        """
+        Runs every upload of `uploads` (bytes, sync or async iterable) through the pipeline.
+        Returns per-slip results in upload order (bookmaker, stake, selections with the
+        matching daily pick, duplicate_of / error) and a summary.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        prepared: asyncio.Queue = asyncio.Queue(maxsize=max(self.workers, 1) * 4)
+        slots = asyncio.Semaphore(self.max_pending_batches)
+
+        async def read():
+            try:
+                async for data in _iterate(uploads):
+                    await prepared.put(loop.run_in_executor(executor, prepare_slip, data, self.max_side))
+            except Exception:
+                await prepared.put(None)  # the upload source failed: `await reader` re-raises it below
+                raise
+            await prepared.put(None)
+
+        slips: List[Dict[str, Any]] = []
+        by_sha: Dict[str, Dict] = {}
+        by_phash: List[Tuple[int, Dict]] = []
+        batch: List[Dict[str, Any]] = []
+        extractions: List[asyncio.Task] = []
+        calls = 0
+
+        async def flush():
+            nonlocal batch, calls
+            if batch:
+                await slots.acquire()
+                extractions.append(asyncio.create_task(self._extract(batch, slots)))
+                batch, calls = [], calls + 1
+
+        reader = asyncio.create_task(read())
+        try:
+            while (future := await prepared.get()) is not None:
+                slip = {**await future, "index": len(slips), "duplicate_of": None}
+                slips.append(slip)
+                if slip["error"]:
+                    continue
+                original = self._original(slip, by_sha, by_phash)
+                if original is not None:
+                    slip["duplicate_of"] = original["index"]
+                    continue
+                by_sha[slip["sha256"]] = slip
+                if slip["phash"] is not None:
+                    by_phash.append((slip["phash"], slip))
+                batch.append(slip)
+                if len(batch) >= self.batch_size:
+                    await flush()
+            await reader
+            await flush()
+            await asyncio.gather(*extractions)
+        finally:
+            reader.cancel()
+            for task in extractions:
+                task.cancel()
+
+        results, matched = [], 0
+        for slip in slips:
+            source = slips[slip["duplicate_of"]] if slip["duplicate_of"] is not None else slip
+            extraction = source.get("extraction") or {}
+            selections = []
+            for selection in extraction.get("selections") or []:
+                pick = index.match(selection) if index is not None else None
+                matched += pick is not None
+                selections.append({**selection, "pick": pick})
+            results.append({
+                "index": slip["index"],
+                "sha256": slip["sha256"],
+                "size": slip["size"],
+                "duplicate_of": slip["duplicate_of"],
+                "error": slip["error"] or source["error"],
+                "bookmaker": extraction.get("bookmaker"),
+                "stake": extraction.get("stake"),
+                "selections": selections,
+            })
+
+        return {
+            "uploads": len(slips),
+            "unique": len(by_sha),
+            "duplicates": sum(s["duplicate_of"] is not None for s in slips),
+            "errors": sum(r["error"] is not None for r in results),
+            "extraction_calls": calls,
+            "matched_selections": matched,
+            "slips": results,
+        }
@@ -1,28 +1,166 @@
-
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+
+LIVESCORES_TTL = float(os.getenv("SPORTMONKS_LIVESCORES_TTL", "5"))
+ODDS_TTL = float(os.getenv("SPORTMONKS_ODDS_TTL", "120"))
+MULTI_FIXTURES_LIMIT = 50  # ids per fixtures/multi call
+LIVESCORES_INCLUDE = "participants,scores,odds"
+CACHE_MAX_ENTRIES = int(os.getenv("SPORTMONKS_CACHE_MAX_ENTRIES", "2000"))
+
+class _Entry:
+    __slots__ = ("expires", "etag", "last_modified", "payload")
+
+    def __init__(self, expires: float, etag: Optional[str], last_modified: Optional[str], payload: Dict[str, Any]):
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+        self.payload = payload
 
 class SportmonksService:
     """
     Service to interact with Sportmonks API for real-time football data.
+
+    All calls share one keep-alive requests.Session. Responses are cached per endpoint
+    with short TTLs (seconds for livescores, minutes for odds); once an entry expires it
+    is revalidated with If-None-Match / If-Modified-Since, so an unchanged response costs
+    a 304 instead of a full body. Concurrent identical requests are coalesced into one
+    upstream call, and get_fixtures_odds fetches many fixtures through fixtures/multi.
+    Cached payloads are shared between callers and must be treated as read-only.
+    The cache holds at most max_entries responses: past that, expired entries are
+    dropped first, then the least recently used ones.
     """
-    def __init__(self):
-        self.api_key = os.getenv("SPORTMONKS_API_KEY")
-        self.base_url = "https://api.sportmonks.com/v3/football"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.sportmonks.com/v3/football",
+        livescores_ttl: float = LIVESCORES_TTL,
+        odds_ttl: float = ODDS_TTL,
+        timeout: tuple = (3.05, 10),
+        max_connections: int = 10,
+        max_entries: int = CACHE_MAX_ENTRIES
+    ):
+        self.api_key = api_key or os.getenv("SPORTMONKS_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.livescores_ttl = livescores_ttl
+        self.odds_ttl = odds_ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._cache: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {"upstream": 0, "hits": 0, "coalesced": 0, "not_modified": 0, "evicted": 0}
+
+    # --- Cached, coalesced GET ---
+
+    def _put(self, key: Tuple, entry: _Entry):
+        """Stores an entry (caller holds the lock) and trims the cache to max_entries."""
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) <= self.max_entries:
+            return
+        now = time.monotonic()
+        for stale in [k for k, e in self._cache.items() if e.expires <= now and k != key]:
+            del self._cache[stale]
+            self.stats["evicted"] += 1
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def _fetch(self, key: Tuple, path: str, params: Dict[str, str], ttl: float) -> Dict[str, Any]:
+        entry = self._cache.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        with self._lock:
+            self.stats["upstream"] += 1
+        response = self.session.get(
+            f"{self.base_url}/{path}", params={**params, "api_token": self.api_key},
+            headers=headers, timeout=self.timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            payload = entry.payload
+        else:
+            response.raise_for_status()
+            payload = response.json()
+
+        with self._lock:
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+            self._put(key, _Entry(
+                time.monotonic() + ttl,
+                response.headers.get("ETag") or (entry.etag if entry else None),
+                response.headers.get("Last-Modified") or (entry.last_modified if entry else None),
+                payload
+            ))
+        return payload
+
+    def _get(self, path: str, params: Dict[str, str], ttl: float) -> Dict[str, Any]:
+        key = (path, tuple(sorted(params.items())))
+        while True:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry.expires > time.monotonic():
+                    self.stats["hits"] += 1
+                    self._cache.move_to_end(key)
+                    return entry.payload
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+                self.stats["coalesced"] += 1
+            # Another thread is fetching this exact request: wait and read its result
+            waiter.wait(self.timeout[0] + self.timeout[1])
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry.expires > time.monotonic():
+                    return entry.payload
+            # The leader failed: retry (possibly becoming the leader)
+
+        try:
+            return self._fetch(key, path, params, ttl)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+
+    def _store(self, path: str, params: Dict[str, str], ttl: float, payload: Dict[str, Any]):
+        key = (path, tuple(sorted(params.items())))
+        with self._lock:
+            self._put(key, _Entry(time.monotonic() + ttl, None, None, payload))
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # --- Endpoints ---
 
     def get_live_scores(self) -> Dict[str, Any]:
         """
-        Fetches live scores for supported leagues.
+        Fetches live scores for supported leagues, with participants, scores and odds
+        (the live stream diffs all three on every tick).
         """
         if not self.api_key:
             return {"error": "API Key missing", "data": []}
-            
+
         try:
-            url = f"{self.base_url}/livescores?api_token={self.api_key}&include=participants,scores"
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
+            return self._get("livescores", {"include": LIVESCORES_INCLUDE}, self.livescores_ttl)
         except Exception as e:
             print(f"Sportmonks API Error: {e}")
             return {"error": str(e), "data": []}
@@ -35,9 +173,50 @@ class SportmonksService:
             return {"error": "API Key missing", "data": []}
 
         try:
-            url = f"{self.base_url}/odds/fixture/{fixture_id}?api_token={self.api_key}"
-            response = requests.get(url)
-            return response.json()
+            return self._get(f"odds/fixture/{fixture_id}", {}, self.odds_ttl)
         except Exception as e:
             print(f"Sportmonks Odds Error: {e}")
             return {"error": str(e), "data": []}
+
+    def get_fixtures_odds(self, fixture_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Odds for many fixtures: {fixture_id: {"data": [...]}} (or {"error", "data": []}).
+
+        Fixtures with fresh cached odds are served locally; the rest are fetched through
+        fixtures/multi (MULTI_FIXTURES_LIMIT ids per call, include=odds) and stored in the
+        same cache get_fixture_odds reads from.
+        """
+        ids = list(dict.fromkeys(str(f) for f in fixture_ids))
+        if not self.api_key:
+            return {f: {"error": "API Key missing", "data": []} for f in ids}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for fixture_id in ids:
+                key = (f"odds/fixture/{fixture_id}", ())
+                entry = self._cache.get(key)
+                if entry is not None and entry.expires > now:
+                    self.stats["hits"] += 1
+                    self._cache.move_to_end(key)
+                    results[fixture_id] = entry.payload
+                else:
+                    missing.append(fixture_id)
+
+        for start in range(0, len(missing), MULTI_FIXTURES_LIMIT):
+            chunk = missing[start:start + MULTI_FIXTURES_LIMIT]
+            try:
+                payload = self._get(f"fixtures/multi/{','.join(chunk)}", {"include": "odds"}, self.odds_ttl)
+            except Exception as e:
+                print(f"Sportmonks Odds Error: {e}")
+                results.update({f: {"error": str(e), "data": []} for f in chunk})
+                continue
+
+            by_id = {str(fixture.get("id")): fixture for fixture in payload.get("data") or []}
+            for fixture_id in chunk:
+                odds = {"data": (by_id.get(fixture_id) or {}).get("odds") or []}
+                self._store(f"odds/fixture/{fixture_id}", {}, self.odds_ttl, odds)
+                results[fixture_id] = odds
+
+        return {f: results[f] for f in ids}
@@ -1,5 +1,4 @@
-import time
-import requests
+import asyncio
 import json
 import os
 from datetime import datetime
@@ -7,6 +6,16 @@ from supabase import create_client, Client
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from odds_fetcher import OddsIngestionClient, configured_leagues
+from llm_scheduler import LLMBatchScheduler, RateLimitError
+from analysis_cache import AnalysisCache, analysis_key
+from picks_writer import DailyPicksWriter, notify_feed_update, structure_analysis
+from odds_store import OddsStore
+from market_consensus import MarketConsensusEngine
+from match_screener import MatchScreener
+from rating_model import PoissonRatingModel, append_results, results_from_scores
+from async_supabase import async_db
+from bet_ledger import BetLedger, fixtures_from_results
 
 # --- CARGAR VARIABLES DE ENTORNO ---
 load_dotenv()
@@ -14,6 +23,9 @@ ODDS_API_KEY = os.getenv("ODDS_API_KEY", "128133df6f81ea2caf0164b8db49c112")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+MAX_MATCHES = int(os.getenv("MAX_MATCHES", "30"))
+# Subir la versión al cambiar build_batch_prompt para no reutilizar análisis viejos del cache
+PROMPT_VERSION = "batch-v2"
 
 # CLIENTES
 if not GEMINI_API_KEY or not SUPABASE_URL:
@@ -25,84 +37,112 @@ try:
 except Exception as e:
     print(f"Error cliente: {e}")
 
-def fetch_real_matches():
+def fetch_real_matches(leagues=None):
     print("--- 1. CONECTANDO CON THE ODDS API (DATOS REALES - SIN FILTROS) ---")
-    leagues = [
-        "soccer_uefa_champs_league", 
-        "soccer_argentina_primera_division",
-        "soccer_brazil_campeonato",
-        "soccer_mexico_ligamx",
-        "soccer_spain_la_liga",
-        "soccer_england_league1"
-    ]
+    # Ligas configurables vía ODDS_LEAGUES="liga1,liga2,..." (por defecto las 6 de siempre)
+    leagues = leagues or configured_leagues()
     
     all_matches = []
     
+    # Descarga concurrente: una sola sesión con pool, timeout y reintentos con backoff (429/5xx)
+    # Usamos regions=eu,us (Europa y USA tienen la mayoría de datos), sin filtrar bookmakers
+    odds_client = OddsIngestionClient(ODDS_API_KEY, max_per_host=int(os.getenv("ODDS_MAX_CONCURRENCY", "10")))
+    finished = []
+    try:
+        results = odds_client.fetch_all(leagues)
+        if os.getenv("RATINGS_FROM_SCORES", "1") == "1":
+            finished = update_ratings(odds_client, leagues)
+    finally:
+        odds_client.close()
+
+    # Serie histórica de cuotas: todas las casas y mercados, para movimiento de línea y CLV.
+    # Las líneas de cierre se capturan solas cuando un partido ya empezó.
+    try:
+        store = OddsStore()
+        rows = store.append_snapshot(
+            m for data in results.values() if not isinstance(data, Exception) for m in data
+        )
+        print(f"🗃️ Odds store: {rows} cuotas guardadas ({store.stats()['closed_fixtures']} cierres capturados).")
+    except Exception as e:
+        print(f"⚠️ Odds store no disponible: {e}")
+        store = None
+
+    # Liquidar apuestas del ledger con los resultados recién descargados (ROI/CLV incrementales)
+    if finished:
+        settle_ledger(finished, store)
+
+    now_iso = datetime.utcnow().isoformat()
     for league in leagues:
-        # CAMBIO CLAVE: Quitamos "&bookmakers=1xbet" para que traiga CUALQUIERA disponible
-        # Usamos regions=eu,us (Europa y USA tienen la mayoría de datos)
-        url = f"https://api.the-odds-api.com/v4/sports/{league}/odds/?apiKey={ODDS_API_KEY}&regions=eu,us&markets=h2h"
+        data = results.get(league)
+        if isinstance(data, Exception):
+            print(f"❌ Error API ({league}): {data}")
+            continue
+
+        # Filtramos partidos futuros
+        future_matches = [m for m in data if m['commence_time'] > now_iso]
         
-        try:
-            res = requests.get(url)
-            if res.status_code == 200:
-                data = res.json()
-                # Filtramos partidos futuros
-                future_matches = [m for m in data if m['commence_time'] > datetime.utcnow().isoformat()]
-                
-                # VERIFICACIÓN DE DEBUG
-                count_with_odds = sum(1 for m in future_matches if m.get('bookmakers'))
-                print(f"✅ {league}: {len(future_matches)} partidos. ({count_with_odds} con cuotas listas).")
-                
-                all_matches.extend(future_matches)
-            else:
-                print(f"❌ Error API ({league}): {res.status_code}")
-        except Exception as e:
-            print(f"Error de conexión en {league}: {e}")
+        # VERIFICACIÓN DE DEBUG
+        count_with_odds = sum(1 for m in future_matches if m.get('bookmakers'))
+        print(f"✅ {league}: {len(future_matches)} partidos. ({count_with_odds} con cuotas listas).")
+        
+        all_matches.extend(future_matches)
             
     return all_matches
 
-def analyze_and_upload(matches):
-    print("--- 2. ANALIZANDO CON GEMINI 2.0 (MODO BATCH / LOTES) ---")
-    
-    if not matches:
-        return
+def update_ratings(odds_client, leagues):
+    """Aprende los resultados de los últimos días (incremental, sin reentrenar desde cero). Devuelve los resultados."""
+    model = PoissonRatingModel.load()
+    learned = 0
+    finished = []
+    for league, events in odds_client.fetch_all(leagues, odds_client.fetch_league_scores).items():
+        if isinstance(events, Exception):
+            print(f"⚠️ Resultados no disponibles ({league}): {events}")
+            continue
+        results = [{**r, "league": league} for r in results_from_scores(events)]
+        learned += model.update_many(results)
+        finished.extend(results)
+    model.save()
+    # Historial de resultados para el backtester (backtester.py), sin duplicados
+    stored = append_results(finished)
+    print(f"📈 Ratings: {learned} resultados nuevos, {len(model.teams)} equipos ({stored} guardados en el historial).")
+    return finished
 
-    # 1. Filtrar partidos válidos (que tengan cuotas)
-    valid_matches = []
-    for m in matches:
-        if m.get('bookmakers') and m['bookmakers'][0]['markets']:
-            valid_matches.append(m)
-            
-    print(f"📊 Partidos válidos para análisis: {len(valid_matches)}")
-    
-    # Procesamos en lotes de 5 para no saturar (Max 30 partidos total)
-    valid_matches = valid_matches[:30]
-    BATCH_SIZE = 5
-    
-    for i in range(0, len(valid_matches), BATCH_SIZE):
-        batch = valid_matches[i : i + BATCH_SIZE]
-        print(f"\n📦 Procesando Lote {i//BATCH_SIZE + 1} ({len(batch)} partidos)...")
-        
-        # Construir Prompt Unificado
-        matches_text = ""
-        for idx, m in enumerate(batch):
-            teams = f"{m['home_team']} vs {m['away_team']}"
-            league = m['sport_title']
-            # Safe access to odds
-            try:
-                odds_data = m['bookmakers'][0]['markets'][0]['outcomes']
-                matches_text += f"\nPARTIDO #{idx+1}:\nEvento: {teams}\nLiga: {league}\nCuotas: {json.dumps(odds_data)}\n"
-            except:
-                continue
-
-        prompt = f"""
+def settle_ledger(finished, store=None):
+    """Liquida las apuestas pendientes de partidos terminados; la línea de cierre sale del odds store."""
+    async def run():
+        try:
+            return await BetLedger(odds_store=store).settle(fixtures_from_results(finished))
+        finally:
+            await async_db.close()
+
+    try:
+        report = asyncio.run(run())
+        print(f"🧾 Ledger: {report['settled']} apuestas liquidadas ({report['with_closing_line']} con línea de cierre).")
+    except Exception as e:
+        print(f"⚠️ Ledger no disponible: {e}")
+
+def build_match_block(idx, m):
+    """Bloque de texto de un partido dentro del prompt (idx = número dentro del lote)."""
+    teams = f"{m['home_team']} vs {m['away_team']}"
+    consensus = m.get('market_consensus')
+    if consensus:
+        # Mejor cuota del mercado + probabilidad justa de consenso (sin margen) por resultado
+        return (f"\nPARTIDO #{idx}:\nEvento: {teams}\nLiga: {m['sport_title']}\n"
+                f"Mercado 1X2 ({consensus['books']} casas, margen medio {consensus['margin']:.1%}): "
+                f"{json.dumps(consensus['outcomes'])}\n")
+    odds_data = m['bookmakers'][0]['markets'][0]['outcomes']
+    return f"\nPARTIDO #{idx}:\nEvento: {teams}\nLiga: {m['sport_title']}\nCuotas: {json.dumps(odds_data)}\n"
+
+def build_batch_prompt(matches_text):
+    return f"""
         Actúa como Analista Quant Senior. Analiza este GRUPO de partidos REALES.
         
         {matches_text}
         
         INSTRUCCIONES:
         Para CADA partido listado arriba, genera un análisis de valor (Edge).
+        Usa la mejor cuota disponible (best_price) y la probabilidad justa de consenso
+        (fair_prob, sin margen de las casas) como referencia; "edge" es el de la mejor cuota.
         
         Debes devolver un ARRAY JSON exacto con un objeto por cada partido:
         [
@@ -127,52 +167,125 @@ def analyze_and_upload(matches):
         Responde ÚNICAMENTE con el JSON ARRAY.
         """
 
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.0-flash-exp", 
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
+def gemini_generate(prompt):
+    """Llamada a Gemini. Los 429 se traducen a RateLimitError para el scheduler."""
+    try:
+        response = client.models.generate_content(
+            model="gemini-2.0-flash-exp", 
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json"
             )
-            
-            picks_list = json.loads(response.text)
-            
-            # Procesar y guardar cada pick del lote
-            for pick in picks_list:
-                try:
-                    # Recuperar datos originales (Fecha!) usando el índice
-                    p_idx = int(pick.get("match_index", 0)) - 1
-                    if 0 <= p_idx < len(batch):
-                        original = batch[p_idx]
-                        pick['match_date'] = original['commence_time']
-                        # Asegurar nombres correctos
-                        pick['match'] = f"{original['home_team']} vs {original['away_team']}"
-                        pick['league_name'] = original['sport_title']
-                    
-                    # UI Compatibility: ai_analysis to JSON string
-                    ai_an = pick.get("ai_analysis")
-                    if isinstance(ai_an, str):
-                        pick["ai_analysis"] = json.dumps({"analysis_text": ai_an})
-                    elif isinstance(ai_an, dict):
-                        pick["ai_analysis"] = json.dumps(ai_an)
-                        
-                    # Limpiar campo auxiliar
-                    if "match_index" in pick: del pick["match_index"]
-                    
-                    supabase.table("daily_picks").insert(pick).execute()
-                    print(f"   ✅ Guardado: {pick.get('selection')} ({pick.get('match')})")
-                    
-                except Exception as save_err:
-                    print(f"   ❌ Error guardando pick: {save_err}")
-
-            # Pausa breve entre lotes (menos estricta que partida a partida)
-            print("⏳ Esperando 5s antes del siguiente lote...")
-            time.sleep(5)
-            
-        except Exception as e:
-            print(f"❌ Error en el Lote: {e}")
-            time.sleep(5)
+        )
+    except Exception as e:
+        if getattr(e, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(e):
+            raise RateLimitError(str(e))
+        raise
+    return response.text
+
+def match_cache_key(m):
+    """Clave de cache: partido + mercado + cuotas redondeadas + versión del prompt."""
+    teams = f"{m['home_team']} vs {m['away_team']}"
+    consensus = m.get('market_consensus')
+    if consensus:
+        # El bloque entero que ve el modelo (casas, margen, fair_prob, edge, dispersión):
+        # si el consenso se mueve con la misma mejor cuota, el análisis cacheado ya no vale
+        return analysis_key(teams, 'h2h-consensus', consensus, PROMPT_VERSION)
+    market = m['bookmakers'][0]['markets'][0]
+    return analysis_key(teams, market.get('key', 'h2h'), market['outcomes'], PROMPT_VERSION)
+
+def finalize_pick(pick, original):
+    """Completa un pick del modelo con los datos originales del partido (fecha, nombres)."""
+    pick['match_date'] = original['commence_time']
+    # Id del evento en The Odds API: las apuestas sobre el pick se liquidan con él
+    pick['fixture_id'] = original.get('id')
+    # Asegurar nombres correctos
+    pick['match'] = f"{original['home_team']} vs {original['away_team']}"
+    pick['league_name'] = original['sport_title']
+
+    # Análisis estructurado en la columna JSONB analysis_structure (ai_analysis queda como texto)
+    structure_analysis(pick)
+
+
+    # Limpiar campo auxiliar
+    if "match_index" in pick: del pick["match_index"]
+    return pick
+
+def analyze_and_upload(matches):
+    print("--- 2. ANALIZANDO CON GEMINI 2.0 (LOTES CONCURRENTES) ---")
+    
+    if not matches:
+        return
+
+    # 1. Consenso de mercado con TODAS las casas (mejor cuota, probabilidad sin margen,
+    #    dispersión entre casas y edge de la mejor cuota vs el consenso), en bloque.
+    #    Válidos = partidos con al menos una casa cotizando el 1X2 completo.
+    engine = MarketConsensusEngine()
+    consensus = engine.aggregate(matches)
+    valid_matches = []
+    for m, summary in zip(matches, engine.summaries(matches, consensus)):
+        if summary:
+            m['market_consensus'] = summary
+            valid_matches.append(m)
+
+    print(f"📊 Partidos válidos para análisis: {len(valid_matches)}")
+
+    # 2. Pre-filtro cuantitativo: modelo de ratings Poisson local vs probabilidad sin margen.
+    #    Solo los partidos con edge >= SCREEN_MIN_EDGE pasan al LLM (los no calificados
+    #    todavía pasan igual, para no vaciar el feed con una tabla de ratings vacía).
+    screener = MatchScreener(PoissonRatingModel.load(), edge_threshold=float(os.getenv("SCREEN_MIN_EDGE", "0.03")))
+    valid_matches, screen_report = screener.screen(valid_matches)
+    print(f"🔎 Pre-filtro: {screen_report['passed']}/{screen_report['screened']} pasan "
+          f"({screen_report['unrated']} sin rating), {screen_report['llm_calls_saved']} llamadas al LLM ahorradas.")
+
+    valid_matches = valid_matches[:MAX_MATCHES]
+
+    # Cache de análisis: si el partido y sus cuotas (redondeadas) no cambiaron desde la
+    # última corrida, reutilizamos el análisis sin llamar a Gemini.
+    cache = AnalysisCache(ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", str(12 * 3600))))
+    cache_keys = [match_cache_key(m) for m in valid_matches]
+    results = {}
+    to_analyze = []
+    for idx, key in enumerate(cache_keys):
+        cached = cache.get(key)
+        if cached is not None:
+            results[idx] = cached
+        else:
+            to_analyze.append(idx)
+    print(f"🗄️ Cache: {len(results)} partidos sin cambios, {len(to_analyze)} a analizar.")
+
+    # Lotes concurrentes bajo límites de requests/tokens por minuto (sin sleeps fijos).
+    # El tamaño de cada lote se ajusta al largo del prompt y solo se reintentan los partidos fallidos.
+    scheduler = LLMBatchScheduler(
+        generate=gemini_generate,
+        render_item=build_match_block,
+        build_prompt=build_batch_prompt,
+        requests_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+        tokens_per_minute=float(os.getenv("GEMINI_TPM", "1000000")),
+        max_concurrency=int(os.getenv("GEMINI_CONCURRENCY", "4"))
+    )
+    fresh, failed = scheduler.run([valid_matches[i] for i in to_analyze])
+    print(f"📦 {scheduler.stats['requests']} llamadas al modelo, {len(fresh)} partidos analizados, {len(failed)} fallidos.")
+
+    for local_idx, obj in fresh.items():
+        idx = to_analyze[local_idx]
+        obj.pop("match_index", None)
+        cache.set(cache_keys[idx], obj)
+        results[idx] = dict(obj)
+    cache.close()
+
+    # Escritura en bloque e idempotente (upsert por match, market_type, selection, match_date)
+    writer = DailyPicksWriter(supabase)
+    for idx in sorted(results):
+        writer.add(finalize_pick(results[idx], valid_matches[idx]))
+    try:
+        writer.flush()
+        print(f"   ✅ Guardado: {writer.summary()}.")
+        # El backend reconstruye /feed una sola vez con los picks nuevos
+        if writer.report["inserted"] or writer.report["updated"]:
+            notify_feed_update()
+    except Exception as save_err:
+        print(f"   ❌ Error guardando picks: {save_err}")
 
 # --- EJECUCIÓN ---
 if __name__ == "__main__":
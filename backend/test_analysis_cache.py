@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import time
+
+from ai_agents import NARRATIVE_PROMPT_VERSION, GeminiAgentService
+from analysis_cache import AnalysisCache, analysis_key
+
+def run_analysis_cache_test():
+    directory = tempfile.mkdtemp()
+    print("--- Analysis cache: TTL, LRU eviction and the narrative hit path ---")
+    failures = 0
+
+    # 1. Keys: odds jitter below the rounding hits the same entry; a new prompt version does not
+    key = analysis_key("Arsenal vs Chelsea", "h2h", [{"name": "Arsenal", "price": 2.101}], "v1")
+    same = analysis_key("Arsenal vs Chelsea", "h2h", [{"name": "Arsenal", "price": 2.099}], "v1")
+    moved = analysis_key("Arsenal vs Chelsea", "h2h", [{"name": "Arsenal", "price": 2.2}], "v1")
+    bumped = analysis_key("Arsenal vs Chelsea", "h2h", [{"name": "Arsenal", "price": 2.101}], "v2")
+    ok = key == same and len({key, moved, bumped}) == 3
+    print(f"Keys: rounding {'✅' if key == same else '❌'}, odds move / prompt version change {'✅' if ok else '❌'}")
+    failures += not ok
+
+    # 2. TTL: an entry older than ttl_seconds is a miss and is deleted
+    cache = AnalysisCache(os.path.join(directory, "ttl.sqlite3"), ttl_seconds=0.2)
+    cache.set("a", {"selection": "Over 2.5"})
+    fresh = cache.get("a")
+    time.sleep(0.3)
+    expired = cache.get("a")
+    (rows,) = cache._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()
+    ok = fresh == {"selection": "Over 2.5"} and expired is None and rows == 0 and (cache.hits, cache.misses) == (1, 1)
+    print(f"TTL: fresh hit, expired miss and deleted {'✅' if ok else '❌'}")
+    failures += not ok
+    cache.close()
+
+    # 3. LRU: past max_entries the least recently read entry goes, even if it was written last
+    path = os.path.join(directory, "lru.sqlite3")
+    cache = AnalysisCache(path, max_entries=3)
+    for name in ("a", "b", "c"):
+        cache.set(name, name)
+        time.sleep(0.01)
+    cache.get("a")  # 'b' is now the least recently used
+    time.sleep(0.01)
+    cache.set("d", "d")
+    kept = {name for name in "abcd" if cache.get(name) is not None}
+    cache.close()
+    reopened = AnalysisCache(path, max_entries=3)
+    persisted = reopened.get("d") == "d"
+    reopened.close()
+    ok = kept == {"a", "c", "d"} and persisted
+    print(f"LRU: kept {sorted(kept)} (evicted 'b'), persisted across reopen {'✅' if ok else '❌'}")
+    failures += not ok
+
+    # 4. Narrative hit path: same inputs are served from the cache, changed odds are not
+    cache = AnalysisCache(os.path.join(directory, "narrative.sqlite3"))
+    agent = GeminiAgentService("test-key", cache=cache)
+    stats = {"home_xg_last_5": "2.1", "away_xg_last_5": "0.9", "possession_avg": "58"}
+    first = agent.generate_insight_narrative("Arsenal vs Chelsea", 1.85, 0.6, 0.54, stats)
+    cache.set(analysis_key("Arsenal vs Chelsea", "narrative",
+                           {"odds": 1.85, "model_probability": 0.6, "market_probability": 0.54, "stats": stats},
+                           NARRATIVE_PROMPT_VERSION), {**first, "marker": "cached"})
+    second = agent.generate_insight_narrative("Arsenal vs Chelsea", 1.85, 0.6, 0.54, stats)
+    other = agent.generate_insight_narrative("Arsenal vs Chelsea", 1.95, 0.6, 0.54, stats)
+    ok = second.get("marker") == "cached" and "marker" not in other and "analysis_text" in first
+    ok = ok and (cache.hits, cache.misses) == (1, 2)
+    print(f"Narrative: repeat served from cache, new odds regenerated (hits {cache.hits}, misses {cache.misses}) {'✅' if ok else '❌'}")
+    failures += not ok
+    cache.close()
+
+    if failures == 0:
+        print("\n✅ SUCCESS: entries expire, the least recently read are evicted and repeats hit the cache.")
+    else:
+        print(f"\n❌ FAILURE: {failures} cache check(s) failed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_analysis_cache_test()
@@ -0,0 +1,133 @@
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backtester import REPO_RULES, Backtester, build_history, config_grid, default_grid, leaderboard
+from odds_store import OddsStore
+
+N_SEASONS = 5
+N_LEAGUES = 20
+N_TEAMS = 20  # 380 matches per league season
+SEASON_DAYS = 280
+START = datetime(2020, 8, 1, tzinfo=timezone.utc)
+
+def synthetic_history(rng: np.random.Generator):
+    """5 seasons x 20 leagues of 1X2 opportunities: model and market both noisy views of the truth."""
+    n_matches = N_SEASONS * N_LEAGUES * N_TEAMS * (N_TEAMS - 1)
+    day = np.repeat(np.arange(N_SEASONS) * 365, n_matches // N_SEASONS) + rng.integers(0, SEASON_DAYS, n_matches)
+    strength = rng.normal(0, 0.5, n_matches)
+    true = np.stack([0.46 + 0.25 * np.tanh(strength), np.full(n_matches, 0.26), 0.28 - 0.25 * np.tanh(strength)], axis=1)
+    true /= true.sum(axis=1, keepdims=True)
+    market = np.clip(true + rng.normal(0, 0.03, true.shape), 0.03, None)
+    market /= market.sum(axis=1, keepdims=True)
+    model = np.clip(true + rng.normal(0, 0.02, true.shape), 0.01, None)
+    model /= model.sum(axis=1, keepdims=True)
+    result = (rng.random(n_matches)[:, None] > np.cumsum(true, axis=1)).sum(axis=1)
+    odds = np.round(1 / (market * 1.05), 2)
+    closing = np.round(1 / ((0.5 * market + 0.5 * true) * 1.05), 2)  # the market moves towards the truth
+    return {
+        "day": np.repeat(day, 3), "odds": odds.ravel(), "closing": closing.ravel(), "p_model": model.ravel(),
+        "won": (np.arange(3)[None, :] == result[:, None]).ravel(),
+    }
+
+def reference_run(history, config, initial_bankroll=1000.0):
+    """Plain per-bet loop with the same rules, to check the vectorized engine."""
+    edge = history["p_model"] - 1 / history["odds"]
+    order = np.lexsort((-edge, history["day"]))
+    bankroll, peak, max_dd, bets = initial_bankroll, initial_bankroll, 0.0, 0
+    for day in np.unique(history["day"]):
+        todays = [i for i in order if history["day"][i] == day]
+        stakes, chosen = [], []
+        for i in todays:
+            odds, p = history["odds"][i], history["p_model"][i]
+            if edge[i] > config["min_edge"] and config["min_odds"] <= odds <= config["max_odds"]:
+                if config["top_per_day"] and len(chosen) >= config["top_per_day"]:
+                    continue
+                kelly = max(0.0, ((odds - 1) * p - (1 - p)) / (odds - 1))
+                stake = bankroll * config["fraction"] * kelly if config["staking"] == "kelly" else config["unit"] * initial_bankroll
+                chosen.append(i)
+                stakes.append(stake)
+        total = sum(stakes)
+        limit = min(config["max_exposure"], 1.0) * bankroll
+        scale = limit / total if total > limit else 1.0
+        for i, stake in zip(chosen, stakes):
+            stake *= scale
+            bets += stake > 0
+            bankroll += stake * (history["odds"][i] - 1) if history["won"][i] else -stake
+        peak = max(peak, bankroll)
+        max_dd = max(max_dd, 1 - bankroll / peak)
+    return bankroll, bets, max_dd
+
+def store_fixture():
+    """Two seasons of one small league written through OddsStore, plus the results."""
+    rng = np.random.default_rng(3)
+    store = OddsStore(tempfile.mkdtemp())
+    results, payload = [], []
+    for k in range(2 * 6 * 5):
+        kickoff = START + timedelta(days=7 * (k // 3))
+        home, away = f"T{k % 6}", f"T{(k // 6 + k + 1) % 6}"
+        if home == away:
+            continue
+        payload.append({"id": f"m{k}", "commence_time": kickoff.isoformat(), "bookmakers": [{"key": f"b{b}", "markets": [{"key": "h2h", "outcomes": [
+            {"name": home, "price": 2.2 + 0.05 * b}, {"name": "Draw", "price": 3.3}, {"name": away, "price": 3.4 - 0.05 * b}]}]} for b in range(3)]})
+        results.append({"id": f"m{k}", "commence_time": kickoff.isoformat(), "league": "test_league", "home_team": home,
+                        "away_team": away, "home_goals": int(rng.poisson(1.6)), "away_goals": int(rng.poisson(1.1))})
+    for match in payload:
+        kickoff = datetime.fromisoformat(match["commence_time"])
+        store.append_snapshot([match], ts=kickoff - timedelta(days=2))
+    store.capture_closing(now=int((START + timedelta(days=400)).timestamp()))
+    return store, results
+
+def run_backtester_test():
+    # 1. Replay stored odds and results (walk-forward ratings, entry = best price 24h out)
+    store, results = store_fixture()
+    replayed = build_history(results, store)
+    print(f"--- Replay: {len(results)} stored results -> {len(replayed['odds'])} rated opportunities "
+          f"(best entry {replayed['odds'].max():.2f}, closing lines {np.isfinite(replayed['closing']).mean():.0%}) ---")
+
+    # 2. Vectorized engine vs a per-bet loop on a small history
+    rng = np.random.default_rng(8)
+    full = synthetic_history(rng)
+    small = {k: v[: 3 * 2000] for k, v in full.items()}
+    checks = [{**c} for c in config_grid(min_edge=[0.02, 0.1], top_per_day=[0, 2], fraction=[0.25])]
+    checks += config_grid(min_edge=[0.05], staking=["flat"], unit=[0.02], max_exposure=[0.05])
+    report = Backtester(small).run(checks)
+    mismatches = 0
+    for i, config in enumerate(checks):
+        bankroll, bets, max_dd = reference_run(small, config)
+        m = report["metrics"]
+        mismatches += not (np.isclose(bankroll, m["final_bankroll"][i]) and bets == m["bets"][i] and np.isclose(max_dd, m["max_drawdown"][i]))
+    print(f"Reference loop: {len(checks) - mismatches}/{len(checks)} configurations identical")
+
+    # 3. Full grid: 5 seasons x 20 leagues, 1,000 configurations + the repo's rules
+    backtester = Backtester(full)
+    configs = default_grid() + list(REPO_RULES.values())
+    start = time.perf_counter()
+    grid = backtester.run(configs)
+    single_s = time.perf_counter() - start
+    start = time.perf_counter()
+    pooled = backtester.run(configs, workers=2)
+    pooled_s = time.perf_counter() - start
+    same = all(np.allclose(grid["metrics"][k], pooled["metrics"][k], equal_nan=True) for k in grid["metrics"])
+
+    print(f"Grid: {len(configs)} configurations x {len(full['odds'])} opportunities over {len(backtester.days)} days "
+          f"in {single_s:.1f}s (2 workers: {pooled_s:.1f}s); equity curves {grid['equity'].shape}")
+    for name, index in zip(REPO_RULES, range(len(configs) - len(REPO_RULES), len(configs))):
+        m = grid["metrics"]
+        print(f"  {name}: ROI {m['roi'][index]:+.2%}, {m['bets'][index]} bets, max DD {m['max_drawdown'][index]:.1%}, "
+              f"CLV {m['clv_mean'][index]:+.2%} (beat {m['clv_beat_rate'][index]:.0%})")
+    best = leaderboard(grid, key="roi", top=1, min_bets=500)[0]
+    print(f"  best ROI (>=500 bets): edge>{best['min_edge']} top={best['top_per_day']} kelly x{best['fraction']} -> {best['roi']:+.2%}")
+
+    ok = len(replayed["odds"]) > 0 and set(replayed["outcome"]) == {0, 1, 2} and mismatches == 0
+    ok = ok and same and single_s < 300 and grid["equity"].shape == (len(configs), len(backtester.days))
+    ok = ok and np.all(grid["metrics"]["clv_mean"][grid["metrics"]["bets"] > 0] > 0)
+    if ok:
+        print("\n✅ SUCCESS: the vectorized grid matches the reference loop and runs in minutes.")
+    else:
+        print("\n❌ FAILURE: backtest results or timing off.")
+
+if __name__ == "__main__":
+    run_backtester_test()
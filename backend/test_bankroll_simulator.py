@@ -0,0 +1,53 @@
+import math
+import sys
+
+from bankroll_simulator import BankrollSimulator
+
+N_PATHS = 200_000
+BANKROLL = 1000.0
+
+def binom_cdf(k: int, n: int, p: float) -> float:
+    return sum(math.comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(k + 1))
+
+def run_bankroll_simulator_test():
+    print(f"--- Bankroll simulator vs closed form ({N_PATHS:,} paths) ---")
+    failures = 0
+
+    # 1. Full Kelly on one even-money pick with p = 0.6: stake f = 0.2 of the bankroll each bet.
+    #    Final bankroll = B0 * 1.2^W * 0.8^(n - W), W ~ Binomial(n, p):
+    #    E[final] = B0 * (1 + f (2p - 1))^n and the median log growth is at W = median(W).
+    n, p, f = 50, 0.6, 0.2
+    kelly = BankrollSimulator([2.0], [p], policy="kelly", fraction=1.0, n_rounds=n).run(N_PATHS, seed=1)
+    mean_expected = BANKROLL * (1 + f * (2 * p - 1)) ** n
+    median_w = next(k for k in range(n + 1) if binom_cdf(k, n, p) >= 0.5)
+    median_expected = median_w * math.log(1 + f) + (n - median_w) * math.log(1 - f)
+    mean_ok = abs(kelly["mean_final_bankroll"] / mean_expected - 1) < 0.02
+    median_ok = abs(kelly["log_growth_quantiles"]["p50"] - median_expected) < 0.006
+    print(f"Kelly mean final bankroll: {kelly['mean_final_bankroll']:.0f} vs {mean_expected:.0f} {'✅' if mean_ok else '❌'}")
+    print(f"Kelly median log growth:   {kelly['log_growth_quantiles']['p50']:.4f} vs {median_expected:.4f} {'✅' if median_ok else '❌'}")
+    failures += (not mean_ok) + (not median_ok)
+
+    # 2. Flat 10% stakes on a fair coin (odds 2.0, p = 0.5): a symmetric random walk in units.
+    #    Ruin (bankroll <= 10%) = walk reaching -9 within n steps; by the reflection principle
+    #    P = P(S_n <= -9) + P(S_n < -9) = 2 * P(W <= 45) for n = 100. The game is fair, so
+    #    the mean final bankroll stays at B0.
+    n, a = 100, 9
+    flat = BankrollSimulator([2.0], [0.5], policy="flat", unit_size=0.1, n_rounds=n, ruin_level=0.1)
+    single = flat.run(N_PATHS, seed=2)
+    pooled = flat.run(N_PATHS, workers=2, seed=3)
+    ruin_expected = 2 * binom_cdf((n - a - 1) // 2, n, 0.5)
+    for name, report in (("1 worker", single), ("2 workers", pooled)):
+        ruin_ok = abs(report["risk_of_ruin"] - ruin_expected) < 0.005
+        mean_ok = abs(report["mean_final_bankroll"] / BANKROLL - 1) < 0.01
+        print(f"Flat risk of ruin ({name}): {report['risk_of_ruin']:.4f} vs {ruin_expected:.4f} {'✅' if ruin_ok else '❌'}; "
+              f"mean final {report['mean_final_bankroll']:.1f} vs {BANKROLL:.0f} {'✅' if mean_ok else '❌'}")
+        failures += (not ruin_ok) + (not mean_ok)
+
+    if failures == 0:
+        print("\n✅ SUCCESS: simulated growth and ruin match the closed-form values.")
+    else:
+        print(f"\n❌ FAILURE: {failures} check(s) off the closed-form values.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_bankroll_simulator_test()
@@ -0,0 +1,68 @@
+import time
+import sys
+
+import numpy as np
+
+from betting_logic import BettingValueEngine
+
+SIZES = [10_000, 100_000, 1_000_000]
+BANKROLL = 1000.0
+
+def make_slate(n: int, seed: int = 42):
+    """Random markets, ~1% of them with invalid odds (<= 1.0)."""
+    rng = np.random.default_rng(seed)
+    odds = rng.uniform(1.05, 8.0, n)
+    odds[rng.random(n) < 0.01] = rng.choice([1.0, 0.5, 0.0])
+    p_model = np.clip(1 / np.maximum(odds, 1.01) + rng.normal(0, 0.05, n), 0.01, 0.99)
+    return odds, p_model
+
+def score_scalar(engine: BettingValueEngine, odds, p_model):
+    edges, evs, stakes, alerts = [], [], [], []
+    for o, p in zip(odds.tolist(), p_model.tolist()):
+        try:
+            p_implied = engine.calculate_implied_probability(o)
+        except ValueError:
+            edges.append(np.nan); evs.append(np.nan); stakes.append(0.0); alerts.append(False)
+            continue
+        opp = engine.evaluate_opportunity(p, p_implied)
+        edges.append(opp["edge"])
+        evs.append(engine.calculate_ev(p, o))
+        stakes.append(engine.calculate_kelly_stake(BANKROLL, p, o))
+        alerts.append(opp["is_elite_alert"])
+    return np.array(edges), np.array(evs), np.array(stakes), np.array(alerts)
+
+def check_parity(engine: BettingValueEngine) -> bool:
+    odds, p_model = make_slate(10_000)
+    edges, evs, stakes, alerts = score_scalar(engine, odds, p_model)
+    batch = engine.evaluate_batch(odds, p_model, bankroll=BANKROLL)
+
+    ok = (
+        np.allclose(batch["edge"], edges, equal_nan=True)
+        and np.allclose(batch["ev"], evs, equal_nan=True)
+        and np.allclose(batch["kelly_stake"], stakes)
+        and np.array_equal(batch["is_elite_alert"], alerts)
+    )
+    print(f"Parity scalar vs batch (10k rows): {'✅ OK' if ok else '❌ MISMATCH'}")
+    return ok
+
+def run_benchmark():
+    engine = BettingValueEngine()
+    print("--- BettingValueEngine: scalar loop vs batch mode ---")
+    if not check_parity(engine):
+        sys.exit(1)
+
+    for n in SIZES:
+        odds, p_model = make_slate(n)
+
+        start = time.perf_counter()
+        score_scalar(engine, odds, p_model)
+        t_scalar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.evaluate_batch(odds, p_model, bankroll=BANKROLL)
+        t_batch = time.perf_counter() - start
+
+        print(f"{n:>9,} rows | scalar {t_scalar * 1000:9.1f} ms | batch {t_batch * 1000:7.2f} ms | x{t_scalar / t_batch:,.0f}")
+
+if __name__ == "__main__":
+    run_benchmark()
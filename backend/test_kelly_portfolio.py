@@ -0,0 +1,56 @@
+import time
+import sys
+
+import numpy as np
+
+from betting_logic import BettingValueEngine
+from kelly_portfolio import KellyPortfolioOptimizer
+
+BANKROLL = 1000.0
+
+def make_slate(n_matches: int = 25, seed: int = 1):
+    """Two picks per match (e.g. home win + draw), small positive edge on each."""
+    rng = np.random.default_rng(seed)
+    odds = rng.uniform(1.8, 4.5, n_matches * 2)
+    p_model = 1 / odds + rng.uniform(0.0, 0.06, odds.shape[0])
+    groups = np.repeat([f"match_{i}" for i in range(n_matches)], 2)
+    return odds, p_model, groups
+
+def run_checks():
+    print("--- Multi-bet Kelly portfolio optimizer ---")
+    failures = 0
+
+    # 1. A single uncapped pick must match the per-pick Kelly stake
+    single = KellyPortfolioOptimizer(max_exposure=0.5).optimize([2.2], [0.5], bankroll=BANKROLL)
+    expected = BettingValueEngine.calculate_kelly_stake(BANKROLL, 0.5, 2.2)
+    ok = abs(single["stakes"][0] - expected) < 0.01 * expected
+    print(f"Single pick vs calculate_kelly_stake: {single['stakes'][0]:.2f} vs {expected:.2f} {'✅' if ok else '❌'}")
+    failures += not ok
+
+    # 2. A 50-bet slate respects the total and per-match caps
+    odds, p_model, groups = make_slate()
+    independent = BettingValueEngine.calculate_kelly_stake_batch(BANKROLL, p_model, odds).sum()
+    optimizer = KellyPortfolioOptimizer(max_exposure=0.05, max_group_exposure=0.01)
+    result = optimizer.optimize(odds, p_model, groups=groups, bankroll=BANKROLL)
+
+    per_match = {}
+    for g, f in zip(groups, result["fractions"]):
+        per_match[g] = per_match.get(g, 0.0) + f
+    ok = result["total_exposure"] <= 0.05 + 1e-9 and max(per_match.values()) <= 0.01 + 1e-9
+    print(f"Independent Kelly exposure: ${independent:.2f} | Portfolio exposure: ${result['stakes'].sum():.2f} {'✅' if ok else '❌'}")
+    failures += not ok
+
+    # 3. Timing
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        optimizer.optimize(odds, p_model, groups=groups)
+    elapsed = (time.perf_counter() - start) / runs * 1000
+    print(f"50-bet slate solved in {elapsed:.1f} ms ({result['iterations']} iterations)")
+
+    if failures:
+        sys.exit(1)
+    print("\n✅ SUCCESS: Portfolio stakes within limits.")
+
+if __name__ == "__main__":
+    run_checks()
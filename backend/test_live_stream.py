@@ -0,0 +1,97 @@
+import asyncio
+import copy
+import json
+import random
+
+from live_stream import LiveStreamHub, sse_format
+
+N_FIXTURES = 40
+N_SUBSCRIBERS = 200
+N_POLLS = 30
+
+def make_fixture(i: int) -> dict:
+    return {
+        "id": 5000 + i,
+        "name": f"Home {i} vs Away {i}",
+        "state_id": 2,
+        "minute": 1,
+        "participants": [
+            {"id": 1, "name": f"Home {i}", "meta": {"location": "home"}},
+            {"id": 2, "name": f"Away {i}", "meta": {"location": "away"}},
+        ],
+        "scores": [
+            {"description": "CURRENT", "score": {"goals": 0, "participant": "home"}},
+            {"description": "CURRENT", "score": {"goals": 0, "participant": "away"}},
+        ],
+        "odds": [
+            {"market_id": 1, "label": label, "value": value}
+            for label, value in (("Home", "2.10"), ("Draw", "3.30"), ("Away", "3.60"))
+        ],
+    }
+
+class FakeLivescores:
+    """Simulated upstream: minutes tick, a few goals and odds moves per poll."""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.fixtures = [make_fixture(i) for i in range(N_FIXTURES)]
+        self.calls = 0
+        self.last_bytes = 0
+
+    def __call__(self) -> dict:
+        self.calls += 1
+        for fixture in self.rng.sample(self.fixtures, 5):
+            fixture["minute"] += 1
+        for fixture in self.rng.sample(self.fixtures, 2):
+            fixture["scores"][self.rng.randint(0, 1)]["score"]["goals"] += 1
+            fixture["odds"][0]["value"] = f"{self.rng.uniform(1.5, 4.0):.2f}"
+        payload = {"data": copy.deepcopy(self.fixtures)}
+        self.last_bytes = len(json.dumps(payload).encode())
+        return payload
+
+async def simulate():
+    upstream = FakeLivescores()
+    hub = LiveStreamHub(upstream, interval=0.0)
+    await hub.poll_once()  # warm snapshot
+
+    queues = [hub.subscribe() for _ in range(N_SUBSCRIBERS)]
+    client = {fixture["id"]: copy.deepcopy(fixture) for fixture in queues[0].get_nowait()["fixtures"]}
+    for queue in queues[1:]:
+        queue.get_nowait()
+
+    diff_bytes = 0
+    full_bytes = 0
+    for _ in range(N_POLLS):
+        await hub.poll_once()
+        full_bytes += upstream.last_bytes  # what a polling client would download
+        while not queues[0].empty():
+            message = queues[0].get_nowait()
+            diff_bytes += len(sse_format(message).encode())
+            for change in message["changes"]:
+                if change["type"] == "update":
+                    state = client[change["id"]]
+                    for field, value in change.items():
+                        if field == "odds":
+                            state["odds"].update(value)
+                        elif field not in ("type", "id"):
+                            state[field] = value
+
+    delivered = all(q.qsize() == queues[1].qsize() for q in queues[1:])
+    return upstream.calls, client, hub.snapshot, diff_bytes, full_bytes, delivered
+
+def run_live_stream_test():
+    calls, client, server_snapshot, diff_bytes, full_bytes, delivered = asyncio.run(simulate())
+
+    print(f"--- Live stream: {N_SUBSCRIBERS} subscribers, {N_POLLS} polls, {N_FIXTURES} live fixtures ---")
+    print(f"Upstream calls: {calls}")
+    print(f"Per client: {diff_bytes / 1024:.1f} KB of diffs vs {full_bytes / 1024:.1f} KB polling full payloads")
+
+    ok = calls == N_POLLS + 1 and delivered and client == server_snapshot
+    ok = ok and diff_bytes * 5 < full_bytes
+    if ok:
+        print("\n✅ SUCCESS: one upstream call per tick, clients rebuild the state from diffs.")
+    else:
+        print("\n❌ FAILURE: diffs did not reproduce the live state.")
+
+if __name__ == "__main__":
+    run_live_stream_test()
@@ -0,0 +1,84 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+
+from llm_scheduler import LLMBatchScheduler, RateLimitError
+
+class FakeModelClient:
+    """
+    Local stand-in for Gemini: fixed latency per call, a 429 on a share of calls, and
+    occasionally drops one match from an otherwise good response.
+    """
+
+    def __init__(self, latency: float = 0.3, rate_limit_ratio: float = 0.2, drop_ratio: float = 0.2, seed: int = 3):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.drop_ratio = drop_ratio
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.max_parallel = 0
+        self._active = 0
+
+    def generate(self, prompt: str) -> str:
+        with self.lock:
+            self.calls += 1
+            self._active += 1
+            self.max_parallel = max(self.max_parallel, self._active)
+            throttle = self.rng.random() < self.rate_limit_ratio
+            drop = self.rng.random() < self.drop_ratio
+        try:
+            time.sleep(self.latency)
+            if throttle:
+                raise RateLimitError("429 RESOURCE_EXHAUSTED", retry_after=0.1)
+
+            indexes = [int(i) for i in re.findall(r"PARTIDO #(\d+):", prompt)]
+            if drop and len(indexes) > 1:
+                indexes.pop()
+            return json.dumps([{"match_index": i, "selection": f"pick {i}"} for i in indexes])
+        finally:
+            with self.lock:
+                self._active -= 1
+
+def render_item(idx, match):
+    return f"\nPARTIDO #{idx}:\nEvento: {match['home_team']} vs {match['away_team']}\n{match['notes']}\n"
+
+def build_prompt(matches_text):
+    return f"Analiza estos partidos:\n{matches_text}\nResponde con un JSON ARRAY."
+
+def run_simulation():
+    rng = random.Random(7)
+    # Mixed prompt lengths so batch sizes adapt
+    matches = [
+        {"home_team": f"Home {i}", "away_team": f"Away {i}", "notes": "x" * rng.choice([100, 800, 3000])}
+        for i in range(30)
+    ]
+    matches.insert(11, {"home_team": "Malformed"})  # no 'notes': render_item raises KeyError
+    fake = FakeModelClient()
+    scheduler = LLMBatchScheduler(
+        generate=fake.generate, render_item=render_item, build_prompt=build_prompt,
+        requests_per_minute=600, max_concurrency=4, max_prompt_tokens=1500, backoff_base=0.1, max_attempts=6
+    )
+
+    print("--- LLM batch scheduler against fake model client ---")
+    start = time.perf_counter()
+    results, failed = scheduler.run(matches)
+    elapsed = time.perf_counter() - start
+
+    print(f"Analyzed: {len(results)}/{len(matches)} | failed: {len(failed)} | calls: {fake.calls} | max parallel: {fake.max_parallel}")
+    print(f"429s: {scheduler.stats['rate_limited']} | items retried: {scheduler.stats['retried_items']} | elapsed: {elapsed:.2f}s")
+    print(f"Old loop (6 batches of 5 + 5s sleep each) would need >= {6 * (fake.latency + 5):.0f}s")
+
+    ok = len(results) + len(failed) == len(matches) and failed == [11] and fake.max_parallel > 1
+    ok = ok and all(results[i]["selection"].startswith("pick") for i in results)
+    if ok:
+        print("\n✅ SUCCESS: every match analyzed despite 429s and dropped items; the malformed one failed alone.")
+    else:
+        print("\n❌ FAILURE: scheduler lost matches.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_simulation()
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+from market_consensus import MarketConsensusEngine
+
+N_MATCHES = 400
+N_BOOKS = 40
+
+def make_slate(rng: np.random.Generator):
+    """Odds API style matches: true probabilities, per-book margins and noise, some gaps."""
+    matches, truths = [], []
+    for i in range(N_MATCHES):
+        p = rng.dirichlet([4, 2.5, 3])
+        truths.append(p)
+        bookmakers = []
+        for b in range(N_BOOKS):
+            if rng.random() < 0.1:
+                continue  # book does not cover this match
+            quoted = np.clip(p * (1 + rng.normal(0, 0.02, 3)), 0.01, None)
+            prices = 1 / (quoted * rng.uniform(1.03, 1.08))
+            outcomes = [
+                {"name": f"Home {i}", "price": round(float(prices[0]), 2)},
+                {"name": "Draw", "price": round(float(prices[1]), 2)},
+                {"name": f"Away {i}", "price": round(float(prices[2]), 2)},
+            ]
+            if rng.random() < 0.05:
+                outcomes.pop(1)  # incomplete market: only counts for best price
+            bookmakers.append({"key": f"book{b}", "markets": [{"key": "h2h", "outcomes": outcomes}]})
+        matches.append({"home_team": f"Home {i}", "away_team": f"Away {i}", "bookmakers": bookmakers})
+    return matches, np.array(truths)
+
+def loop_reference(match):
+    """Per-outcome best price and consensus with plain dict loops, for comparison."""
+    names = [match["home_team"], "Draw", match["away_team"]]
+    best = [max((o["price"] for bk in match["bookmakers"] for o in bk["markets"][0]["outcomes"] if o["name"] == n), default=None) for n in names]
+    fair = []
+    for bk in match["bookmakers"]:
+        prices = {o["name"]: o["price"] for o in bk["markets"][0]["outcomes"]}
+        if all(n in prices for n in names):
+            total = sum(1 / prices[n] for n in names)
+            fair.append([(1 / prices[n]) / total for n in names])
+    return best, np.mean(fair, axis=0)
+
+def run_consensus_test():
+    rng = np.random.default_rng(11)
+    matches, truths = make_slate(rng)
+    engine = MarketConsensusEngine()
+
+    start = time.perf_counter()
+    prices, books = engine.price_tensor(matches)
+    parse_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    result = engine.aggregate_prices(prices)
+    agg_ms = (time.perf_counter() - start) * 1000
+    full = engine.aggregate(matches)
+
+    print(f"--- Market consensus: {N_MATCHES} matches x {len(books)} books ---")
+    print(f"Parse to array: {parse_ms:.1f} ms, aggregation: {agg_ms:.2f} ms")
+
+    mismatches = 0
+    for i in (0, 17, 123, N_MATCHES - 1):
+        best, fair = loop_reference(matches[i])
+        mismatches += int(not np.allclose(result["best_price"][i], best))
+        mismatches += int(not np.allclose(result["consensus_prob"][i], fair))
+
+    error = np.abs(result["consensus_prob"] - truths).mean()
+    summary = engine.summaries(matches[:1], full)[0]
+    print(f"Mean |consensus - true prob|: {error:.4f}  mean margin: {np.nanmean(result['margin']):.3f}")
+    print(f"Match 0: {summary['outcomes'][0]}")
+
+    ok = mismatches == 0 and error < 0.01 and agg_ms < 50
+    ok = ok and np.allclose(np.nansum(result["consensus_prob"], axis=1), 1.0)
+    ok = ok and full["is_bet"].shape == (N_MATCHES, 3)
+    if ok:
+        print("\n✅ SUCCESS: vectorized best price and vig-free consensus match the loop reference.")
+    else:
+        print("\n❌ FAILURE: consensus engine disagrees with the loop reference.")
+
+if __name__ == "__main__":
+    run_consensus_test()
@@ -0,0 +1,77 @@
+import sys
+
+import numpy as np
+
+from market_consensus import MarketConsensusEngine
+from match_screener import MatchScreener
+from rating_model import PoissonRatingModel
+
+N_TEAMS = 20
+N_SLATE = 60
+
+def simulate_season(rng: np.random.Generator, strength: np.ndarray):
+    """Double round robin with Poisson goals driven by team strength, as finished results."""
+    results = []
+    for h in range(N_TEAMS):
+        for a in range(N_TEAMS):
+            if h != a:
+                hg = rng.poisson(np.exp(0.25 + strength[h] - strength[a]))
+                ag = rng.poisson(np.exp(strength[a] - strength[h]))
+                results.append({"id": f"r{h}-{a}", "home_team": f"Team {h}", "away_team": f"Team {a}",
+                                "home_goals": int(hg), "away_goals": int(ag)})
+    return results
+
+def make_slate(rng: np.random.Generator, model: PoissonRatingModel):
+    """Markets priced near the model's view; a third of them mispriced by a wide margin."""
+    pairs = [tuple(rng.choice(N_TEAMS, 2, replace=False)) for _ in range(N_SLATE)]
+    probs, _ = model.predict_1x2([f"Team {h}" for h, _ in pairs], [f"Team {a}" for _, a in pairs])
+    matches, mispriced = [], []
+    for i, (h, a) in enumerate(pairs):
+        p = probs[i].copy()
+        if i % 3 == 0:
+            p = p + np.array([-0.06, 0.0, 0.06])  # market undervalues the home side
+            mispriced.append(i)
+        prices = 1 / (p * 1.05)
+        matches.append({
+            "home_team": f"Team {h}", "away_team": f"Team {a}",
+            "bookmakers": [{"key": "book", "markets": [{"key": "h2h", "outcomes": [
+                {"name": f"Team {h}", "price": round(float(prices[0]), 2)},
+                {"name": "Draw", "price": round(float(prices[1]), 2)},
+                {"name": f"Team {a}", "price": round(float(prices[2]), 2)},
+            ]}]}]
+        })
+    return matches, mispriced
+
+def run_screener_test():
+    rng = np.random.default_rng(5)
+    # The ratings the agent feeds every day: finished results through update_many
+    model = PoissonRatingModel()
+    learned = model.update_many(simulate_season(rng, rng.normal(0, 0.35, N_TEAMS)))
+
+    matches, mispriced = make_slate(rng, model)
+    engine = MarketConsensusEngine()
+    for m, summary in zip(matches, engine.summaries(matches, engine.aggregate(matches))):
+        m["market_consensus"] = summary
+    matches.append({  # promoted team without history: passes through unrated
+        "home_team": "Newcomer", "away_team": "Team 0",
+        "market_consensus": {"books": 1, "margin": 0.05, "outcomes": []}
+    })
+
+    screener = MatchScreener(model, edge_threshold=0.03)
+    selected, report = screener.screen(matches)
+    print(f"--- Pre-filter: {N_SLATE} rated matches + 1 unrated ({learned} results learned) ---")
+    print(f"Report: {report}")
+    print(f"Top pick: {selected[0]['home_team']} vs {selected[0]['away_team']} -> {selected[0]['screen']}")
+
+    selected_ids = {id(m) for m in selected}
+    caught = sum(id(matches[i]) in selected_ids for i in mispriced)
+    ok = caught == len(mispriced) and report["passed"] == len(mispriced) + 1
+    ok = ok and report["unrated"] == 1 and selected[-1]["home_team"] == "Newcomer" and report["llm_calls_saved"] > 0
+    if ok:
+        print("\n✅ SUCCESS: only matches with a screened edge (plus unrated ones) reach the LLM.")
+    else:
+        print("\n❌ FAILURE: unexpected screening result.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_screener_test()
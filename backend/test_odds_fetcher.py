@@ -0,0 +1,94 @@
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from odds_fetcher import OddsIngestionClient
+
+N_LEAGUES = 50
+SLOWEST_DELAY = 0.5
+
+# Stub of The Odds API: per-league latency, and a 429 on the first hit of every 10th league
+LEAGUE_DELAYS = {f"soccer_stub_{i}": random.uniform(0.05, 0.35) for i in range(N_LEAGUES)}
+LEAGUE_DELAYS["soccer_stub_0"] = SLOWEST_DELAY
+THROTTLED = {f"soccer_stub_{i}" for i in range(0, N_LEAGUES, 10)}
+hits = {}
+hits_lock = threading.Lock()
+
+class StubOddsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        league = self.path.split("/sports/")[1].split("/")[0]
+        with hits_lock:
+            hits[league] = hits.get(league, 0) + 1
+            first_hit = hits[league] == 1
+
+        if league in THROTTLED and first_hit:
+            self.send_response(429)
+            self.send_header("Retry-After", "0.05")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(LEAGUE_DELAYS.get(league, 0.1))
+        body = json.dumps([{
+            "home_team": "Home", "away_team": "Away", "sport_title": league,
+            "commence_time": "2099-01-01T00:00:00Z", "bookmakers": []
+        }]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128  # default backlog of 5 would drop concurrent connects
+    daemon_threads = True
+
+def run_benchmark():
+    server = StubServer(("127.0.0.1", 0), StubOddsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v4"
+    leagues = list(LEAGUE_DELAYS)
+
+    print(f"--- Odds ingestion benchmark: {N_LEAGUES} leagues against local stub ---")
+    print(f"Sequential estimate (sum of latencies): {sum(LEAGUE_DELAYS.values()):.2f}s")
+    print(f"Slowest league: {SLOWEST_DELAY:.2f}s")
+
+    client = OddsIngestionClient("stub-key", base_url=base_url, max_per_host=N_LEAGUES, backoff_base=0.05)
+    start = time.perf_counter()
+    results = client.fetch_all(leagues)
+    elapsed = time.perf_counter() - start
+    client.close()
+    server.shutdown()
+
+    # Retry-After is capped: a hostile header cannot stall ingestion, a bad one falls back to backoff
+    clamped = OddsIngestionClient("stub-key", backoff_base=0.05, max_backoff=2.0)
+    delays = {}
+    for header in ("0.05", "86400", "inf", "-5", "soon"):
+        response = requests.Response()
+        response.headers["Retry-After"] = header
+        delays[header] = clamped._backoff_delay(0, response)
+    clamped.close()
+    clamp_ok = delays["0.05"] == 0.05 and delays["86400"] == 2.0
+    clamp_ok = clamp_ok and all(0.025 <= delays[h] <= 0.05 for h in ("inf", "-5", "soon"))
+    print(f"Retry-After delays: {delays} {'✅' if clamp_ok else '❌'}")
+
+    failed = [l for l, r in results.items() if isinstance(r, Exception)]
+    retried = sum(1 for l in THROTTLED if hits.get(l, 0) > 1)
+    print(f"Concurrent fetch: {elapsed:.2f}s | leagues ok: {N_LEAGUES - len(failed)} | 429 retried: {retried}/{len(THROTTLED)}")
+
+    if not failed and elapsed < SLOWEST_DELAY * 2 and clamp_ok:
+        print("\n✅ SUCCESS: 50 leagues finished in about the time of the slowest one.")
+    else:
+        print("\n❌ FAILURE: ingestion did not overlap as expected, or Retry-After was not clamped.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_benchmark()
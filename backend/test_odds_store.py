@@ -0,0 +1,71 @@
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from odds_store import OddsStore
+
+N_FIXTURES = 120
+N_BOOKS = 12
+N_SNAPSHOTS = 96  # every 30 minutes over two days
+START = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+def make_payload(snapshot: int, rng: np.random.Generator):
+    """Odds API style payload; fixture i kicks off after snapshot 40 + i % 50."""
+    matches = []
+    for i in range(N_FIXTURES):
+        kickoff = START + timedelta(minutes=30 * (40 + i % 50))
+        if START + timedelta(minutes=30 * snapshot) > kickoff:
+            continue  # started matches disappear from the pre-match feed
+        matches.append({
+            "id": f"fx{i}",
+            "commence_time": kickoff.isoformat().replace("+00:00", "Z"),
+            "bookmakers": [{
+                "key": f"book{b}",
+                "markets": [{"key": "h2h", "outcomes": [
+                    {"name": "Home", "price": round(2.0 + 0.01 * snapshot + 0.02 * b, 2)},
+                    {"name": "Draw", "price": round(3.2 + rng.normal(0, 0.05), 2)},
+                    {"name": "Away", "price": round(3.8 - 0.01 * snapshot, 2)},
+                ]}]
+            } for b in range(N_BOOKS)]
+        })
+    return matches
+
+def run_store_test():
+    rng = np.random.default_rng(3)
+    store = OddsStore(tempfile.mkdtemp(), segment_records=50_000)
+
+    start = time.perf_counter()
+    for snapshot in range(N_SNAPSHOTS):
+        store.append_snapshot(make_payload(snapshot, rng), ts=START + timedelta(minutes=30 * snapshot))
+    write_time = time.perf_counter() - start
+    stats = store.stats()
+    print(f"--- Odds store: {stats['rows']} rows in {stats['segments']} segments, written in {write_time:.2f}s ---")
+
+    # Line movement: fx0 kicks off at snapshot 40, so 41 snapshots (0..40)
+    start = time.perf_counter()
+    series = store.line_movement("fx0", market="h2h", outcome="Home", book="book3")
+    query_ms = (time.perf_counter() - start) * 1000
+    home = series[("h2h", "Home", "book3")]
+    print(f"fx0 Home @ book3: {len(home['price'])} points, {home['price'][0]:.2f} -> {home['price'][-1]:.2f} ({query_ms:.1f} ms)")
+
+    # Closing line = last price at or before kickoff, for every fixture that started
+    reopened = OddsStore(store.path)  # closing lines and index survive a restart
+    closing = reopened.closing_line("fx0")
+    expected_close = round(2.0 + 0.01 * 40 + 0.02 * 3, 2)
+    best_away = reopened.closing_price("fx0", "h2h", "Away")
+    print(f"fx0 closing Home @ book3: {closing[('h2h', 'Home', 'book3')]:.2f} (expected {expected_close}), best Away {best_away}")
+    print(f"Store stats after reopen: {reopened.stats()}")
+
+    ok = len(home["price"]) == 41 and np.all(np.diff(home["ts"]) > 0)
+    ok = ok and abs(closing[("h2h", "Home", "book3")] - expected_close) < 1e-4
+    ok = ok and len(closing) == 3 * N_BOOKS and stats["segments"] > 1
+    ok = ok and stats["closed_fixtures"] == N_FIXTURES and reopened.closing_line("fx119") != {}
+    if ok:
+        print("\n✅ SUCCESS: line movement queries and closing lines captured at kickoff.")
+    else:
+        print("\n❌ FAILURE: odds store returned unexpected data.")
+
+if __name__ == "__main__":
+    run_store_test()
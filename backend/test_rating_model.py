@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from rating_model import PoissonRatingModel, results_from_scores
+
+N_TEAMS = 20
+N_SEASONS = 3
+N_SLATE = 2000
+
+def season(rng: np.random.Generator, attack: np.ndarray, defence: np.ndarray, start_id: int):
+    """Double round robin with true Poisson goal rates."""
+    results = []
+    for h in range(N_TEAMS):
+        for a in range(N_TEAMS):
+            if h == a:
+                continue
+            hg = rng.poisson(np.exp(0.3 + 0.25 + attack[h] + defence[a]))
+            ag = rng.poisson(np.exp(0.3 + attack[a] + defence[h]))
+            results.append({"id": f"r{start_id + len(results)}", "home_team": f"T{h}", "away_team": f"T{a}",
+                            "home_goals": int(hg), "away_goals": int(ag)})
+    rng.shuffle(results)
+    return results
+
+def log_loss(probs: np.ndarray, results) -> float:
+    outcome = np.array([0 if r["home_goals"] > r["away_goals"] else 1 if r["home_goals"] == r["away_goals"] else 2 for r in results])
+    return float(-np.log(probs[np.arange(len(results)), outcome]).mean())
+
+def run_rating_test():
+    rng = np.random.default_rng(21)
+    attack, defence = rng.normal(0, 0.3, N_TEAMS), rng.normal(0, 0.3, N_TEAMS)
+    history = [season(rng, attack, defence, i * 1000) for i in range(N_SEASONS)]
+    holdout = season(rng, attack, defence, 99_000)
+
+    model = PoissonRatingModel()
+    start = time.perf_counter()
+    for results in history:
+        model.update_many(results)  # incremental: one pass per new batch, no refit
+    learn_ms = (time.perf_counter() - start) * 1000
+    replayed = model.update_many(history[-1])  # same results again (e.g. re-fetched scores)
+
+    homes = [r["home_team"] for r in holdout]
+    aways = [r["away_team"] for r in holdout]
+    model_loss = log_loss(model.predict_1x2(homes, aways)[0], holdout)
+    base_rates = np.array([0.45, 0.27, 0.28])
+    naive_loss = log_loss(np.tile(base_rates, (len(holdout), 1)), holdout)
+
+    slate_h = [f"T{i % N_TEAMS}" for i in range(N_SLATE)]
+    slate_a = [f"T{(i + 7) % N_TEAMS}" for i in range(N_SLATE)]
+    start = time.perf_counter()
+    prediction = model.predict(slate_h, slate_a)
+    predict_ms = (time.perf_counter() - start) * 1000
+
+    path = os.path.join(tempfile.mkdtemp(), "model.npz")
+    model.save(path)
+    start = time.perf_counter()
+    loaded = PoissonRatingModel.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    same = np.allclose(loaded.predict(slate_h, slate_a)["1x2"], prediction["1x2"])
+
+    scores_payload = [{"id": "s1", "completed": True, "home_team": "T1", "away_team": "T2", "commence_time": "2025-01-01",
+                       "scores": [{"name": "T1", "score": "2"}, {"name": "T2", "score": "1"}]},
+                      {"id": "s2", "completed": False, "home_team": "T3", "away_team": "T4", "scores": None}]
+    parsed = results_from_scores(scores_payload)
+
+    print(f"--- Poisson ratings: {N_TEAMS} teams, {N_SEASONS} seasons learned in {learn_ms:.0f} ms ---")
+    print(f"Holdout log loss: model {model_loss:.4f} vs base rates {naive_loss:.4f}")
+    print(f"Slate of {N_SLATE}: 1X2 + O/U + BTTS in {predict_ms:.1f} ms; state {os.path.getsize(path) / 1024:.1f} KB, loaded in {load_ms:.1f} ms")
+    print(f"Sample: 1X2 {np.round(prediction['1x2'][0], 3)}, over 2.5 {prediction['over'][2.5][0]:.3f}, BTTS {prediction['btts'][0]:.3f}")
+
+    ok = model_loss < naive_loss and replayed == 0 and same and len(parsed) == 1
+    ok = ok and np.allclose(prediction["1x2"].sum(axis=1), 1.0) and prediction["known"].all()
+    if ok:
+        print("\n✅ SUCCESS: incremental ratings beat base rates and reload instantly.")
+    else:
+        print("\n❌ FAILURE: rating model did not learn or persist correctly.")
+
+if __name__ == "__main__":
+    run_rating_test()
@@ -2,6 +2,11 @@ import requests
 import uuid
 import time
 import sys
+import random
+from decimal import Decimal
+
+from betting_logic import InsuranceLogic
+from settlement_engine import BatchSettlementEngine
 
 def run_simulation():
     # Random User UUID for testing
@@ -45,7 +50,60 @@ def run_simulation():
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
 
+def run_batch_simulation(n_bets: int = 5000, n_users: int = 800):
+    """Offline: settles a whole fixture with BatchSettlementEngine and checks it against the per-bet path."""
+    print(f"--- Batch Settlement Simulation ({n_bets} bets, {n_users} users) ---")
+    rng = random.Random(11)
+    users = [str(uuid.uuid4()) for _ in range(n_users)]
+    fixture = {"fixture_id": "demo-1", "home_team": "Rangers", "away_team": "Ludogorets",
+               "home_goals": 0, "away_goals": 1, "status": "FT"}
+    markets = {"1X2": ["1", "X", "2"], "Over/Under": ["Over 2.5", "Under 2.5"], "BTTS": ["Yes", "No"]}
+    bets = []
+    for i in range(n_bets):
+        market = rng.choice(list(markets))
+        bets.append({
+            "bet_id": i,
+            "user_id": rng.choice(users),
+            "market_type": market,
+            "selection": rng.choice(markets[market]),
+            "bet_amount": rng.choice([5, 10, 15, 25, 50]),
+            "odds": 1.9,
+            "is_daily_gold_pick": rng.random() < 0.3
+        })
+
+    start = time.perf_counter()
+    result = BatchSettlementEngine().settle_fixture(fixture, bets)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    # Reference: per-bet InsuranceLogic on the statuses decided by the engine
+    expected = Decimal("0")
+    for bet, settled in zip(bets, result["bets"]):
+        refund = InsuranceLogic.process_bet_result(Decimal(bet["bet_amount"]), settled["status"], bet["is_daily_gold_pick"])
+        expected += refund or 0
+    batched = sum(d["amount"] for d in result["wallet_deltas"])
+
+    print(f"Summary: {result['summary']}")
+    print(f"Wallet writes: {len(result['wallet_deltas'])} (instead of {sum(1 for b in result['bets'] if b['refund'])} refund calls)")
+    print(f"Settled in {elapsed:.1f} ms")
+    # The engine has no copy of the rule: a new cap in InsuranceLogic applies straight away
+    cap = InsuranceLogic.INSURANCE_CAP
+    InsuranceLogic.INSURANCE_CAP = 7.50
+    try:
+        capped = BatchSettlementEngine().settle_fixture(fixture, bets)
+    finally:
+        InsuranceLogic.INSURANCE_CAP = cap
+    follows_cap = max(b["refund"] or 0 for b in capped["bets"]) == Decimal("7.50")
+    print(f"Largest refund with a $7.50 cap: ${max(b['refund'] or 0 for b in capped['bets'])} {'✅' if follows_cap else '❌'}")
+
+    if batched == expected == result["summary"]["refund_total"] and follows_cap:
+        print(f"\n✅ SUCCESS: batch refunds (${batched}) match the per-bet InsuranceLogic path.")
+        return True
+    print(f"\n❌ FAILURE: batch ${batched} vs per-bet ${expected}.")
+    return False
+
 if __name__ == "__main__":
+    if "--batch" in sys.argv:
+        sys.exit(0 if run_batch_simulation() else 1)
     # Small delay to ensure server has time to start if run consecutively
     time.sleep(2)
     run_simulation()
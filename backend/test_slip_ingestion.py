@@ -0,0 +1,245 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+from slip_ingestion import SLIP_MAX_SIDE, THUMB_SIZE, PickIndex, SlipIngestionPipeline, UploadLimitError, ndjson_uploads
+
+N_SLIPS = 40
+BOOKMAKERS = ["Bet365", "Codere", "Betano"]
+CALL_LATENCY = 0.2  # per extraction request, as seen from the backend
+
+DAILY_PICKS = [
+    {"id": "p1", "match": "Atlético Madrid vs Real Betis", "market_type": "1X2", "selection": "Atlético Madrid", "odds": 1.72},
+    {"id": "p2", "match": "Atlético Madrid vs Real Betis", "market_type": "Over/Under", "selection": "Under 2.5", "odds": 1.9},
+    {"id": "p3", "match": "Arsenal vs Chelsea", "market_type": "BTTS", "selection": "Yes", "odds": 1.8, "is_gold": True},
+    {"id": "p4", "match": "Bayern München vs Borussia Dortmund", "market_type": "Over/Under", "selection": "Over 2.5", "odds": 1.55},
+    {"id": "p5", "match": "Inter vs Juventus", "market_type": "1X2", "selection": "Inter", "odds": 2.05},
+]
+
+# How the same fixtures read on a slip, and what each selection should match
+SLIP_SELECTIONS = [
+    ({"match": "ATLETICO MADRID - Real Betis", "market": "Match Winner", "selection": "Atletico Madrid"}, "p1", True),
+    ({"match": "Real Betis v Atlético Madrid", "market": "Total Goals", "selection": "under 2.5"}, "p2", True),
+    ({"match": "Arsenal FC v Chelsea FC", "market": "Both Teams To Score", "selection": "Yes"}, "p3", True),
+    ({"match": "Bayern Munchen vs Borussia Dortmund", "market": "Total Goals", "selection": "Under 2.5"}, "p4", False),
+    ({"match": None, "market": "1X2", "selection": "INTER"}, "p5", True),
+    ({"match": "Boca Juniors vs River Plate", "market": "1X2", "selection": "Boca Juniors"}, None, False),
+]
+
+def draw_slip(slip_id: int, rng: random.Random):
+    """A bookmaker-style slip: same template for every slip of a bookmaker, different lines."""
+    bookmaker = BOOKMAKERS[slip_id % len(BOOKMAKERS)]
+    chosen = rng.sample(range(len(SLIP_SELECTIONS)), rng.randint(1, 3))
+    selections = [{**SLIP_SELECTIONS[i][0], "odds": round(rng.uniform(1.4, 3.5), 2)} for i in chosen]
+    stake = rng.choice([10, 20, 25, 50, 100])
+
+    image = Image.new("RGB", (1400, 2400), "white")
+    draw = ImageDraw.Draw(image)
+    big, small = ImageFont.load_default(size=64), ImageFont.load_default(size=44)
+    draw.rectangle([0, 0, 1400, 220], fill=["#126e51", "#0b3d91", "#ff6a00"][slip_id % 3])
+    draw.text((60, 70), f"{bookmaker}  #{100000 + slip_id}", fill="white", font=big)
+    y = 300
+    for sel in selections:
+        draw.rectangle([40, y, 1360, y + 330], outline="#999999", width=4)
+        draw.text((80, y + 40), sel["match"] or sel["selection"], fill="black", font=big)
+        draw.text((80, y + 140), f"{sel['market']}: {sel['selection']}", fill="#333333", font=small)
+        draw.text((1100, y + 220), f"{sel['odds']:.2f}", fill="black", font=big)
+        y += 380
+    draw.text((80, 2200), f"Stake: {stake:.2f}    Slip {slip_id}", fill="black", font=big)
+    return image, {"slip_id": slip_id, "bookmaker": bookmaker, "stake": stake, "selections": selections}
+
+def thumbnail(image):
+    return np.asarray(image.convert("L").resize(THUMB_SIZE, Image.BOX), dtype=np.float32)
+
+def write_fixtures(directory: str, rng: random.Random):
+    """PNG slips on disk plus re-shared copies: byte-identical and re-encoded (smaller JPEG)."""
+    truth, paths = [], []
+    for slip_id in range(N_SLIPS):
+        image, extraction = draw_slip(slip_id, rng)
+        path = os.path.join(directory, f"slip_{slip_id}.png")
+        image.save(path)
+        truth.append((thumbnail(image), extraction))
+        paths.append((path, slip_id))
+        if slip_id % 4 == 0:
+            paths.append((path, slip_id))
+        if slip_id % 4 == 1:
+            copy = os.path.join(directory, f"slip_{slip_id}_shared.jpg")
+            image.resize((980, 1680)).save(copy, "JPEG", quality=70)
+            paths.append((copy, slip_id))
+    return truth, paths
+
+class FakeExtractor:
+    """Stands in for Gemini Vision: "reads" a slip by finding the closest fixture thumbnail."""
+
+    def __init__(self, truth):
+        self.truth = truth
+        self.batches = []
+        self.max_side = 0
+        self._lock = threading.Lock()
+
+    def analyze_bet_images(self, images):
+        time.sleep(CALL_LATENCY)
+        results = []
+        for data in images:
+            with Image.open(io.BytesIO(data)) as image:
+                with self._lock:
+                    self.max_side = max(self.max_side, *image.size)
+                thumb = thumbnail(image)
+            _, extraction = min(self.truth, key=lambda t: np.abs(t[0] - thumb).sum())
+            results.append(json.loads(json.dumps(extraction)))
+        with self._lock:
+            self.batches.append(len(images))
+        return results
+
+async def request_body(uploads, chunk_size=4096):
+    """The NDJSON body as a client would stream it, cut at arbitrary byte boundaries."""
+    body = b"".join(json.dumps({"image": base64.b64encode(data).decode()}).encode() + b"\n" for data in uploads)
+    for start in range(0, len(body), chunk_size):
+        await asyncio.sleep(0)
+        yield body[start:start + chunk_size]
+
+class RecordingDB:
+    def __init__(self):
+        self.calls = []
+
+    async def select(self, table, columns="*", filters=None, limit=None, order=None):
+        self.calls.append((table, filters))
+        return DAILY_PICKS
+
+async def collect(uploads):
+    return [data async for data in uploads]
+
+def run_limit_checks():
+    """Body limits: no line or upload count past its cap, and a failing body does not hang the pipeline."""
+    print("--- Upload limits and today's picks ---")
+    failures = 0
+
+    # A line that never ends is refused once it passes the cap, not buffered to the end of the body
+    read = 0
+    async def endless():
+        nonlocal read
+        for _ in range(1000):
+            read += 1
+            yield b"A" * 1000
+    try:
+        asyncio.run(collect(ndjson_uploads(endless(), max_line_bytes=10_000)))
+        ok = False
+    except UploadLimitError:
+        ok = read <= 11
+    print(f"Unterminated line refused after {read} of 1000 chunks {'✅' if ok else '❌'}")
+    failures += not ok
+
+    yielded = []
+    async def count_uploads():
+        async for data in ndjson_uploads(request_body([b"slip"] * 5, chunk_size=7), max_uploads=3):
+            yielded.append(data)
+    try:
+        asyncio.run(count_uploads())
+        ok = False
+    except UploadLimitError:
+        ok = yielded == [b"slip"] * 3
+    short = asyncio.run(collect(ndjson_uploads(request_body([b"slip"] * 3, chunk_size=7), max_uploads=3)))
+    ok = ok and short == [b"slip"] * 3
+    print(f"Upload count: {len(yielded)} yielded before the 4th of 5 was refused, exactly 3 accepted {'✅' if ok else '❌'}")
+    failures += not ok
+
+    # The limit error reaches the caller of ingest instead of leaving it waiting on the queue
+    pipeline = SlipIngestionPipeline(FakeExtractor([]), workers=1, batch_size=2)
+    try:
+        asyncio.run(asyncio.wait_for(pipeline.ingest(ndjson_uploads(endless(), max_line_bytes=10_000)), 10))
+        ok = False
+    except UploadLimitError:
+        ok = True
+    except asyncio.TimeoutError:
+        ok = False
+    pipeline.close()
+    print(f"ingest() re-raises the limit error {'✅' if ok else '❌'}")
+    failures += not ok
+
+    db = RecordingDB()
+    asyncio.run(PickIndex.load(db, day="2026-10-18"))
+    (table, filters), = db.calls
+    ok = table == "daily_picks" and filters == {"or": "(event_date.eq.2026-10-18,and(event_date.is.null,"
+                                                      "match_date.gte.2026-10-18T00:00:00Z,match_date.lt.2026-10-19T00:00:00Z))"}
+    print(f"PickIndex.load reads only the day's picks: {filters} {'✅' if ok else '❌'}")
+    failures += not ok
+    return failures
+
+def run_slip_ingestion_test():
+    if run_limit_checks():
+        print("\n❌ FAILURE: upload limits or the daily picks filter off.")
+        sys.exit(1)
+    if Image is None:
+        print("⚠️ Skipped: the slip fixtures are drawn with Pillow (pip install pillow).")
+        return
+
+    rng = random.Random(5)
+    directory = tempfile.mkdtemp()
+    truth, paths = write_fixtures(directory, rng)
+    rng.shuffle(paths)
+    uploads, expected = [], []
+    for path, slip_id in paths:
+        with open(path, "rb") as f:
+            uploads.append(f.read())
+        expected.append(slip_id)
+    uploads.insert(7, b"definitely not an image")
+    expected.insert(7, None)
+    print(f"\n--- {len(uploads)} uploads: {N_SLIPS} distinct slips, {len(uploads) - N_SLIPS - 1} re-shared copies, 1 corrupt ---")
+
+    # Pipeline: streamed NDJSON body -> process pool -> dedupe -> batched extraction -> pick matching
+    extractor = FakeExtractor(truth)
+    pipeline = SlipIngestionPipeline(extractor, workers=2, batch_size=8)
+    index = PickIndex(DAILY_PICKS)
+    start = time.perf_counter()
+    report = asyncio.run(pipeline.ingest(ndjson_uploads(request_body(uploads)), index))
+    pipeline_s = time.perf_counter() - start
+    pipeline.close()
+
+    print(f"One analyze_bet_image call per upload: {len(uploads)} calls (~{len(uploads) * CALL_LATENCY:.1f}s of latency alone)")
+    print(f"Pipeline: {report['extraction_calls']} calls (batches {sorted(extractor.batches, reverse=True)}), "
+          f"{report['unique']} unique, {report['duplicates']} duplicates, {report['errors']} errors in {pipeline_s:.2f}s")
+    print(f"Images sent to the extractor: {sum(extractor.batches)}, largest side {extractor.max_side}px (<= {SLIP_MAX_SIDE})")
+
+    # Every upload resolved to its own slip, duplicates included; selections matched by team name
+    wrong_slip = wrong_match = 0
+    for slip, slip_id in zip(report["slips"], expected):
+        if slip_id is None:
+            wrong_slip += slip["error"] is None
+            continue
+        extraction = truth[slip_id][1]
+        read = [(s["selection"], s["odds"]) for s in slip["selections"]]
+        wrong_slip += slip["error"] is not None or read != [(s["selection"], s["odds"]) for s in extraction["selections"]]
+        for selection in slip["selections"]:
+            _, pick_id, same = next(s for s in SLIP_SELECTIONS if s[0]["selection"] == selection["selection"])
+            got = selection["pick"]
+            wrong_match += (got or {}).get("pick_id") != pick_id or (got is not None and got["same_selection"] != same)
+    print(f"Slip resolution errors: {wrong_slip}; pick matching errors: {wrong_match} "
+          f"({report['matched_selections']} selections matched to today's picks)")
+
+    ok = report["uploads"] == len(uploads) and report["unique"] == N_SLIPS and report["errors"] == 1
+    ok = ok and report["duplicates"] == len(uploads) - N_SLIPS - 1 and sum(extractor.batches) == N_SLIPS
+    ok = ok and report["extraction_calls"] == -(-N_SLIPS // 8) and max(extractor.batches) <= 8
+    ok = ok and wrong_slip == 0 and wrong_match == 0 and report["matched_selections"] > 0
+    ok = ok and extractor.max_side <= SLIP_MAX_SIDE
+    if ok:
+        print("\n✅ SUCCESS: each distinct slip is extracted once, in batches, and matched against the daily picks.")
+    else:
+        print("\n❌ FAILURE: slip ingestion results off.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_slip_ingestion_test()
@@ -0,0 +1,118 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from sportmonks_service import SportmonksService
+
+STUB_LATENCY = 0.1  # seconds per upstream call
+N_CLIENTS = 25
+N_FIXTURES = 60
+
+class FakeSportmonks(BaseHTTPRequestHandler):
+    """Local fake of the Sportmonks v3 football API; counts upstream hits per endpoint."""
+    hits = {}
+    includes = {}
+    livescores_etag = '"live-v1"'
+
+    def _json(self, body: dict, headers: dict = None):
+        raw = json.dumps(body).encode()
+        self.send_response(200)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        time.sleep(STUB_LATENCY)
+        path = urlparse(self.path).path.split("/v3/football/")[-1]
+        endpoint = path.split("/")[0]
+        FakeSportmonks.hits[endpoint] = FakeSportmonks.hits.get(endpoint, 0) + 1
+        FakeSportmonks.includes[endpoint] = parse_qs(urlparse(self.path).query).get("include", [""])[0]
+
+        if endpoint == "livescores":
+            if self.headers.get("If-None-Match") == self.livescores_etag:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            return self._json({"data": [{"id": 1, "name": "River vs Boca"}]}, {"ETag": self.livescores_etag})
+        if endpoint == "odds":
+            fixture_id = path.split("/")[-1]
+            return self._json({"data": [{"fixture_id": int(fixture_id), "value": "2.10"}]})
+        if endpoint == "fixtures":
+            ids = path.split("/")[-1].split(",")
+            return self._json({"data": [{"id": int(i), "odds": [{"fixture_id": int(i), "value": "2.10"}]} for i in ids]})
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+def run_cache_test():
+    server = StubServer(("127.0.0.1", 0), FakeSportmonks)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v3/football"
+    service = SportmonksService(api_key="test", base_url=base_url, livescores_ttl=0.5, odds_ttl=60)
+
+    print(f"--- Sportmonks client against a fake server ({STUB_LATENCY * 1000:.0f} ms per call) ---")
+
+    # 1. Concurrent identical livescores requests share one upstream call
+    with ThreadPoolExecutor(N_CLIENTS) as pool:
+        results = list(pool.map(lambda _: service.get_live_scores(), range(N_CLIENTS)))
+    live_hits = FakeSportmonks.hits.get("livescores", 0)
+    live_include = FakeSportmonks.includes.get("livescores", "").split(",")
+    print(f"{N_CLIENTS} concurrent livescores calls -> {live_hits} upstream hit(s), include={','.join(live_include)}")
+
+    # 2. After the TTL the entry is revalidated with its ETag (304, same payload)
+    time.sleep(0.6)
+    revalidated = service.get_live_scores()
+    print(f"After TTL: {FakeSportmonks.hits['livescores']} hits, 304s: {service.stats['not_modified']}")
+
+    # 3. Bulk odds through fixtures/multi, then single-fixture reads come from the cache
+    fixture_ids = [str(1000 + i) for i in range(N_FIXTURES)]
+    start = time.perf_counter()
+    bulk = service.get_fixtures_odds(fixture_ids)
+    elapsed = time.perf_counter() - start
+    singles = [service.get_fixture_odds(f) for f in fixture_ids[:10]]
+    print(f"Odds for {N_FIXTURES} fixtures in {elapsed:.2f}s: fixtures/multi hits {FakeSportmonks.hits.get('fixtures', 0)}, "
+          f"odds/fixture hits {FakeSportmonks.hits.get('odds', 0)}")
+    print(f"Client stats: {service.stats}")
+    ok = live_hits == 1 and all(r["data"] for r in results) and "odds" in live_include
+    ok = ok and FakeSportmonks.hits["livescores"] == 2 and service.stats["not_modified"] == 1
+    ok = ok and revalidated == results[0]
+    ok = ok and FakeSportmonks.hits.get("fixtures") == 2 and not FakeSportmonks.hits.get("odds")
+    ok = ok and all(bulk[f]["data"] for f in fixture_ids) and singles[0] is bulk[fixture_ids[0]]
+
+    # 4. The cache stays bounded: expired entries go first, then the least recently used
+    small = SportmonksService(api_key="test", base_url=base_url, livescores_ttl=0.01, odds_ttl=60, max_entries=20)
+    small.get_live_scores()
+    time.sleep(0.05)
+    small.get_fixtures_odds(fixture_ids[:19])
+    small.get_fixture_odds(fixture_ids[0])  # recently used: survives the next fill
+    small.get_fixtures_odds(fixture_ids[19:25])
+    kept = {key[0] for key in small._cache}
+    bounded = len(small._cache) <= 20 and "livescores" not in kept
+    bounded = bounded and f"odds/fixture/{fixture_ids[0]}" in kept and f"odds/fixture/{fixture_ids[1]}" not in kept
+    print(f"Cache capped at 20: {len(small._cache)} entries, {small.stats['evicted']} evicted (expired livescores first)")
+    server.shutdown()
+
+    ok = ok and bounded
+    if ok:
+        print("\n✅ SUCCESS: pooled, cached and coalesced Sportmonks calls.")
+    else:
+        print("\n❌ FAILURE: unexpected number of upstream calls.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_cache_test()
@@ -0,0 +1,15 @@
+-- SCHEMA UPDATE V3: NATURAL KEY FOR DAILY PICKS (IDEMPOTENT UPSERTS)
+-- Run this in your Supabase SQL Editor or via psql (Postgres 15+ for NULLS NOT DISTINCT)
+
+-- 1. Remove duplicates created by previous re-runs (keep the most recent row per key)
+DELETE FROM daily_picks d
+USING daily_picks newer
+WHERE d.match IS NOT DISTINCT FROM newer.match
+  AND d.market_type IS NOT DISTINCT FROM newer.market_type
+  AND d.selection IS NOT DISTINCT FROM newer.selection
+  AND d.match_date IS NOT DISTINCT FROM newer.match_date
+  AND (d.created_at, d.id::text) < (newer.created_at, newer.id::text);
+
+-- 2. Natural key used by DailyPicksWriter (on_conflict=match,market_type,selection,match_date)
+CREATE UNIQUE INDEX IF NOT EXISTS daily_picks_natural_key
+  ON daily_picks (match, market_type, selection, match_date) NULLS NOT DISTINCT;
@@ -0,0 +1,36 @@
+-- SCHEMA UPDATE V4: BATCH SETTLEMENT (ONE ATOMIC WRITE PER WALLET)
+-- Run this in your Supabase SQL Editor or via psql
+
+-- Applies many wallet deltas in a single transaction:
+-- p_deltas = [{"user_id": "...", "amount": 15.00, "reason": "...", "description": "..."}, ...]
+-- Each wallet balance is incremented once and a matching row is logged in 'credits'.
+CREATE OR REPLACE FUNCTION public.apply_wallet_deltas(p_deltas jsonb)
+RETURNS integer AS $$
+DECLARE
+  applied integer;
+BEGIN
+  WITH deltas AS (
+    SELECT user_id, SUM(amount) AS amount, MIN(reason) AS reason, STRING_AGG(description, ' | ') AS description
+    FROM jsonb_to_recordset(p_deltas) AS x(user_id uuid, amount numeric, reason text, description text)
+    GROUP BY user_id
+  ),
+  updated AS (
+    UPDATE wallets w
+    SET balance = w.balance + d.amount
+    FROM deltas d
+    WHERE w.user_id = d.user_id
+    RETURNING w.id AS wallet_id, w.user_id
+  )
+  INSERT INTO credits (wallet_id, amount, reason, description)
+  SELECT u.wallet_id, d.amount, d.reason, d.description
+  FROM updated u JOIN deltas d ON d.user_id = u.user_id;
+
+  GET DIAGNOSTICS applied = ROW_COUNT;
+  RETURN applied;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Only the backend (service role) may credit wallets. Functions are executable by PUBLIC
+-- by default, which would let the anon key call /rest/v1/rpc/apply_wallet_deltas.
+REVOKE EXECUTE ON FUNCTION public.apply_wallet_deltas(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.apply_wallet_deltas(jsonb) TO service_role;
@@ -0,0 +1,11 @@
+-- SCHEMA UPDATE V5: IDEMPOTENT ORDERS FROM PAYMENT WEBHOOKS
+-- Run this in your Supabase SQL Editor or via psql
+
+-- 1. Remove duplicate orders created by provider retries (keep the first one)
+DELETE FROM orders o
+USING orders older
+WHERE o.external_id = older.external_id
+  AND (o.created_at, o.id::text) > (older.created_at, older.id::text);
+
+-- 2. One order per provider payment id (bulk inserts use on_conflict=external_id)
+CREATE UNIQUE INDEX IF NOT EXISTS orders_external_id_key ON orders (external_id);
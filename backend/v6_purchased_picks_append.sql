@@ -0,0 +1,40 @@
+-- SCHEMA UPDATE V6: ATOMIC APPEND FOR PURCHASED PICKS
+-- Run this in your Supabase SQL Editor or via psql
+
+-- Called by the payment webhook workers with every pick purchase of a batch.
+-- Locks the affected profiles, appends each pick id only if absent and returns the
+-- (user_id, pick_id) pairs that were actually added.
+CREATE OR REPLACE FUNCTION public.append_purchased_picks(p_items jsonb)
+RETURNS TABLE (user_id uuid, pick_id text) AS $$
+  WITH requested AS (
+    SELECT DISTINCT r.user_id, r.pick_id
+    FROM jsonb_to_recordset(p_items) AS r(user_id uuid, pick_id text)
+  ),
+  locked AS (
+    SELECT p.user_id, COALESCE(p.purchased_picks, '{}') AS purchased_picks
+    FROM profiles p
+    WHERE p.user_id IN (SELECT requested.user_id FROM requested)
+    ORDER BY p.user_id
+    FOR UPDATE
+  ),
+  added AS (
+    SELECT requested.user_id, requested.pick_id
+    FROM requested JOIN locked ON locked.user_id = requested.user_id
+    WHERE NOT (requested.pick_id = ANY(locked.purchased_picks))
+  ),
+  updated AS (
+    UPDATE profiles p
+    SET purchased_picks = COALESCE(p.purchased_picks, '{}') || a.pick_ids,
+        updated_at = CURRENT_TIMESTAMP
+    FROM (SELECT added.user_id, array_agg(added.pick_id ORDER BY added.pick_id) AS pick_ids
+          FROM added GROUP BY added.user_id) a
+    WHERE p.user_id = a.user_id
+    RETURNING p.user_id
+  )
+  SELECT added.user_id, added.pick_id FROM added;
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Runs as the owner, so only the backend (service role) may call it; clients must
+-- not be able to unlock picks for any user through PostgREST.
+REVOKE EXECUTE ON FUNCTION public.append_purchased_picks(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.append_purchased_picks(jsonb) TO service_role;
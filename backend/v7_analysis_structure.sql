@@ -0,0 +1,33 @@
+-- SCHEMA UPDATE V7: STRUCTURED ANALYSIS IN JSONB
+-- Run this in your Supabase SQL Editor or via psql
+
+-- 1. Column (already added by FINAL_SETUP.sql on newer installs)
+ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS analysis_structure jsonb;
+
+-- 2. Indexes for the server-side filters used by GET /picks
+--    (analysis_structure->'confidence', analysis_structure->'risk_assessment'->>'volatility')
+CREATE INDEX IF NOT EXISTS daily_picks_analysis_volatility
+  ON daily_picks ((analysis_structure->'risk_assessment'->>'volatility'));
+CREATE INDEX IF NOT EXISTS daily_picks_analysis_confidence
+  ON daily_picks ((analysis_structure->'confidence'));
+
+-- 3. Batched backfill, called by backend/backfill_analysis.py with the rows it parsed.
+--    Only rows still missing analysis_structure are touched, so re-running is safe and
+--    picks written meanwhile by the agent are never overwritten.
+CREATE OR REPLACE FUNCTION public.backfill_analysis_structure(p_items jsonb)
+RETURNS integer AS $$
+  WITH updated AS (
+    UPDATE daily_picks d
+    SET analysis_structure = r.analysis_structure,
+        ai_analysis = r.ai_analysis
+    FROM jsonb_to_recordset(p_items) AS r(id text, ai_analysis text, analysis_structure jsonb)
+    WHERE d.id::text = r.id
+      AND d.analysis_structure IS NULL
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$ LANGUAGE sql;
+
+-- Bulk writer on daily_picks: only the backend (service role) may call it through PostgREST
+REVOKE EXECUTE ON FUNCTION public.backfill_analysis_structure(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.backfill_analysis_structure(jsonb) TO service_role;
@@ -0,0 +1,166 @@
+-- SCHEMA UPDATE V8: BET LEDGER WITH INCREMENTAL PERFORMANCE AGGREGATES
+-- Run this in your Supabase SQL Editor or via psql
+
+-- 1. Ledger: one row per bet, from placement to settlement
+CREATE TABLE IF NOT EXISTS bets (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID REFERENCES profiles(user_id) ON DELETE CASCADE NOT NULL,
+    pick_id TEXT,                       -- daily_picks.id when the bet follows a pick
+    fixture_id TEXT,                    -- The Odds API event id (odds store / settlement)
+    match TEXT,
+    league_name TEXT,
+    market_type TEXT,
+    selection TEXT,
+    stake DECIMAL(12, 2) NOT NULL CHECK (stake > 0),
+    odds_entry DECIMAL(8, 3) NOT NULL CHECK (odds_entry > 1),
+    odds_closing DECIMAL(8, 3),         -- closing line, for CLV
+    status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'won', 'lost', 'void')),
+    payout DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    refund DECIMAL(12, 2),              -- Gold Pick insurance credited on a loss
+    is_daily_gold_pick BOOLEAN DEFAULT false,
+    placed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    settled_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS bets_user_placed ON bets (user_id, placed_at DESC);
+CREATE INDEX IF NOT EXISTS bets_pending_fixture ON bets (fixture_id) WHERE status = 'pending';
+
+-- One insured bet per user and Gold Pick: settle_bets refunds every losing insured row,
+-- so repeated bets on the same pick must not multiply the insurance. Bets placed before
+-- this index keep only their first insured row.
+UPDATE bets b
+SET is_daily_gold_pick = false
+FROM bets first
+WHERE b.is_daily_gold_pick AND first.is_daily_gold_pick
+  AND b.user_id = first.user_id AND b.pick_id = first.pick_id
+  AND (b.placed_at, b.id::text) > (first.placed_at, first.id::text);
+CREATE UNIQUE INDEX IF NOT EXISTS bets_one_insured_pick ON bets (user_id, pick_id) WHERE is_daily_gold_pick;
+
+-- Bets on a pick take their fixture from it (The Odds API event id, set by the daily agent)
+ALTER TABLE daily_picks ADD COLUMN IF NOT EXISTS fixture_id TEXT;
+
+-- 2. Aggregates per user, maintained by settle_bets(): one row for all bets
+--    (scope 'all', scope_key ''), one per league and one per market.
+--    ROI = (return_sum - stake_sum) / stake_sum, CLV beat rate = clv_wins / clv_count.
+CREATE TABLE IF NOT EXISTS bet_performance (
+    user_id UUID REFERENCES profiles(user_id) ON DELETE CASCADE NOT NULL,
+    scope VARCHAR(10) NOT NULL CHECK (scope IN ('all', 'league', 'market')),
+    scope_key TEXT NOT NULL DEFAULT '',
+    settled INTEGER NOT NULL DEFAULT 0,
+    won INTEGER NOT NULL DEFAULT 0,
+    lost INTEGER NOT NULL DEFAULT 0,
+    void INTEGER NOT NULL DEFAULT 0,
+    stake_sum DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    return_sum DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    refund_sum DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    clv_wins INTEGER NOT NULL DEFAULT 0,  -- entry odds above the closing odds
+    clv_count INTEGER NOT NULL DEFAULT 0, -- settled bets with a closing line
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, scope, scope_key)
+);
+
+-- 3. Settlement: called by bet_ledger.BetLedger.settle with BatchSettlementEngine results
+-- p_items = [{"bet_id": "...", "status": "lost", "payout": 0, "refund": 25.0, "odds_closing": 1.9}, ...]
+-- Only bets still 'pending' are settled and folded into bet_performance, and their Gold
+-- Pick refunds are credited through apply_wallet_deltas (v4) in the same transaction,
+-- so a retried or concurrent settlement never counts or refunds a bet twice and a
+-- failure never leaves a settled bet without its refund.
+-- Returns the ids of the bets this call settled.
+DROP FUNCTION IF EXISTS public.settle_bets(jsonb);
+CREATE OR REPLACE FUNCTION public.settle_bets(p_items jsonb, p_refund_reason text DEFAULT 'gold_pick_insurance')
+RETURNS TABLE (bet_id uuid) AS $$
+#variable_conflict use_column
+DECLARE
+  v_settled jsonb;
+BEGIN
+  WITH items AS (
+    SELECT DISTINCT ON (r.bet_id) r.*
+    FROM jsonb_to_recordset(p_items) AS r(bet_id uuid, status text, payout numeric, refund numeric, odds_closing numeric)
+    WHERE r.status IN ('won', 'lost', 'void')
+  ),
+  settled AS (
+    UPDATE bets b
+    SET status = i.status,
+        payout = COALESCE(i.payout, 0),
+        refund = i.refund,
+        odds_closing = COALESCE(i.odds_closing, b.odds_closing),
+        settled_at = CURRENT_TIMESTAMP
+    FROM items i
+    WHERE b.id = i.bet_id AND b.status = 'pending'
+    RETURNING b.*
+  ),
+  scoped AS (
+    SELECT s.*, v.scope, v.scope_key
+    FROM settled s
+    CROSS JOIN LATERAL (VALUES
+      ('all', ''),
+      ('league', COALESCE(s.league_name, '')),
+      ('market', COALESCE(s.market_type, ''))
+    ) AS v(scope, scope_key)
+  ),
+  folded AS (
+    INSERT INTO bet_performance AS p
+      (user_id, scope, scope_key, settled, won, lost, void, stake_sum, return_sum, refund_sum, clv_wins, clv_count)
+    SELECT user_id, scope, scope_key,
+           count(*),
+           count(*) FILTER (WHERE status = 'won'),
+           count(*) FILTER (WHERE status = 'lost'),
+           count(*) FILTER (WHERE status = 'void'),
+           sum(stake),
+           sum(payout),
+           COALESCE(sum(refund), 0),
+           count(*) FILTER (WHERE odds_closing IS NOT NULL AND odds_entry > odds_closing),
+           count(*) FILTER (WHERE odds_closing IS NOT NULL)
+    FROM scoped
+    GROUP BY user_id, scope, scope_key
+    ON CONFLICT (user_id, scope, scope_key) DO UPDATE SET
+      settled = p.settled + EXCLUDED.settled,
+      won = p.won + EXCLUDED.won,
+      lost = p.lost + EXCLUDED.lost,
+      void = p.void + EXCLUDED.void,
+      stake_sum = p.stake_sum + EXCLUDED.stake_sum,
+      return_sum = p.return_sum + EXCLUDED.return_sum,
+      refund_sum = p.refund_sum + EXCLUDED.refund_sum,
+      clv_wins = p.clv_wins + EXCLUDED.clv_wins,
+      clv_count = p.clv_count + EXCLUDED.clv_count,
+      updated_at = CURRENT_TIMESTAMP
+    RETURNING 1
+  )
+  SELECT COALESCE(jsonb_agg(jsonb_build_object('id', s.id, 'user_id', s.user_id, 'refund', s.refund)), '[]'::jsonb)
+  INTO v_settled
+  FROM settled s;
+
+  -- One wallet delta per user for the refunds of the bets settled above
+  PERFORM apply_wallet_deltas(d.deltas)
+  FROM (
+    SELECT jsonb_agg(jsonb_build_object(
+             'user_id', r.user_id, 'amount', r.amount, 'reason', p_refund_reason,
+             'description', 'Seguro Gold Pick: ' || r.bets || ' apuesta(s) perdida(s)')) AS deltas
+    FROM (
+      SELECT e->>'user_id' AS user_id, sum((e->>'refund')::numeric) AS amount, count(*) AS bets
+      FROM jsonb_array_elements(v_settled) e
+      WHERE (e->>'refund')::numeric > 0
+      GROUP BY e->>'user_id'
+    ) r
+  ) d
+  WHERE d.deltas IS NOT NULL;
+
+  RETURN QUERY SELECT (e->>'id')::uuid FROM jsonb_array_elements(v_settled) e;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Settles bets and credits wallets: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.settle_bets(jsonb, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.settle_bets(jsonb, text) TO service_role;
+
+-- 4. Users read their own ledger and stats; writes go through the backend (service role)
+ALTER TABLE bets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE bet_performance ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own bets."
+  ON bets FOR SELECT
+  USING ( auth.uid() = user_id );
+
+CREATE POLICY "Users can view own performance."
+  ON bet_performance FOR SELECT
+  USING ( auth.uid() = user_id );
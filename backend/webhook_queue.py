@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_QUEUE_PATH = os.getenv(
+    "WEBHOOK_QUEUE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".webhook_queue.sqlite3")
+)
+
+class WebhookQueue:
+    """
+    Durable local queue for payment webhooks (SQLite in WAL mode).
+
+    Handlers enqueue and acknowledge immediately; duplicates of the same provider event id
+    are ignored, so provider retries never create duplicate orders. Workers claim pending
+    events in batches, and failed events are retried up to `max_attempts` before being
+    parked as 'failed' for the replay tool. Retries wait `retry_base * 2**attempts` seconds
+    (capped at `retry_max`), so a short Supabase outage does not use up every attempt.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 5,
+                 retry_base: float = 5.0, retry_max: float = 600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS webhook_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                provider TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                received_at REAL NOT NULL,
+                claimed_at REAL,
+                processed_at REAL,
+                next_attempt_at REAL,
+                UNIQUE (provider, event_id)
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(webhook_events)")}
+        if "next_attempt_at" not in columns:  # queue files created before retry backoff
+            self._conn.execute("ALTER TABLE webhook_events ADD COLUMN next_attempt_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_status ON webhook_events(status, id)")
+
+    def enqueue(self, provider: str, event_id: str, payload: Dict[str, Any]) -> bool:
+        """Stores an event. Returns False if this provider event id was already received."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO webhook_events (provider, event_id, payload, received_at) VALUES (?, ?, ?, ?)",
+                (provider, str(event_id), json.dumps(payload), time.time())
+            )
+            return cursor.rowcount == 1
+
+    def claim_batch(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Atomically moves up to `limit` pending events that are due to 'processing' and returns them."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, provider, event_id, payload, attempts FROM webhook_events "
+                    "WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= ?) "
+                    "ORDER BY id LIMIT ?", (now, limit)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE webhook_events SET status = 'processing', claimed_at = ? WHERE id = ?",
+                        [(now, r[0]) for r in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {"id": r[0], "provider": r[1], "event_id": r[2], "payload": json.loads(r[3]), "attempts": r[4]}
+            for r in rows
+        ]
+
+    def mark_done(self, ids: List[int]):
+        if not ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE webhook_events SET status = 'done', processed_at = ?, last_error = NULL WHERE id = ?",
+                [(now, i) for i in ids]
+            )
+
+    def mark_failed(self, event_id: int, error: str):
+        """
+        Back to 'pending', due again after an exponential backoff, or 'failed' once
+        max_attempts is reached.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM webhook_events WHERE id = ?", (event_id,)).fetchone()
+            if row is None:
+                return
+            delay = min(self.retry_base * 2 ** row[0], self.retry_max)
+            self._conn.execute(
+                "UPDATE webhook_events SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+                (error[:500], time.time() + delay, self.max_attempts, event_id)
+            )
+
+    def requeue_stale(self, older_than_seconds: float = 300) -> int:
+        """Returns events stuck in 'processing' (e.g. worker crash) to 'pending'."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE webhook_events SET status = 'pending' WHERE status = 'processing' AND claimed_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+            return cursor.rowcount
+
+    def replay(self, status: str = "failed", provider: Optional[str] = None, event_ids: Optional[List[str]] = None) -> int:
+        """Resets matching events to 'pending' (attempts cleared) so workers apply them again."""
+        query = "UPDATE webhook_events SET status = 'pending', attempts = 0, next_attempt_at = NULL WHERE status = ?"
+        params: List[Any] = [status]
+        if provider:
+            query += " AND provider = ?"
+            params.append(provider)
+        if event_ids:
+            query += f" AND event_id IN ({','.join('?' * len(event_ids))})"
+            params.extend(event_ids)
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+    def metrics(self) -> Dict[str, Any]:
+        """Backpressure view: counts per status and age of the oldest pending event."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM webhook_events GROUP BY status").fetchall())
+            (oldest,) = self._conn.execute("SELECT MIN(received_at) FROM webhook_events WHERE status = 'pending'").fetchone()
+            (recent,) = self._conn.execute(
+                "SELECT COUNT(*) FROM webhook_events WHERE status = 'done' AND processed_at > ?", (time.time() - 60,)
+            ).fetchone()
+        return {
+            "pending": counts.get("pending", 0),
+            "processing": counts.get("processing", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_pending_age_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "processed_last_minute": recent,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class WebhookWorkerPool:
+    """
+    Asyncio workers that drain the queue in batches.
+
+    `apply_batch(events)` must apply the events and return {queue_id: error_message} for the
+    ones that failed (empty dict when all succeeded).
+    """
+
+    def __init__(
+        self,
+        queue: WebhookQueue,
+        apply_batch: Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, str]]],
+        workers: int = 2,
+        batch_size: int = 50,
+        poll_interval: float = 0.5
+    ):
+        self.queue = queue
+        self.apply_batch = apply_batch
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self):
+        self._stopping = False
+        self.queue.requeue_stale()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain_once(self) -> int:
+        """Claims and applies one batch. Returns the number of events handled."""
+        events = await asyncio.to_thread(self.queue.claim_batch, self.batch_size)
+        if not events:
+            return 0
+        try:
+            errors = await self.apply_batch(events)
+        except Exception as e:
+            errors = {ev["id"]: str(e) for ev in events}
+
+        await asyncio.to_thread(self.queue.mark_done, [ev["id"] for ev in events if ev["id"] not in errors])
+        for event_id, error in errors.items():
+            print(f"Webhook apply error (event {event_id}): {error}")
+            await asyncio.to_thread(self.queue.mark_failed, event_id, error)
+        return len(events)
+
+    async def _run(self):
+        failures = 0
+        while not self._stopping:
+            try:
+                handled = await self.drain_once()
+            except Exception as e:  # e.g. the queue file is locked: keep the worker alive
+                failures += 1
+                delay = min(self.poll_interval * 2 ** failures, 30.0)
+                print(f"Webhook worker error: {e!r}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+            if not handled:
+                await asyncio.sleep(self.poll_interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook queue tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show queue metrics")
+    replay = sub.add_parser("replay", help="Re-apply stored events")
+    replay.add_argument("--status", default="failed", help="Events in this status are replayed (failed/done)")
+    replay.add_argument("--provider", help="Only this provider (payment/mercadopago)")
+    replay.add_argument("event_ids", nargs="*", help="Specific provider event ids")
+    args = parser.parse_args()
+
+    queue = WebhookQueue()
+    if args.command == "stats":
+        print(json.dumps(queue.metrics(), indent=2))
+    else:
+        count = queue.replay(args.status, args.provider, args.event_ids or None)
+        print(f"🔁 {count} eventos devueltos a 'pending'. Los workers del backend los aplicarán.")
+    queue.close()
@@ -1,5 +1,8 @@
+import argparse
+import codecs
 import json
 import os
+import sys
 from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv, find_dotenv
@@ -18,7 +21,220 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 # Conexión
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def cargar_rapido():
+# Clave natural compartida con el agente (backend/picks_writer.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from picks_writer import ON_CONFLICT, is_unchanged, notify_feed_update, pick_key, structure_analysis
+
+def normalizar_pick(item, fecha_hoy):
+    """Convierte un item de picks_hoy.json (formato viejo o nuevo) en una fila de daily_picks."""
+    # --- MAPEO INTELIGENTE DE CLAVES (Soporta formato viejo y nuevo) ---
+    match_val = item.get("match") or item.get("evento") or "Unknown Match"
+    league_val = item.get("league_name") or item.get("liga") or "General"
+    selection_val = item.get("selection") or item.get("prediccion") or "Selection"
+    odds_val = float(item.get("odds") or item.get("cuota") or 1.0)
+    
+    # --- EDGE Y CONFIDENCE ---
+    # Si vienen explícitos en el JSON (Nuevo formato)
+    if "edge_percentage" in item:
+        edge_val = float(item["edge_percentage"])
+    else:
+        # Derivar de texto (Viejo formato)
+        edge_txt = str(item.get("edge", "MEDIA")).upper()
+        if "GOLD" in edge_txt: edge_val = 12.5
+        elif "ALTA" in edge_txt or "HIGH" in edge_txt: edge_val = 10.5
+        elif "MEDIUM" in edge_txt: edge_val = 7.5
+        else: edge_val = 4.0
+
+    if "confidence_score" in item:
+        conf_score = int(item["confidence_score"])
+    else:
+        # Derivar de edge
+        conf_score = 5 if edge_val > 10 else 4 if edge_val > 7 else 3
+
+    # --- CATEGORÍA ---
+    is_gold_pick = item.get("is_gold") or item.get("es_gold") or False
+    # Auto-detect gold from edge value if flag missing
+    if edge_val > 11: is_gold_pick = True
+    
+    category_val = "gold" if is_gold_pick else "todays_edge"
+    bet_desc = "AI Value Pick"
+
+    # --- ANÁLISIS RICO ---
+    # Buscamos el texto principal en 'ai_analysis' (nuevo) o 'analisis' (viejo)
+    analysis_text = item.get("verdict") or item.get("ai_analysis") or item.get("analisis")
+    if not analysis_text:
+        analysis_text = f"Oportunidad detectada por Algoritmo en {selection_val}."
+    
+    key_stats = item.get("key_stats", {})
+    key_insights = item.get("key_insights", [])
+
+    rich_analysis_data = {
+        "analysis_text": str(analysis_text),
+        "key_stats": key_stats,
+        "key_insights": key_insights,
+        "risk_assessment": item.get("risk_assessment", {}),
+        "match_time": item.get("match_time", "")
+    }
+
+    # 4. Construir objeto DB (análisis estructurado en la columna JSONB analysis_structure)
+    return structure_analysis({
+        "match": match_val,
+        "league_name": league_val,
+        "selection": selection_val,
+        "odds": odds_val,
+        "edge_percentage": edge_val,
+        "confidence_score": conf_score,
+        "market_type": "Manual Pick", 
+        "match_date": item.get("match_date") or fecha_hoy,
+        "fixture_id": item.get("fixture_id"),
+        "category": category_val,
+        "ai_analysis": rich_analysis_data,
+        "bet_description": bet_desc, 
+        "is_gold": is_gold_pick
+    })
+
+def leer_tabla_actual(page_size=1000):
+    """Lee todas las filas actuales de daily_picks (paginado)."""
+    filas = []
+    desde = 0
+    while True:
+        res = supabase.table('daily_picks').select('*').range(desde, desde + page_size - 1).execute()
+        filas.extend(res.data or [])
+        if len(res.data or []) < page_size:
+            return filas
+        desde += page_size
+
+def calcular_diff(nuevos, actuales):
+    """
+    Compara el archivo con la tabla por clave estable (match, market_type, selection, match_date).
+    Devuelve (inserts, updates, deletes): deletes son filas de la tabla que ya no están en el archivo.
+    """
+    por_clave = {pick_key(p): p for p in nuevos}
+    tabla = {}
+    duplicados = []
+    for fila in actuales:
+        clave = pick_key(fila)
+        if clave in tabla:
+            duplicados.append(fila)  # restos de cargas anteriores con la misma clave
+        else:
+            tabla[clave] = fila
+
+    inserts = [p for k, p in por_clave.items() if k not in tabla]
+    updates = [p for k, p in por_clave.items() if k in tabla and not is_unchanged(p, tabla[k])]
+    deletes = [f for k, f in tabla.items() if k not in por_clave] + duplicados
+    return inserts, updates, deletes
+
+def imprimir_diff(inserts, updates, deletes):
+    for p in inserts: print(f"   + {p['match']} | {p['selection']}")
+    for p in updates: print(f"   ~ {p['match']} | {p['selection']}")
+    for f in deletes: print(f"   - {f.get('match')} | {f.get('selection')}")
+
+def aplicar_diff(inserts, updates, deletes, chunk_size=200):
+    """Aplica solo los cambios, en bloque: upserts por clave natural y deletes por id."""
+    cambios = inserts + updates
+    for i in range(0, len(cambios), chunk_size):
+        supabase.table('daily_picks').upsert(
+            cambios[i:i + chunk_size], on_conflict=ON_CONFLICT, returning="minimal"
+        ).execute()
+
+    ids = [f["id"] for f in deletes if f.get("id") is not None]
+    for i in range(0, len(ids), chunk_size):
+        supabase.table('daily_picks').delete().in_('id', ids[i:i + chunk_size]).execute()
+
+def iterar_items(file_path, read_size=64 * 1024, on_progress=None):
+    """
+    Lee picks de forma incremental, sin cargar el archivo entero.
+    Soporta un ARRAY JSON ([{...}, {...}]) o NDJSON (un objeto por línea).
+    on_progress(bytes_leidos) se llama después de cada bloque leído.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ""
+    pos = 0
+    leidos = 0
+    eof = False
+    es_array = None
+
+    with open(file_path, 'rb') as f:
+        while True:
+            # Saltar separadores entre objetos
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+
+            if es_array is None and pos < len(buffer):
+                es_array = buffer[pos] == "["
+                if es_array:
+                    pos += 1
+                continue
+
+            if pos < len(buffer) and buffer[pos] == "]" and es_array:
+                return
+
+            try:
+                if pos >= len(buffer):
+                    raise ValueError("buffer vacío")
+                item, fin = decoder.raw_decode(buffer, pos)
+                pos = fin
+                yield item
+                continue
+            except ValueError:
+                if eof:
+                    if buffer[pos:].strip():
+                        raise
+                    return
+
+            # Necesitamos más datos: descartamos lo ya consumido para mantener la memoria plana
+            buffer = buffer[pos:]
+            pos = 0
+            bloque = f.read(read_size)
+            leidos += len(bloque)
+            eof = not bloque
+            buffer += utf8.decode(bloque, final=eof)
+            if on_progress:
+                on_progress(leidos)
+
+def cargar_streaming(file_path, chunk_size=500, dry_run=False):
+    """
+    Modo backfill para exports grandes (multi-día / multi-liga, JSON array o NDJSON).
+    Normaliza cada item al vuelo y hace upsert por bloques de chunk_size: la memoria
+    no depende del tamaño del archivo. No borra filas (el archivo es parcial).
+    """
+    print(f"🚀 Carga en streaming de {file_path} (bloques de {chunk_size})...")
+    total_bytes = os.path.getsize(file_path) or 1
+    fecha_hoy = datetime.now().strftime("%Y-%m-%d")
+    progreso = {"bytes": 0}
+    bloque = {}
+    procesados = 0
+
+    def flush():
+        if not bloque:
+            return
+        if not dry_run:
+            # Dedupe por clave dentro del bloque: ON CONFLICT no admite la misma fila dos veces
+            supabase.table('daily_picks').upsert(
+                list(bloque.values()), on_conflict=ON_CONFLICT, returning="minimal"
+            ).execute()
+        bloque.clear()
+        print(f"   📦 {procesados} picks procesados ({progreso['bytes'] * 100 // total_bytes}% del archivo)")
+
+    def on_progress(leidos):
+        progreso["bytes"] = leidos
+
+    for item in iterar_items(file_path, on_progress=on_progress):
+        pick = normalizar_pick(item, fecha_hoy)
+        bloque[pick_key(pick)] = pick
+        procesados += 1
+        if len(bloque) >= chunk_size:
+            flush()
+    flush()
+
+    if procesados and not dry_run:
+        notify_feed_update()
+
+    accion = "validados (dry run)" if dry_run else "cargados"
+    print(f"✅ {procesados} picks {accion}.")
+
+def cargar_rapido(dry_run=False):
     print("🚀 Iniciando carga manual (AI Labeling)...")
     
     try:
@@ -39,95 +255,37 @@ def cargar_rapido():
         print(f"📄 Leídos {len(datos_raw)} picks.")
 
         # --- TRANSFORMACIÓN DE DATOS ---
-        datos_db = []
         fecha_hoy = datetime.now().strftime("%Y-%m-%d")
-        
-        for item in datos_raw:
-            # --- MAPEO INTELIGENTE DE CLAVES (Soporta formato viejo y nuevo) ---
-            match_val = item.get("match") or item.get("evento") or "Unknown Match"
-            league_val = item.get("league_name") or item.get("liga") or "General"
-            selection_val = item.get("selection") or item.get("prediccion") or "Selection"
-            odds_val = float(item.get("odds") or item.get("cuota") or 1.0)
-            
-            # --- EDGE Y CONFIDENCE ---
-            # Si vienen explícitos en el JSON (Nuevo formato)
-            if "edge_percentage" in item:
-                edge_val = float(item["edge_percentage"])
-            else:
-                # Derivar de texto (Viejo formato)
-                edge_txt = str(item.get("edge", "MEDIA")).upper()
-                if "GOLD" in edge_txt: edge_val = 12.5
-                elif "ALTA" in edge_txt or "HIGH" in edge_txt: edge_val = 10.5
-                elif "MEDIUM" in edge_txt: edge_val = 7.5
-                else: edge_val = 4.0
-
-            if "confidence_score" in item:
-                conf_score = int(item["confidence_score"])
-            else:
-                # Derivar de edge
-                conf_score = 5 if edge_val > 10 else 4 if edge_val > 7 else 3
-
-            # --- CATEGORÍA ---
-            is_gold_pick = item.get("is_gold") or item.get("es_gold") or False
-            # Auto-detect gold from edge value if flag missing
-            if edge_val > 11: is_gold_pick = True
-            
-            category_val = "gold" if is_gold_pick else "todays_edge"
-            bet_desc = "AI Value Pick"
-
-            # --- ANÁLISIS RICO ---
-            # Buscamos el texto principal en 'ai_analysis' (nuevo) o 'analisis' (viejo)
-            analysis_text = item.get("verdict") or item.get("ai_analysis") or item.get("analisis")
-            if not analysis_text:
-                analysis_text = f"Oportunidad detectada por Algoritmo en {selection_val}."
-            
-            key_stats = item.get("key_stats", {})
-            key_insights = item.get("key_insights", [])
-
-            rich_analysis_data = {
-                "analysis_text": str(analysis_text),
-                "key_stats": key_stats,
-                "key_insights": key_insights,
-                "risk_assessment": item.get("risk_assessment", {}),
-                "match_time": item.get("match_time", "")
-            }
-
-            # 4. Construir objeto DB
-            pick = {
-                "match": match_val,
-                "league_name": league_val,
-                "selection": selection_val,
-                "odds": odds_val,
-                "edge_percentage": edge_val,
-                "confidence_score": conf_score,
-                "market_type": "Manual Pick", 
-                "match_date": fecha_hoy,     
-                "category": category_val,
-                "ai_analysis": json.dumps(rich_analysis_data),
-                "bet_description": bet_desc, 
-                "is_gold": is_gold_pick
-            }
-            datos_db.append(pick)
-
-        # Borrado AUTOMÁTICO para evitar bloqueo
-        print("🧹 Borrando picks anteriores automáticamente...")
-        try:
-            supabase.table('daily_picks').delete().neq('match', 'impossible_placeholder').execute()
-        except:
-            pass
-            try:
-                supabase.table('daily_picks').delete().neq('match', 'impossible_placeholder').execute()
-                print("🧹 Datos anteriores borrados.")
-            except:
-                pass 
+        datos_db = [normalizar_pick(item, fecha_hoy) for item in datos_raw]
+
+        # --- CARGA INCREMENTAL ---
+        # En vez de borrar todo y reinsertar (la tabla quedaba vacía para el frontend),
+        # comparamos con la tabla y aplicamos solo inserts, updates y deletes.
+        inserts, updates, deletes = calcular_diff(datos_db, leer_tabla_actual())
+        print(f"🔍 Diff: {len(inserts)} nuevos, {len(updates)} modificados, {len(deletes)} a borrar, "
+              f"{len(datos_db) - len(inserts) - len(updates)} sin cambios.")
+
+        if dry_run:
+            imprimir_diff(inserts, updates, deletes)
+            print("🧪 Dry run: no se escribió nada.")
+            return
 
-        # Insertar
-        data = supabase.table('daily_picks').insert(datos_db).execute()
+        aplicar_diff(inserts, updates, deletes)
+        if inserts or updates or deletes:
+            notify_feed_update()  # el backend reconstruye /feed con los cambios
         
-        print(f"✅ ¡ÉXITO! Se han cargado {len(datos_db)} picks con etiquetas de IA.")
+        print(f"✅ ¡ÉXITO! Se han sincronizado {len(datos_db)} picks con etiquetas de IA.")
         
     except Exception as e:
         print(f"❌ Error durante la carga: {e}")
 
 if __name__ == "__main__":
-    cargar_rapido()
+    parser = argparse.ArgumentParser(description="Sincroniza picks_hoy.json con daily_picks")
+    parser.add_argument("--dry-run", action="store_true", help="Solo muestra el diff, sin escribir")
+    parser.add_argument("--stream", metavar="ARCHIVO", help="Backfill en streaming de un JSON array o NDJSON grande")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Picks por upsert en modo streaming")
+    args = parser.parse_args()
+    if args.stream:
+        cargar_streaming(args.stream, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    else:
+        cargar_rapido(dry_run=args.dry_run)
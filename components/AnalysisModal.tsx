@@ -1,8 +1,26 @@
-import React from 'react';
+import React, { useState } from 'react';
+import { supabase } from '../services/supabaseClient';
+import { BetService } from '../services/BetService';
 
 const AnalysisModal = ({ pick, onClose }: { pick: any, onClose: () => void }) => {
+    const [stake, setStake] = useState('');
+    const [betStatus, setBetStatus] = useState<'idle' | 'saving' | 'saved' | 'error'>('idle');
+
     if (!pick) return null;
 
+    // Registra la apuesta en el ledger (cuota de entrada = cuota del pick); el agente la liquida
+    const logBet = async () => {
+        const { data: { session } } = await supabase.auth.getSession();
+        if (!session?.user || !(Number(stake) > 0)) return;
+        setBetStatus('saving');
+        try {
+            await BetService.placeBets(session.user.id, session.access_token, [{ pick_id: String(pick.id), stake: Number(stake) }]);
+            setBetStatus('saved');
+        } catch (e) {
+            setBetStatus('error');
+        }
+    };
+
     // Lógica para limpiar el texto si viene sucio como JSON string
     const getCleanAnalysis = (text: any) => {
         try {
@@ -18,7 +36,8 @@ const AnalysisModal = ({ pick, onClose }: { pick: any, onClose: () => void }) =>
         }
     };
 
-    const analysisText = getCleanAnalysis(pick.ai_analysis);
+    const structured = pick.analysis || pick.analysis_structure;
+    const analysisText = structured?.analysis_text || getCleanAnalysis(pick.ai_analysis);
 
     // Datos simulados por si la IA no te dio stats específicas hoy (Fallback)
     let stats = {
@@ -35,7 +54,7 @@ const AnalysisModal = ({ pick, onClose }: { pick: any, onClose: () => void }) =>
 
     // Extraction from DB JSON structure
     try {
-        const parsed = JSON.parse(pick.ai_analysis);
+        const parsed = structured || JSON.parse(pick.ai_analysis);
         if (parsed.key_stats && Object.keys(parsed.key_stats).length > 0) stats = parsed.key_stats;
         if (parsed.key_insights && parsed.key_insights.length > 0) insights = parsed.key_insights;
     } catch (e) { }
@@ -161,7 +180,19 @@ const AnalysisModal = ({ pick, onClose }: { pick: any, onClose: () => void }) =>
                 </div>
 
                 {/* --- FOOTER --- */}
-                <div className="p-4 border-t border-[#1E293B] bg-[#0F1523] flex justify-end">
+                <div className="p-4 border-t border-[#1E293B] bg-[#0F1523] flex justify-end items-center gap-2">
+                    <input
+                        type="number" min="0" step="0.01" placeholder="Stake" value={stake}
+                        onChange={(e) => { setStake(e.target.value); setBetStatus('idle'); }}
+                        className="w-24 px-3 py-2 rounded-xl bg-[#1E293B] text-white text-sm font-mono border border-[#1E293B] focus:border-emerald-500/50 outline-none"
+                    />
+                    <button
+                        onClick={logBet}
+                        disabled={betStatus === 'saving' || !(Number(stake) > 0)}
+                        className="px-4 py-2 rounded-xl bg-emerald-500/10 text-emerald-400 border border-emerald-500/20 hover:bg-emerald-500/20 text-sm font-bold transition disabled:opacity-40"
+                    >
+                        {betStatus === 'saved' ? 'Bet Logged' : betStatus === 'error' ? 'Retry' : 'Log Bet'}
+                    </button>
                     <button onClick={onClose} className="px-6 py-2 rounded-xl bg-[#1E293B] text-slate-300 hover:bg-slate-700 text-sm font-bold transition">
                         Close Analysis
                     </button>
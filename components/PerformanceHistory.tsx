@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { supabase } from '../services/supabaseClient';
+import { BetService } from '../services/BetService';
 
 interface BetRecord {
     id: string;
@@ -22,9 +23,33 @@ export const PerformanceHistory: React.FC = () => {
     const [clvBeatRate, setClvBeatRate] = useState(0);
 
     useEffect(() => {
-        // In a real app, this would fetch from 'bets' table
-        // For Demo, we populate with Simulate Data that proves AI Value
+        // Signed-in users: latest rows of the 'bets' ledger + ROI/CLV from the backend
+        // aggregates (no loop over the whole history). Otherwise, demo data.
         const fetchHistory = async () => {
+            const { data: { session } } = await supabase.auth.getSession();
+            if (session?.user) {
+                try {
+                    const [history, performance] = await Promise.all([
+                        BetService.getBetHistory(session.user.id, session.access_token),
+                        BetService.getPerformance(session.user.id, session.access_token)
+                    ]);
+                    if (performance.overall.settled > 0) {
+                        setBets(history.map((row: any): BetRecord => ({
+                            id: row.id, match_id: row.match || row.fixture_id, market: row.market_type,
+                            selection: row.selection, odds_entry: Number(row.odds_entry),
+                            odds_closing: row.odds_closing != null ? Number(row.odds_closing) : null,
+                            status: row.status, stake: Number(row.stake), result_amount: Number(row.payout),
+                            placed_at: row.placed_at
+                        })));
+                        setRoi(performance.overall.roi);
+                        setClvBeatRate(performance.overall.clv_beat_rate ?? 0);
+                        return;
+                    }
+                } catch (e) {
+                    console.error("Performance unavailable, showing demo log:", e);
+                }
+            }
+
             // Mock Data representing the "Transparent Log"
             const mockData: BetRecord[] = [
                 {
@@ -89,7 +114,7 @@ export const PerformanceHistory: React.FC = () => {
                 <div className="flex gap-4">
                     <div className="text-right">
                         <div className="text-xs text-text-muted uppercase">ROI</div>
-                        <div className="text-xl font-mono font-bold text-success">+{roi.toFixed(1)}%</div>
+                        <div className="text-xl font-mono font-bold text-success">{roi >= 0 ? '+' : ''}{roi.toFixed(1)}%</div>
                     </div>
                     <div className="text-right">
                         <div className="text-xs text-text-muted uppercase">Superó Línea Cierre</div>
@@ -7,7 +7,7 @@ const PickCard = ({ pick }: { pick: any }) => {
     // Clean redundant text
     let displayAnalysis = pick.ai_analysis;
     try {
-        const parsed = JSON.parse(pick.ai_analysis);
+        const parsed = pick.analysis || pick.analysis_structure || JSON.parse(pick.ai_analysis);
         if (parsed.analysis_text) displayAnalysis = parsed.analysis_text;
     } catch (e) { }
 
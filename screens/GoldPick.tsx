@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { supabase } from '../services/supabaseClient';
+import { BetService } from '../services/BetService';
 import { PaymentModal } from '../components/PaymentModal';
 import { SuccessModal } from '../components/SuccessModal';
 
@@ -10,6 +11,8 @@ interface GoldPickData {
     odds: number;
     edge_percentage: number;
     ai_analysis: string;
+    analysis?: Record<string, any>; // /feed: parsed analysis
+    analysis_structure?: Record<string, any>; // daily_picks jsonb
     confidence?: string; // "HIGH"
     _model_prob?: number; // 0.884
     market_type?: string;
@@ -31,6 +34,14 @@ export const GoldPick: React.FC = () => {
     const fetchGoldPick = async () => {
         try {
             setLoading(true);
+            try {
+                const feed = await BetService.getFeed();
+                if (feed.gold_pick) setPick(feed.gold_pick);
+                return;
+            } catch (e) {
+                console.warn("Feed unavailable, querying Supabase directly:", e);
+            }
+
             const { data, error } = await supabase
                 .from('daily_picks')
                 .select('*')
@@ -166,8 +177,9 @@ export const GoldPick: React.FC = () => {
                                                 try {
                                                     // Try to parse if it looks like JSON
                                                     const raw = pick.ai_analysis || "";
-                                                    if (raw.trim().startsWith("{")) {
-                                                        const parsed = JSON.parse(raw);
+                                                    const structured = pick.analysis || pick.analysis_structure;
+                                                    if (structured || raw.trim().startsWith("{")) {
+                                                        const parsed = structured || JSON.parse(raw);
 
                                                         // Support new structure (analysis_text) or legacy (verdict/market)
                                                         const mainText = parsed.analysis_text || parsed.verdict || parsed.market;
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Screen } from '../types';
 import { supabase } from '../services/supabaseClient';
+import { BetService } from '../services/BetService';
 import { getQuickTickerUpdate, generateDeepAnalysis } from '../services/geminiService';
 import { PaymentModal } from '../components/PaymentModal';
 import { SuccessModal } from '../components/SuccessModal';
@@ -22,7 +23,8 @@ interface Pick {
     match: string; // "Home vs Away"
     odds: number;
     edge_percentage: number;
-    ai_analysis: string; // JSON string or text
+    ai_analysis: string; // plain text (legacy rows: JSON string)
+    analysis_structure?: Record<string, any>; // structured analysis (jsonb)
     event_date: string;
     confidence?: 'LOW' | 'MEDIUM' | 'HIGH';
     created_at?: string;
@@ -95,15 +97,20 @@ export const ValueBetPro: React.FC = () => {
         const fetchData = async () => {
             setLoading(true);
 
-            // 1. Get User/Profile
-            const { data: { session } } = await supabase.auth.getSession();
-            setUser(session?.user ?? null);
-            if (session?.user) {
-                const { data } = await supabase.from('profiles').select('*').eq('user_id', session.user.id).single();
-                if (data) setProfile(data as UserProfile);
+            // 1. Precomputed board from the backend (picks, facets and ticker in one cached response)
+            try {
+                const feed = await BetService.getFeed();
+                setPicks(feed.picks);
+                setLeagueOptions(["All Leagues", ...feed.facets.leagues]);
+                setMarketOptions(["All Markets", ...feed.facets.markets]);
+                setTickerItems(feed.ticker);
+                setLoading(false);
+                return;
+            } catch (e) {
+                console.warn("Feed unavailable, querying Supabase directly:", e);
             }
 
-            // 2. Get Picks
+            // Fallback: Get Picks (user entitlements are loaded once by the Auth & Profile loader)
             console.log("Fetching picks from Supabase...");
             const { data: picksData, error } = await supabase
                 .from('daily_picks')
@@ -132,20 +139,17 @@ export const ValueBetPro: React.FC = () => {
 
                 setPicks(processedPicks);
 
-                // 3. Dynamic Filters Extraction
+                // 2. Dynamic Filters Extraction
                 const leagues = Array.from(new Set(processedPicks.map((p: Pick) => p.league_name))).sort() as string[];
                 const markets = Array.from(new Set(processedPicks.map((p: Pick) => p.market_type))).sort() as string[];
 
                 setLeagueOptions(["All Leagues", ...leagues]);
                 setMarketOptions(["All Markets", ...markets]);
 
-                // 4. Populate Ticker with Real Matches
+                // 3. Populate Ticker with Real Matches
                 const newTickerItems = processedPicks.map((p: Pick) => {
-                    let time = "";
-                    try {
-                        const parsed = JSON.parse(p.ai_analysis);
-                        if (parsed.match_time) time = `[${parsed.match_time}]`;
-                    } catch (e) { }
+                    const matchTime = p.analysis_structure?.match_time;
+                    const time = matchTime ? `[${matchTime}]` : "";
                     return `${p.match.toUpperCase()}  •  ${p.league_name.toUpperCase()}  ${time}`;
                 });
                 setTickerItems(newTickerItems);
@@ -178,13 +182,16 @@ export const ValueBetPro: React.FC = () => {
             const { data: { session } } = await supabase.auth.getSession();
             setUser(session?.user ?? null);
             if (session?.user) {
-                const { data } = await supabase.from('profiles').select('*').eq('user_id', session.user.id).single();
-                if (data) setProfile(data as UserProfile);
+                try {
+                    setProfile(await BetService.getEntitlements(session.user.id));
+                } catch (e) {
+                    // Backend unreachable: read only the gating columns straight from Supabase
+                    const { data } = await supabase.from('profiles').select('user_id, subscription_status, purchased_picks').eq('user_id', session.user.id).single();
+                    if (data) setProfile(data as UserProfile);
+                }
             }
         };
         loadUser();
-
-        loadUser();
     }, []);
 
     // Handlers
@@ -17,11 +17,58 @@ export interface BetAnalysisResponse {
     is_elite_alert: boolean;
 }
 
+export interface Entitlements {
+    user_id: string;
+    subscription_status: 'free' | 'pro';
+    purchased_picks: string[];
+}
+
+export interface PicksFeed {
+    generated_at: string;
+    picks: any[];
+    gold_pick: any | null;
+    facets: { leagues: string[]; markets: string[]; dates: string[] };
+    ticker: string[];
+}
+
+export interface PerformanceStats {
+    settled: number;
+    won: number;
+    lost: number;
+    void: number;
+    staked: number;
+    returned: number;
+    profit: number;
+    refunds: number;
+    roi: number;
+    clv_beat_rate: number | null;
+}
+
+export interface Performance {
+    overall: PerformanceStats;
+    leagues: Record<string, PerformanceStats>;
+    markets: Record<string, PerformanceStats>;
+}
+
+export interface PlaceBetRequest {
+    stake: number;
+    odds?: number;
+    pick_id?: string; // daily pick the bet follows (fixture, match, market and Gold Pick flag come from it)
+    fixture_id?: string; // The Odds API event id, for bets without a pick (pick bets take the pick's)
+    match?: string;
+    league_name?: string;
+    market_type?: string;
+    selection?: string;
+}
+
 export interface InjuryCheckRequest {
     player_name: string;
     team_name: string;
 }
 
+// The ledger endpoints only answer for the signed-in user: send the Supabase session token
+const authHeaders = (accessToken: string) => ({ Authorization: `Bearer ${accessToken}` });
+
 export const BetService = {
     /**
      * Analyzes a potential bet to calculate Edge and Kelly Stake.
@@ -47,6 +94,56 @@ export const BetService = {
         }
     },
 
+    /**
+     * Gating data for a user (PRO status and purchased picks), served from the backend cache.
+     */
+    getEntitlements: async (userId: string): Promise<Entitlements> => {
+        const response = await fetch(`${API_URL}/entitlements/${encodeURIComponent(userId)}`);
+        if (!response.ok) throw new Error(`Entitlements unavailable: ${response.statusText}`);
+        return await response.json();
+    },
+
+    /**
+     * ROI / CLV stats from the backend's incrementally maintained aggregates (O(1) per user).
+     */
+    getPerformance: async (userId: string, accessToken: string): Promise<Performance> => {
+        const response = await fetch(`${API_URL}/performance/${encodeURIComponent(userId)}`, { headers: authHeaders(accessToken) });
+        if (!response.ok) throw new Error(`Performance unavailable: ${response.statusText}`);
+        return await response.json();
+    },
+
+    /**
+     * Latest ledger entries of a user (newest first).
+     */
+    getBetHistory: async (userId: string, accessToken: string, limit: number = 20): Promise<any[]> => {
+        const response = await fetch(`${API_URL}/bets/${encodeURIComponent(userId)}?limit=${limit}`, { headers: authHeaders(accessToken) });
+        if (!response.ok) throw new Error(`Bets unavailable: ${response.statusText}`);
+        return await response.json();
+    },
+
+    /**
+     * Records bets in the user's ledger with their entry odds; the daily agent settles them.
+     */
+    placeBets: async (userId: string, accessToken: string, bets: PlaceBetRequest[]): Promise<{ placed: number }> => {
+        const response = await fetch(`${API_URL}/bets/${encodeURIComponent(userId)}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', ...authHeaders(accessToken) },
+            body: JSON.stringify(bets)
+        });
+        if (!response.ok) throw new Error(`Bets not placed: ${response.statusText}`);
+        return await response.json();
+    },
+
+    /**
+     * Precomputed picks board (parsed analyses + facets). The browser revalidates it with
+     * the ETag, so unchanged boards cost a 304.
+     */
+    getFeed: async (): Promise<PicksFeed> => {
+        const response = await fetch(`${API_URL}/feed`);
+        if (!response.ok) throw new Error(`Feed unavailable: ${response.statusText}`);
+        return await response.json();
+    },
+
     /**
      * Checks for player injuries using Gemini Search Agent
      */